@@ -11,58 +11,235 @@ Requisitos:
 Uso:
 - Configurar .env con TELEGRAM_TOKEN y GROQ_API_KEY
 - Ejecutar: python bot_dashboard.py
+- Desde otro script: `create_app(Config(...))` arma el bot sin leer el .env;
+  importar el módulo no tiene efectos (sirve para workers, simulador y benchmarks)
 
 """
 import os
+import sys
 import json
+import logging
 import io
 import time
 import base64
-import tempfile
 import sqlite3
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, Any, Optional
 import telebot as tlb
+from telebot.formatting import escape_markdown, mbold, mitalic
 from dotenv import load_dotenv
-from groq import Groq
-from transformers import pipeline
 import random
 
-# Visualización
-import matplotlib.pyplot as plt
-import pandas as pd
+# groq, transformers, pandas y matplotlib se importan en el primer uso
+# (ver utils/lazy.py): un despliegue solo de texto no los carga nunca.
+
+# Módulos propios (src/utils)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from utils import metrics
+from utils.memory_cache import MemoryCache
+from utils.progress_logger import get_writer as get_log_writer
+from utils.log_setup import setup_logging
+from utils.dashboard_cache import DashboardCache
+from utils.render_pool import RenderPool
+from utils.lazy import LazyResource, lazy_import
+from utils.groq_client import GroqService
+from utils.stt import TranscriptorEnPartes, crear_backend as crear_backend_stt
+from utils.admision import (Admision, RECHAZAR, EN_PARTES, politica_voz, politica_foto,
+                            metadatos_voz, metadatos_foto)
+from utils.media import elegir_foto, recomprimir_imagen
+from utils.photo_cache import PhotoCache, dhash
+from utils.transcript_cache import TranscriptCache, clave_telegram, clave_contenido
+from analysis import dashboard_queries, dashboard_svg
 
 # ============================================================================
 # CONFIGURACIÓN INICIAL
 # ============================================================================
 
-# Cargar el .env desde un nivel superior (fuera de src)
-load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+logger = logging.getLogger("menta.bot")
 
 
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+def _env_int(nombre: str, default: int) -> int:
+    return int(os.getenv(nombre, default))
 
-if not TELEGRAM_TOKEN:
-    raise ValueError("❌ Faltan credenciales TELEGRAM_TOKEN en .env")
 
-# Inicializar servicios
-bot = tlb.TeleBot(TELEGRAM_TOKEN)
-if GROQ_API_KEY:
-    groq_client = Groq(api_key=GROQ_API_KEY)
-else:
-    groq_client = None
+@dataclass
+class Config:
+    """
+    Todo lo configurable del bot. `Config.from_env()` lo lee del .env y del
+    entorno; en tests, benchmarks o scripts se puede armar a mano.
+    """
+    telegram_token: Optional[str] = None
+    groq_api_key: Optional[str] = None
+    # Groq: timeout por endpoint (segundos) y reintentos ante 429/5xx/red
+    groq_timeout_stt: float = 60.0
+    groq_timeout_vision: float = 45.0
+    groq_max_retries: int = 3
+    # Speech-to-text: backends en orden de preferencia, los siguientes son fallback
+    # ("groq" = Whisper remoto, "local" = faster-whisper int8 en CPU)
+    stt_backends: str = "groq,local"
+    local_whisper_model: str = "small"
+    local_whisper_threads: int = 0
+    # Recortar silencios y recodificar a 16 kHz mono antes de transcribir
+    audio_preprocess: bool = True
+    # Audios más largos que esto se parten en pausas y se transcriben en paralelo
+    stt_chunk_seconds: float = 45.0
+    stt_workers: int = 4
+    stt_max_parallel_per_user: int = 2
+    # Admisión antes de descargar (utils/admision.py): lo que supere esto se rechaza
+    max_voice_bytes: int = 20 * 1024 * 1024
+    max_voice_seconds: int = 15 * 60
+    max_photo_bytes: int = 10 * 1024 * 1024
+    max_photo_pixels: int = 40_000_000
+    # Fotos: variante más chica con este lado mayor (px) y recompresión opcional
+    # antes del modelo de visión (calidad 0 = mandar el JPEG de Telegram tal cual)
+    photo_target_side: int = 768
+    photo_reencode_quality: int = 0
+    photo_reencode_format: str = "jpeg"
+    # Caché de análisis de fotos por hash perceptual: bits de diferencia (de 64)
+    # para considerar dos fotos la misma; negativo = desactivada
+    photo_cache_threshold: int = 5
+    photo_cache_max_entries: int = 5000
+    # Audios y fotos se procesan en memoria; por encima de esto se vuelcan a un temporal
+    media_spill_bytes: int = 8 * 1024 * 1024
+    data_dir: str = "data"
+    # Logs de interacciones en NDJSON (None = <data_dir>/logs)
+    log_dir: Optional[str] = None
+    log_max_bytes: int = 5 * 1024 * 1024
+    # Memoria contextual: usuarios inactivos se desalojan y se recargan de la DB
+    memory_idle_seconds: int = 30 * 60
+    memory_max_bytes: int = 8 * 1024 * 1024
+    # Dashboard: "png" (matplotlib, base64) o "svg" (SVG inline + JSON, más liviano)
+    dashboard_mode: str = "png"
+    dashboard_cache_max_bytes: int = 50 * 1024 * 1024
+    dashboard_cache_max_entries: int = 1000
+    transcript_cache_max_bytes: int = 10 * 1024 * 1024
+    transcript_cache_max_entries: int = 20000
+    # Procesos del pool de render (None = núcleos - 1)
+    render_workers: Optional[int] = None
+    # Precargar el modelo de sentimiento en segundo plano al arrancar
+    preload_models: bool = True
+    # Usuarios habilitados para comandos de administración
+    admin_ids: frozenset = field(default_factory=frozenset)
+
+    @property
+    def db_file(self) -> str:
+        return os.path.join(self.data_dir, "menta.db")
+
+    @property
+    def memory_file(self) -> str:
+        return os.path.join(self.data_dir, "user_memory.json")
+
+    @classmethod
+    def from_env(cls, dotenv_path: Optional[str] = None) -> "Config":
+        # Cargar el .env desde un nivel superior (fuera de src)
+        load_dotenv(dotenv_path or os.path.join(os.path.dirname(__file__), '..', '.env'))
+        return cls(
+            telegram_token=os.getenv("TELEGRAM_TOKEN"),
+            # CLAVE_API_GROQ es el nombre viejo que usaban los handlers de audio
+            groq_api_key=os.getenv("GROQ_API_KEY") or os.getenv("CLAVE_API_GROQ"),
+            groq_timeout_stt=float(os.getenv("GROQ_TIMEOUT_STT", 60)),
+            groq_timeout_vision=float(os.getenv("GROQ_TIMEOUT_VISION", 45)),
+            groq_max_retries=_env_int("GROQ_MAX_RETRIES", 3),
+            stt_backends=os.getenv("STT_BACKENDS", "groq,local"),
+            local_whisper_model=os.getenv("LOCAL_WHISPER_MODEL", "small"),
+            local_whisper_threads=_env_int("LOCAL_WHISPER_THREADS", 0),
+            audio_preprocess=os.getenv("AUDIO_PREPROCESS", "1") != "0",
+            stt_chunk_seconds=float(os.getenv("STT_CHUNK_SECONDS", 45)),
+            stt_workers=_env_int("STT_WORKERS", 4),
+            stt_max_parallel_per_user=_env_int("STT_MAX_PARALLEL_PER_USER", 2),
+            max_voice_bytes=_env_int("MAX_VOICE_BYTES", 20 * 1024 * 1024),
+            max_voice_seconds=_env_int("MAX_VOICE_SECONDS", 15 * 60),
+            max_photo_bytes=_env_int("MAX_PHOTO_BYTES", 10 * 1024 * 1024),
+            max_photo_pixels=_env_int("MAX_PHOTO_PIXELS", 40_000_000),
+            photo_target_side=_env_int("PHOTO_TARGET_SIDE", 768),
+            photo_reencode_quality=_env_int("PHOTO_REENCODE_QUALITY", 0),
+            photo_reencode_format=os.getenv("PHOTO_REENCODE_FORMAT", "jpeg").lower(),
+            photo_cache_threshold=_env_int("PHOTO_CACHE_THRESHOLD", 5),
+            photo_cache_max_entries=_env_int("PHOTO_CACHE_MAX_ENTRIES", 5000),
+            media_spill_bytes=_env_int("MEDIA_SPILL_BYTES", 8 * 1024 * 1024),
+            data_dir=os.getenv("DATA_DIR", "data"),
+            log_dir=os.getenv("LOG_DIR") or None,
+            log_max_bytes=_env_int("LOG_MAX_BYTES", 5 * 1024 * 1024),
+            memory_idle_seconds=_env_int("MEMORY_IDLE_SECONDS", 30 * 60),
+            memory_max_bytes=_env_int("MEMORY_MAX_BYTES", 8 * 1024 * 1024),
+            dashboard_mode=os.getenv("DASHBOARD_MODE", "png").lower(),
+            dashboard_cache_max_bytes=_env_int("DASHBOARD_CACHE_MAX_BYTES", 50 * 1024 * 1024),
+            dashboard_cache_max_entries=_env_int("DASHBOARD_CACHE_MAX_ENTRIES", 1000),
+            transcript_cache_max_bytes=_env_int("TRANSCRIPT_CACHE_MAX_BYTES", 10 * 1024 * 1024),
+            transcript_cache_max_entries=_env_int("TRANSCRIPT_CACHE_MAX_ENTRIES", 20000),
+            render_workers=_env_int("RENDER_WORKERS", 0) or None,
+            preload_models=os.getenv("PRELOAD_MODELS", "1") != "0",
+            admin_ids=frozenset(x.strip() for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip()),
+        )
+
+
+# Configuración activa: la reemplaza create_app(). Importar este módulo no
+# lee el .env, no crea carpetas ni conexiones y no carga modelos.
+CONFIG = Config()
+
+# Archivos de persistencia (se recalculan desde CONFIG en create_app)
+MEMORY_FILE = CONFIG.memory_file
+DB_FILE = CONFIG.db_file
+
+# Servicios que arma create_app()
+bot: Optional[tlb.TeleBot] = None
+dashboard_cache: Optional[DashboardCache] = None
+transcript_cache: Optional[TranscriptCache] = None
+admision: Optional[Admision] = None
+photo_cache: Optional[PhotoCache] = None
+render_pool: Optional[RenderPool] = None
+
+# Preprocesamiento de audio (numpy + PyAV): se importa con el primer audio
+audio_tools = lazy_import("utils.audio_tools")
+
+
+def _crear_groq():
+    if not CONFIG.groq_api_key:
+        return None
+    return GroqService(
+        CONFIG.groq_api_key,
+        timeouts={"stt": CONFIG.groq_timeout_stt, "vision": CONFIG.groq_timeout_vision},
+        max_retries=CONFIG.groq_max_retries,
+    )
+
+
+# Cliente de Groq compartido (un pool HTTP para todo el bot): se crea con el primer audio o foto
+groq_client = LazyResource(_crear_groq, name="groq")
+
+
+def _crear_stt():
+    backend = crear_backend_stt(
+        CONFIG.stt_backends,
+        groq_service=groq_client.get(),
+        local_model=CONFIG.local_whisper_model,
+        local_threads=CONFIG.local_whisper_threads,
+        spill_bytes=CONFIG.media_spill_bytes,
+    )
+    if backend is None:
+        return None
+    return TranscriptorEnPartes(backend, CONFIG.stt_workers, CONFIG.stt_max_parallel_per_user)
+
 
-# Crear directorios necesarios
-os.makedirs("data", exist_ok=True)
-os.makedirs("data/temp", exist_ok=True)
-os.makedirs("data/dashboard", exist_ok=True)
+# Cadena de backends de STT (utils/stt.py) con transcripción en partes para audios
+# largos; el modelo local se carga recién si hace falta
+stt_backend = LazyResource(_crear_stt, name="stt")
+
+
+def _cargar_renderer():
+    if CONFIG.dashboard_mode == "svg":
+        return dashboard_svg
+    from analysis import dashboard  # matplotlib: recién con el primer /dashboard
+    return dashboard
+
+
+dashboard_renderer = LazyResource(_cargar_renderer, name="dashboard_renderer")
+
+
+def dashboard_template_version() -> str:
+    """Clave de versión de la caché de dashboards (la versión vive en cada módulo de render)."""
+    return f"{CONFIG.dashboard_mode}-{dashboard_renderer.get().TEMPLATE_VERSION}"
 
-# Archivos de persistencia
-MEMORY_FILE = "data/user_memory.json"
-LOGS_FILE = "data/user_logs.json"
-DATASET_FILE = "data/dataset.json"
-DB_FILE = "data/menta.db"
 
 # ============================================================================
 # 0. BASE DE DATOS SQLITE - INTERACCIONES
@@ -84,48 +261,78 @@ def init_db():
         recomendacion TEXT
     )
     """)
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS user_memory (
+        user_id TEXT PRIMARY KEY,
+        data TEXT
+    )
+    """)
+    # Latencia de respuesta por interacción (para el dashboard de administración)
+    columnas = {row[1] for row in c.execute("PRAGMA table_info(interactions)")}
+    if "latencia_ms" not in columnas:
+        c.execute("ALTER TABLE interactions ADD COLUMN latencia_ms INTEGER")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_interactions_user ON interactions(user_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_interactions_ts ON interactions(timestamp)")
+    # Índices que usan las consultas agregadas del dashboard
+    dashboard_queries.asegurar_indices(conn)
+    # Migrar la memoria del JSON viejo la primera vez
+    c.execute("SELECT COUNT(*) FROM user_memory")
+    if c.fetchone()[0] == 0 and os.path.exists(MEMORY_FILE):
+        legacy = cargar_memoria()
+        c.executemany(
+            "INSERT OR IGNORE INTO user_memory (user_id, data) VALUES (?, ?)",
+            [(k, json.dumps(v, ensure_ascii=False)) for k, v in legacy.items() if isinstance(v, dict)]
+        )
     conn.commit()
     conn.close()
 
 
-def save_interaction(user_id: int, tipo: str, texto: str, sentimiento: str, alimentos: Optional[str], evaluacion: Optional[str], recomendacion: Optional[str]):
+def save_interaction(user_id: int, tipo: str, texto: str, sentimiento: str, alimentos: Optional[str], evaluacion: Optional[str], recomendacion: Optional[str], latencia_ms: Optional[int] = None):
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
     c.execute(
-        "INSERT INTO interactions (user_id, timestamp, type, text, sentimiento, alimentos, evaluacion, recomendacion) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-        (str(user_id), datetime.now().isoformat(), tipo, texto[:1000] if texto else None, sentimiento, alimentos, evaluacion, recomendacion)
+        "INSERT INTO interactions (user_id, timestamp, type, text, sentimiento, alimentos, evaluacion, recomendacion, latencia_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (str(user_id), datetime.now().isoformat(), tipo, texto[:1000] if texto else None, sentimiento, alimentos, evaluacion, recomendacion, latencia_ms)
     )
     conn.commit()
     conn.close()
+    if latencia_ms is not None:
+        metrics.observe(f"latencia.{tipo}", latencia_ms / 1000)
 
 
-def fetch_user_interactions(user_id: int) -> pd.DataFrame:
-    conn = sqlite3.connect(DB_FILE)
-    df = pd.read_sql_query("SELECT * FROM interactions WHERE user_id = ? ORDER BY timestamp", conn, params=(str(user_id),))
-    conn.close()
-    return df
+def ms_desde(inicio: float) -> int:
+    """Milisegundos transcurridos desde `inicio` (time.perf_counter())."""
+    return int((time.perf_counter() - inicio) * 1000)
+
 
 # ============================================================================
 # 1. ANÁLISIS DE SENTIMIENTOS (NLP)
 # ============================================================================
 
-print("🧠 Cargando modelo de análisis de sentimientos...")
-try:
-    sentiment_analyzer = pipeline(
+def _cargar_modelo_sentimiento():
+    from transformers import pipeline
+
+    logger.info("🧠 Cargando modelo de análisis de sentimientos...")
+    modelo = pipeline(
         "sentiment-analysis",
         model="pysentimiento/robertuito-sentiment-analysis"
     )
-    print("✅ Modelo de sentimiento cargado correctamente")
-except Exception as e:
-    print(f"⚠️ Error cargando modelo: {e}")
-    sentiment_analyzer = None
+    logger.info("✅ Modelo de sentimiento cargado correctamente")
+    return modelo
+
+
+# El modelo se carga en el primer análisis (o antes, con la precarga de __main__)
+sentiment_analyzer = LazyResource(_cargar_modelo_sentimiento, name="sentimiento")
 
 
 def analizar_sentimiento(texto: str) -> str:
-    if not texto or not sentiment_analyzer:
+    if not texto:
+        return "NEU"
+    analizador = sentiment_analyzer.get()
+    if not analizador:
         return "NEU"
     try:
-        resultado = sentiment_analyzer(texto[:512])[0]
+        resultado = analizador(texto[:512])[0]
         label = resultado.get("label", "NEU").upper()
         if "POS" in label:
             return "POS"
@@ -134,7 +341,7 @@ def analizar_sentimiento(texto: str) -> str:
         else:
             return "NEU"
     except Exception as e:
-        print(f"⚠️ Error en análisis de sentimiento: {e}")
+        logger.warning("⚠️ Error en análisis de sentimiento: %s", e)
         return "NEU"
 
 # ============================================================================
@@ -454,46 +661,71 @@ def detectar_emocion_por_palabras(texto: str) -> str:
 # 3. AUDIO -> TEXTO (Speech-to-Text)
 # ============================================================================
 
-def speech_to_text(audio_bytes: bytes) -> Optional[str]:
-    if not groq_client:
+def speech_to_text(audio_bytes: bytes, user_id=None, on_parcial=None, en_partes=True) -> Optional[str]:
+    stt = stt_backend.get()
+    if not stt:
         return None
+    partes = [audio_bytes]
+    tools = audio_tools.get() if CONFIG.audio_preprocess else None
+    if tools:
+        # audios cortos (ruta rápida de la admisión): sin buscar dónde partir
+        max_segundos = CONFIG.stt_chunk_seconds if en_partes else None
+        partes = tools.preprocesar_en_partes(audio_bytes, max_segundos=max_segundos)
+        if not partes:
+            # solo silencio: no hace falta llamar a Whisper
+            return ""
+    elif en_partes:
+        # partir en pausas necesita decodificar: sin preprocesado va de una sola vez
+        logger.warning("⚠️ Audio largo sin partir (AUDIO_PREPROCESS=0): se transcribe de una sola vez")
+        metrics.inc("stt.en_partes_sin_partir")
     try:
-        with tempfile.NamedTemporaryFile(suffix=".ogg", delete=False) as temp_audio:
-            temp_audio.write(audio_bytes)
-            temp_audio_path = temp_audio.name
-        with open(temp_audio_path, "rb") as audio_file:
-            transcription = groq_client.audio.transcriptions.create(
-                model="whisper-large-v3-turbo",
-                file=audio_file,
-                language="es",
-                prompt="Usuario hablando sobre alimentaci\u00f3n o emociones",
-                response_format="json"
-            )
-        os.remove(temp_audio_path)
-        texto = transcription.text
-        return texto
+        return stt.transcribe(partes, user_id, on_parcial)
     except Exception as e:
-        print(f"❌ Error en transcripción: {e}")
+        logger.error("❌ Error en transcripción: %s", e)
         return None
 
+
+def transcribir_voz(voice, user_id=None, on_parcial=None, en_partes=True) -> Optional[str]:
+    """
+    Transcribe una nota de voz de Telegram pasando por la caché: un audio ya
+    visto (mismo file_unique_id) no se descarga ni se manda de nuevo a Whisper;
+    uno con otro id pero el mismo contenido se descarga pero no se transcribe.
+    """
+    clave_tg = clave_telegram(voice.file_unique_id)
+    texto = transcript_cache.get(clave_tg)
+    if texto is not None:
+        return texto
+    file_info = bot.get_file(voice.file_id)
+    audio_bytes = bot.download_file(file_info.file_path)
+    clave_hash = clave_contenido(audio_bytes)
+    texto = transcript_cache.get(clave_hash)
+    if texto is None:
+        metrics.inc("transcript_cache.misses")
+        texto = speech_to_text(audio_bytes, user_id, on_parcial, en_partes)
+        if texto is None:
+            # los errores no se cachean: el reintento del usuario vuelve a probar
+            return None
+    transcript_cache.put([clave_tg, clave_hash], texto)
+    return texto
+
 # ============================================================================
 # 4. ANÁLISIS DE IMÁGENES
 # ============================================================================
 
-def analizar_imagen_comida(image_path: str) -> Dict[str, Any]:
-    if not groq_client:
+def analizar_imagen_comida(image_bytes: bytes, mime: str = "image/jpeg") -> Dict[str, Any]:
+    client = groq_client.get()
+    if not client:
         return {"error": "Groq API key no configurada", "alimentos": [], "evaluacion": "error", "recomendacion": "Groq no disponible"}
     try:
-        with open(image_path, "rb") as img_file:
-            image_data = base64.b64encode(img_file.read()).decode('utf-8')
+        image_data = base64.b64encode(image_bytes).decode('utf-8')
         prompt = """Sos un nutricionista argentino. Analizá esta comida y respondé en JSON:\n\n{\n  \"alimentos\": [\"alimento1\", \"alimento2\"],\n  \"evaluacion\": \"saludable\",\n  \"calorias_estimadas\": \"400-500 kcal\",\n  \"aspectos_positivos\": [\"aspecto1\"],\n  \"aspectos_mejorar\": [\"aspecto1\"],\n  \"recomendacion\": \"Consejo breve y amigable\"\n}\n\nevaluacion puede ser: \"saludable\", \"moderada\", o \"poco_saludable\"\nUsa lenguaje argentino: vos, te, podés"""
-        response = groq_client.chat.completions.create(
+        response = client.vision(
             model="meta-llama/llama-4-scout-17b-16e-instruct",
             messages=[{
                 "role": "user",
                 "content": [
                     {"type": "text", "text": prompt},
-                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_data}"}}
+                    {"type": "image_url", "image_url": {"url": f"data:{mime};base64,{image_data}"}}
                 ]
             }],
             temperature=0.7,
@@ -511,7 +743,7 @@ def analizar_imagen_comida(image_path: str) -> Dict[str, Any]:
             pass
         return {"alimentos": ["Comida detectada"], "evaluacion": "detectada", "recomendacion": resultado[:300]}
     except Exception as e:
-        print(f"❌ Error en análisis de imagen: {e}")
+        logger.error("❌ Error en análisis de imagen: %s", e)
         return {"error": str(e), "alimentos": [], "evaluacion": "error", "recomendacion": "Hubo un problema al analizar la imagen."}
 
 
@@ -547,6 +779,7 @@ def formatear_analisis_imagen(analisis: Dict) -> str:
 # ============================================================================
 
 def cargar_memoria() -> Dict:
+    """Lee el JSON de memoria viejo (solo se usa para migrarlo a la DB)."""
     if os.path.exists(MEMORY_FILE):
         try:
             with open(MEMORY_FILE, "r", encoding="utf-8") as f:
@@ -556,22 +789,45 @@ def cargar_memoria() -> Dict:
     return {}
 
 
-def guardar_memoria(memoria: Dict):
-    with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(memoria, f, ensure_ascii=False, indent=2)
+def cargar_memoria_usuario(user_key: str) -> Optional[Dict]:
+    conn = sqlite3.connect(DB_FILE)
+    row = conn.execute("SELECT data FROM user_memory WHERE user_id = ?", (user_key,)).fetchone()
+    conn.close()
+    return json.loads(row[0]) if row else None
+
+
+def guardar_memoria_usuario(user_key: str, data: Dict):
+    conn = sqlite3.connect(DB_FILE)
+    conn.execute(
+        "INSERT OR REPLACE INTO user_memory (user_id, data) VALUES (?, ?)",
+        (user_key, json.dumps(data, ensure_ascii=False))
+    )
+    conn.commit()
+    conn.close()
+
+
+# Sin create_app() usa los límites por defecto de Config
+memory_cache = MemoryCache(
+    cargar_memoria_usuario,
+    guardar_memoria_usuario,
+    idle_seconds=CONFIG.memory_idle_seconds,
+    max_bytes=CONFIG.memory_max_bytes,
+)
 
 
 def actualizar_memoria(user_id: int, sentimiento: str, recomendacion: str):
-    memoria = cargar_memoria()
     user_key = str(user_id)
     now = datetime.now().isoformat()
-    if user_key not in memoria:
-        memoria[user_key] = {
+    user_data = memory_cache.get(user_key)
+    if user_data is None:
+        user_data = {
             "primera_interaccion": now,
             "total_interacciones": 0,
             "estadisticas": {"positivos": 0, "negativos": 0, "neutros": 0}
         }
-    user_data = memoria[user_key]
+    else:
+        # copia para no modificar la entrada cacheada si falla el guardado
+        user_data = json.loads(json.dumps(user_data))
     # asegurar llaves existentes
     user_data.setdefault("total_interacciones", 0)
     user_data.setdefault("estadisticas", {"positivos": 0, "negativos": 0, "neutros": 0})
@@ -588,14 +844,12 @@ def actualizar_memoria(user_id: int, sentimiento: str, recomendacion: str):
     else:
         user_data["estadisticas"]["neutros"] += 1
 
-    memoria[user_key] = user_data
-    guardar_memoria(memoria)
-    print(f"💾 Memoria actualizada: {user_id} → {sentimiento}")
+    memory_cache.put(user_key, user_data)
+    logger.debug("💾 Memoria actualizada", extra={"user_id": user_key, "sentimiento": sentimiento})
 
 
 def obtener_memoria(user_id: int) -> Optional[Dict]:
-    memoria = cargar_memoria()
-    return memoria.get(str(user_id))
+    return memory_cache.get(str(user_id))
 
 # ============================================================================
 # 6. LOGS (JSON)
@@ -603,160 +857,40 @@ def obtener_memoria(user_id: int) -> Optional[Dict]:
 
 def agregar_log(user_id: int, mensaje: str, sentimiento: str, respuesta: str):
     try:
-        if os.path.exists(LOGS_FILE):
-            with open(LOGS_FILE, "r", encoding="utf-8") as f:
-                logs = json.load(f)
-        else:
-            logs = []
-        logs.append({
+        get_log_writer().append({
             "user_id": str(user_id),
             "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "mensaje": mensaje[:100],
             "sentimiento": sentimiento,
             "respuesta": respuesta[:100] if isinstance(respuesta, str) else str(respuesta)[:100]
         })
-        with open(LOGS_FILE, "w", encoding="utf-8") as f:
-            json.dump(logs[-1000:], f, ensure_ascii=False, indent=2)
     except Exception as e:
-        print(f"⚠️ Error guardando log: {e}")
+        logger.warning("⚠️ Error guardando log: %s", e)
 
 # ============================================================================
 # 7. DASHBOARD (GRAFICOS + HTML)
 # ============================================================================
 
-def generate_dashboard_html(user_id):
-    """
-    Genera un dashboard HTML con gráficos embebidos en base64.
-    No requiere archivos de imagen externos.
-    """
-    import matplotlib.dates as mdates
-
-    # Creo carpeta donde guardar el dashboard 
-    dashboard_dir = "data/dashboard"
-    os.makedirs(dashboard_dir, exist_ok=True)
-    output_path = os.path.join(dashboard_dir, f"{user_id}_dashboard.html")
-
-    # Conectamos la base de datos 
-    db_path = "data/menta.db"
-    if not os.path.exists(db_path):
-        print("⚠️ No hay base de datos. Generá interacciones antes de usar /dashboard.")
-        return None
-
-    conn = sqlite3.connect(db_path)
-    df = pd.read_sql_query("SELECT * FROM interactions WHERE user_id = ?", conn, params=(user_id,))
+def last_interaction_id(user_id) -> int:
+    """Id de la última interacción del usuario (0 si no tiene). Es parte de la clave de caché."""
+    conn = sqlite3.connect(DB_FILE)
+    row = conn.execute("SELECT MAX(id) FROM interactions WHERE user_id = ?", (str(user_id),)).fetchone()
     conn.close()
-
-    if df.empty:
-        html = f"<h2>Dashboard - Usuario {user_id}</h2><p>No hay datos suficientes para generar el dashboard.</p>"
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(html)
-        return output_path
-
-    # Función auxiliar para convertir imagen en base64 
-    def fig_to_base64(fig):
-        buffer = io.BytesIO()
-        fig.savefig(buffer, format="png", bbox_inches="tight")
-        buffer.seek(0)
-        img_b64 = base64.b64encode(buffer.read()).decode("utf-8")
-        plt.close(fig)
-        return img_b64
-
-    # --- Gráfico 1: Evolución del estado emocional ---
-    fig1, ax1 = plt.subplots(figsize=(7, 4))
-    df["fecha"] = pd.to_datetime(df["timestamp"])
-    df = df.sort_values("fecha")
-
-    # Convertir sentimientos en valores numéricos
-    df["sentimiento_num"] = df["sentimiento"].map({"NEG": -1, "NEU": 0, "POS": 1})
-
-    # Graficar la evolución
-    ax1.plot(df["fecha"], df["sentimiento_num"], marker="o", linewidth=2, color="#2a7c4e")
-    ax1.set_title("Evolución del estado emocional")
-    ax1.set_xlabel("Fecha")
-    ax1.set_ylabel("Nivel de emoción (-1 Negativo / +1 Positivo)")
-
-    # Rotar fechas y mostrar menos ticks para no amontonarlas
-    ax1.xaxis.set_major_locator(mdates.AutoDateLocator())
-    ax1.xaxis.set_major_formatter(mdates.DateFormatter("%d-%m"))
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
-
-    mood_b64 = fig_to_base64(fig1)
-
-    # --- Gráfico 2: Frecuencia por evaluación de comidas ---
-    if "evaluacion" in df.columns and not df["evaluacion"].isna().all():
-        evaluaciones = df["evaluacion"].value_counts()
-        fig2, ax2 = plt.subplots()
-        ax2.bar(evaluaciones.index, evaluaciones.values, color=["green", "orange", "red"])
-        ax2.set_title("Frecuencia por evaluación de comidas")
-        ax2.set_xlabel("Tipo de comida")
-        ax2.set_ylabel("Cantidad")
-        food_b64 = fig_to_base64(fig2)
-    else:
-        food_b64 = ""
-
-    # --- Gráfico 3: Recomendaciones más frecuentes ---
-    if "recomendacion" in df.columns and not df["recomendacion"].isna().all():
-        top_recs = df["recomendacion"].value_counts().head(10)
-        fig3, ax3 = plt.subplots()
-        ax3.barh(top_recs.index[::-1], top_recs.values[::-1], color="skyblue")
-        ax3.set_title("Recomendaciones más frecuentes")
-        ax3.set_xlabel("Cantidad de veces")
-        recs_b64 = fig_to_base64(fig3)
-    else:
-        recs_b64 = ""
-
-    # Crea el HTML final con las imágenes embebidas 
-    html = f"""
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Dashboard - Usuario {user_id}</title>
-        <style>
-            body {{ font-family: Arial, sans-serif; margin: 40px; background: #fafafa; color: #333; }}
-            h2 {{ color: #2a7c4e; }}
-            h3 {{ color: #444; margin-top: 40px; }}
-            img {{ display: block; margin-top: 10px; margin-bottom: 30px; max-width: 700px;
-                  border-radius: 10px; box-shadow: 0 2px 6px rgba(0,0,0,0.2); }}
-        </style>
-    </head>
-    <body>
-        <h2>Dashboard - Usuario {user_id}</h2>
-        
-        <h3>Evolución del estado emocional</h3>
-        {'<img src="data:image/png;base64,' + mood_b64 + '">' if mood_b64 else '<p>No hay datos emocionales suficientes.</p>'}
-
-        <h3>Frecuencia por evaluación de comidas</h3>
-        {'<img src="data:image/png;base64,' + food_b64 + '">' if food_b64 else '<p>No hay datos de comidas suficientes.</p>'}
-
-        <h3>Recomendaciones más frecuentes</h3>
-        {'<img src="data:image/png;base64,' + recs_b64 + '">' if recs_b64 else '<p>No hay recomendaciones registradas.</p>'}
-    </body>
-    </html>
-    """
-
-    # --- Guardar el archivo HTML ---
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html)
-
-    print(f"✅ Dashboard generado: {output_path}")
-    return output_path
+    return row[0] or 0
 
 
 # ============================================================================
 # 8. MANEJADORES DEL BOT
 # ============================================================================
 
-@bot.message_handler(commands=["start", "reset"])
 def cmd_start(message: tlb.types.Message):
     user_id = message.from_user.id
     username = message.from_user.username or "Usuario"
     bienvenida = f"""🌱 *¡Hola {username}! Soy Menta, tu asistente de bienestar alimenticio.* 🧠🍎\n\nPodés interactuar conmigo de 3 formas:\n\n💬 *Texto:* Contame cómo te sentís\n🎤 *Audio:* Mandame un mensaje de voz\n📸 *Foto:* Enviame una imagen de tu comida\n\n_Soy un bot que sirve para analizar tus emociones y darte consejos personalizados._ ✨"""
-    print(f"👤 Usuario conectado: {user_id} (@{username})")
+    logger.info("👤 Usuario conectado", extra={"user_id": user_id})
     bot.reply_to(message, bienvenida, parse_mode="Markdown")
 
 
-@bot.message_handler(commands=["help", "ayuda"])
 def mostrar_ayuda(message):
     texto_ayuda = (
         "🌿 *¡Hola! Soy MENTA*, tu consejera de bienestar emocional y alimentación consciente.\n\n"
@@ -780,7 +914,6 @@ def mostrar_ayuda(message):
 
     bot.reply_to(message, texto_ayuda, parse_mode="Markdown")
 
-@bot.message_handler(commands=["progreso"])
 def cmd_progreso(message: tlb.types.Message):
     user_id = message.from_user.id
     memoria = obtener_memoria(user_id)
@@ -800,29 +933,112 @@ def cmd_progreso(message: tlb.types.Message):
     bot.reply_to(message, resumen, parse_mode="Markdown")
 
 
-@bot.message_handler(commands=["dashboard"])
+def cmd_metricas(message: tlb.types.Message):
+    if str(message.from_user.id) not in CONFIG.admin_ids:
+        bot.reply_to(message, "⛔ Comando reservado para administradores.")
+        return
+    bot.reply_to(message, "📈 Métricas\n\n" + metrics.format_report())
+
+
+def enviar_dashboard(chat_id, user_id, last_id, html):
+    """Sube el HTML como documento y guarda su file_id en la caché."""
+    enviado = bot.send_document(
+        chat_id,
+        io.BytesIO(html.encode("utf-8")),
+        caption='Dashboard generado (abrir en navegador)',
+        visible_file_name=f"{user_id}_dashboard.html",
+    )
+    if enviado and enviado.document:
+        dashboard_cache.set_file_id(user_id, last_id, dashboard_template_version(), enviado.document.file_id)
+
+
 def cmd_dashboard(message: tlb.types.Message):
     user_id = message.from_user.id
-    bot.send_chat_action(message.chat.id, "upload_document")
+    chat_id = message.chat.id
+    bot.send_chat_action(chat_id, "upload_document")
     try:
-        html_path = generate_dashboard_html(user_id)
-        # enviar archivo HTML y las imagenes generadas
-        folder = os.path.dirname(html_path)
-        files_to_send = [html_path]
-        # incluir imagenes png generados para el usuario
-        for fname in os.listdir(folder):
-            if fname.startswith(str(user_id)) and (fname.endswith('.png') or fname.endswith('.html')):
-                files_to_send.append(os.path.join(folder, fname))
-        # Enviar html como documento
-        with open(html_path, 'rb') as f:
-            bot.send_document(message.chat.id, f, caption='Dashboard generado (abrir en navegador)')
+        # Si no hubo interacciones nuevas desde el último render, reutilizamos HTML y file_id
+        last_id = last_interaction_id(user_id)
+        cached = dashboard_cache.get(user_id, last_id, dashboard_template_version())
+        if cached and cached["file_id"]:
+            bot.send_document(chat_id, cached["file_id"], caption='Dashboard generado (abrir en navegador)')
+            return
+        if cached:
+            enviar_dashboard(chat_id, user_id, last_id, cached["html"])
+            return
     except Exception as e:
-        print(f"❌ Error generando dashboard: {e}")
-        bot.send_message(message.chat.id, "⚠️ No se pudo generar el dashboard.")
+        logger.exception("❌ Error generando dashboard", extra={"user_id": user_id})
+        bot.send_message(chat_id, "⚠️ No se pudo generar el dashboard.")
+        return
+
+    # Render en el pool de procesos: respondemos cuando termine
+    def al_terminar(html, error):
+        if error is not None or html is None:
+            if error is not None:
+                logger.error("❌ Error generando dashboard: %s", error, extra={"user_id": user_id})
+                bot.send_message(chat_id, "⚠️ No se pudo generar el dashboard.")
+            else:
+                bot.send_message(chat_id, "📊 Todavía no hay datos para tu dashboard. Empezá a contarme cómo te sentís.")
+            return
+        dashboard_cache.put(user_id, last_id, dashboard_template_version(), html)
+        enviar_dashboard(chat_id, user_id, last_id, html)
+
+    try:
+        nuevo = render_pool.submit(
+            ("dashboard", str(user_id)), dashboard_renderer.get().render_dashboard_html, DB_FILE, user_id,
+            on_done=al_terminar, destino=chat_id,
+        )
+    except Exception:
+        logger.exception("❌ No se pudo encolar el dashboard", extra={"user_id": user_id})
+        bot.reply_to(message, "⚠️ No se pudo generar el dashboard. Probá de nuevo en unos segundos.")
+        return
+    if nuevo:
+        bot.reply_to(message, "⏳ Estoy armando tu dashboard, te lo mando en un momento.")
+    else:
+        bot.reply_to(message, "⏳ Ya estoy armando tu dashboard, te lo mando apenas esté listo.")
+
+
+def cmd_admin_dashboard(message: tlb.types.Message):
+    """Dashboard global (todos los usuarios). Uso: /admin_dashboard [desde AAAA-MM-DD] [hasta AAAA-MM-DD]"""
+    if str(message.from_user.id) not in CONFIG.admin_ids:
+        bot.reply_to(message, "⛔ Comando reservado para administradores.")
+        return
+    chat_id = message.chat.id
+    partes = message.text.split()[1:3]
+    desde = partes[0] if len(partes) > 0 else None
+    hasta = partes[1] if len(partes) > 1 else None
+
+    def al_terminar(html, error):
+        if error is not None or html is None:
+            logger.error("❌ Error generando dashboard global: %s", error)
+            bot.send_message(chat_id, "⚠️ No se pudo generar el dashboard global.")
+            return
+        bot.send_document(
+            chat_id,
+            io.BytesIO(html.encode("utf-8")),
+            caption="Dashboard global (abrir en navegador)",
+            visible_file_name="admin_dashboard.html",
+        )
+
+    from analysis import admin_dashboard  # pandas/numpy solo para administradores
+
+    try:
+        nuevo = render_pool.submit(
+            ("admin_dashboard", desde, hasta), admin_dashboard.generar_admin_html, DB_FILE, desde, hasta,
+            on_done=al_terminar, destino=chat_id,
+        )
+    except Exception:
+        logger.exception("❌ No se pudo encolar el dashboard global")
+        bot.reply_to(message, "⚠️ No se pudo generar el dashboard global. Probá de nuevo en unos segundos.")
+        return
+    if nuevo:
+        bot.reply_to(message, "⏳ Armando el dashboard global, puede tardar con muchas interacciones.")
+    else:
+        bot.reply_to(message, "⏳ El dashboard global ya se está armando.")
 
 
-@bot.message_handler(content_types=["text"])
 def handle_text(message):
+    inicio = time.perf_counter()
     user_id = message.from_user.id
     user_input = message.text.lower().strip()
 
@@ -831,7 +1047,7 @@ def handle_text(message):
         respuesta = generar_saludo()
         bot.reply_to(message, respuesta, parse_mode="Markdown")
         actualizar_memoria(user_id, "POS", respuesta)
-        save_interaction(user_id, 'text', user_input, "POS", None, None, respuesta)
+        save_interaction(user_id, 'text', user_input, "POS", None, None, respuesta, latencia_ms=ms_desde(inicio))
         return
 
     # --- 2️) Detectar despedidas ---
@@ -839,7 +1055,7 @@ def handle_text(message):
         respuesta = generar_despedida()
         bot.reply_to(message, respuesta, parse_mode="Markdown")
         actualizar_memoria(user_id, "NEU", respuesta)
-        save_interaction(user_id, 'text', user_input, "NEU", None, None, respuesta)
+        save_interaction(user_id, 'text', user_input, "NEU", None, None, respuesta, latencia_ms=ms_desde(inicio))
         return
 
     # --- 3️) Detectar emoción mediante palabras clave ---
@@ -856,7 +1072,7 @@ def handle_text(message):
             sentimiento = "NEG" if emocion_detectada in ["ansiedad", "estrés", "culpa", "frustración", "tristeza", "aburrimiento"] else "POS"
             actualizar_memoria(user_id, sentimiento, respuesta)
             agregar_log(user_id, f"[TEXTO] {user_input}", sentimiento, respuesta)
-            save_interaction(user_id, 'text', user_input, sentimiento, None, None, respuesta)
+            save_interaction(user_id, 'text', user_input, sentimiento, None, None, respuesta, latencia_ms=ms_desde(inicio))
             return
 
     # --- 4️) Detección de intenciones específicas (peso y músculo) ---
@@ -864,14 +1080,14 @@ def handle_text(message):
         respuesta = random.choice(DATASET["recomendaciones"]["bajar_peso"])
         bot.reply_to(message, f"🍎 *Consejo para bajar de peso:*\n\n{respuesta}", parse_mode="Markdown")
         actualizar_memoria(user_id, "POS", respuesta)
-        save_interaction(user_id, 'text', user_input, "POS", None, None, respuesta)
+        save_interaction(user_id, 'text', user_input, "POS", None, None, respuesta, latencia_ms=ms_desde(inicio))
         return
 
     if any(palabra in user_input for palabra in ["ganar músculo", "masa muscular", "aumentar masa", "volumen", "subir de peso saludable"]):
         respuesta = random.choice(DATASET["recomendaciones"]["masa_muscular"])
         bot.reply_to(message, f"💪 *Consejo para aumentar masa muscular:*\n\n{respuesta}", parse_mode="Markdown")
         actualizar_memoria(user_id, "POS", respuesta)
-        save_interaction(user_id, 'text', user_input, "POS", None, None, respuesta)
+        save_interaction(user_id, 'text', user_input, "POS", None, None, respuesta, latencia_ms=ms_desde(inicio))
         return
     
 
@@ -886,7 +1102,7 @@ def handle_text(message):
                     parse_mode="Markdown"
                 )
                 actualizar_memoria(user_id, "POS", receta)
-                save_interaction(user_id, 'text', user_input, "POS", None, None, receta)
+                save_interaction(user_id, 'text', user_input, "POS", None, None, receta, latencia_ms=ms_desde(inicio))
                 return
 
 
@@ -896,50 +1112,101 @@ def handle_text(message):
     bot.reply_to(message, respuesta, parse_mode="Markdown")
     actualizar_memoria(user_id, sentimiento, respuesta)
     agregar_log(user_id, f"[TEXTO] {user_input}", sentimiento, respuesta)
-    save_interaction(user_id, 'text', user_input, sentimiento, None, None, respuesta)
+    save_interaction(user_id, 'text', user_input, sentimiento, None, None, respuesta, latencia_ms=ms_desde(inicio))
+
+
+
+# Mínimo de segundos entre ediciones del mensaje de estado (Telegram limita las ediciones por chat)
+INTERVALO_EDICION = 1.5
+
+
+class MensajeEstado:
+    """
+    Un único mensaje de respuesta que se va editando (transcribiendo →
+    transcripción parcial → resultado final) en lugar de mandar uno nuevo
+    por cada paso.
+    """
+
+    def __init__(self, message, texto):
+        self.chat_id = message.chat.id
+        self.enviado = bot.reply_to(message, texto)
+        self.texto = texto
+        self.ultima_edicion = time.monotonic()
+
+    def editar(self, texto, parse_mode=None, forzar=True):
+        """Edita el mensaje. Con forzar=False se saltea si la última edición fue hace muy poco."""
+        if texto == self.texto:
+            return
+        if not forzar and time.monotonic() - self.ultima_edicion < INTERVALO_EDICION:
+            metrics.inc("estado.ediciones_salteadas")
+            return
+        try:
+            bot.edit_message_text(texto, self.chat_id, self.enviado.message_id, parse_mode=parse_mode)
+        except Exception as e:
+            if not forzar:
+                return
+            logger.warning("⚠️ No se pudo editar el mensaje de estado: %s", e)
+            if parse_mode is None:
+                return
+            try:
+                # p. ej. Markdown que Telegram no acepta: el mismo mensaje, sin formato
+                bot.edit_message_text(texto, self.chat_id, self.enviado.message_id)
+            except Exception as e:
+                logger.warning("⚠️ Tampoco se pudo editar sin formato: %s", e)
+                return
+        metrics.inc("estado.ediciones")
+        self.texto = texto
+        self.ultima_edicion = time.monotonic()
+
+
+# Respuesta para cada (tipo, campo) que puede rechazar la admisión
+MENSAJES_RECHAZO = {
+    ("voice", "file_size"): "⚠️ Tu audio es demasiado pesado para procesarlo. Probá mandarlo en partes más cortas 🎙️",
+    ("voice", "duration"): "⚠️ Tu audio es muy largo. Probá mandarlo en partes de menos de {max_min} minutos 🎙️",
+    ("photo", "file_size"): "⚠️ La foto es demasiado pesada. Probá mandarla comprimida (no como archivo) 📸",
+    ("photo", "pixeles"): "⚠️ La foto tiene una resolución demasiado alta. Probá mandarla comprimida (no como archivo) 📸",
+}
 
 
+def rechazo(tipo: str, campo: str) -> str:
+    return MENSAJES_RECHAZO.get((tipo, campo), "⚠️ No puedo procesar ese archivo.").format(
+        max_min=CONFIG.max_voice_seconds // 60
+    )
+
 
-@bot.message_handler(content_types=["voice"])
 def handle_audio(message):
+    inicio = time.perf_counter()
     try:
         user_id = message.from_user.id
-        file_info = bot.get_file(message.voice.file_id)
-        file_data = bot.download_file(file_info.file_path)
 
-        # --- Guardar temporalmente el audio ---
-        os.makedirs("data", exist_ok=True)
-        audio_path = f"data/audio_{user_id}.ogg"
-        with open(audio_path, "wb") as f:
-            f.write(file_data)
+        # --- 0️) Admisión con los metadatos del mensaje, antes de descargar nada ---
+        decision, motivo = admision.decidir("voice", metadatos_voz(message.voice))
+        if decision == RECHAZAR:
+            bot.reply_to(message, rechazo("voice", motivo))
+            return
 
-        # --- 1️) Transcribir con Whisper ---
-        bot.reply_to(message, "🎧 Recibí tu audio. Transcribiéndolo...")
+        # --- 1️) Transcribir con Whisper (caché por file_unique_id, en memoria) ---
+        # Un solo mensaje que se edita a medida que avanza
+        estado = MensajeEstado(message, "🎧 Recibí tu audio. Transcribiéndolo...")
 
-        try:
-            from groq import Groq
-            client = Groq(api_key=os.getenv("CLAVE_API_GROQ"))
-            with open(audio_path, "rb") as audio_file:
-                response = client.audio.transcriptions.create(
-                    model="whisper-large-v3-turbo",
-                    file=audio_file
-                )
-            transcripcion = response.text.strip()
-        except Exception as e:
-            print(f"❌ Error al transcribir: {e}")
-            bot.reply_to(message, "⚠️ No pude transcribir tu audio. Probá hablar un poco más claro o más corto 🎙️")
+        def mostrar_parcial(texto, hechas, total):
+            estado.editar(f"🎧 Transcribiendo... ({hechas}/{total})\n\n{texto}", forzar=False)
+
+        transcripcion = transcribir_voz(message.voice, user_id, on_parcial=mostrar_parcial,
+                                        en_partes=decision == EN_PARTES)
+        if transcripcion is None:
+            estado.editar("⚠️ No pude transcribir tu audio. Probá hablar un poco más claro o más corto 🎙️")
             return
+        transcripcion = transcripcion.strip()
 
-        # --- 2️) Mostrar transcripción al usuario ---
         if not transcripcion:
-            bot.reply_to(message, "No pude entender tu audio 😔 Probá grabarlo nuevamente.")
+            estado.editar("No pude entender tu audio 😔 Probá grabarlo nuevamente.")
             return
 
-        bot.reply_to(
-            message,
-            f"📝 *Esto fue lo que entendí de tu audio:*\n\n_{transcripcion}_",
-            parse_mode="Markdown"
-        )
+        # --- 2️) Mostrar la transcripción mientras se genera la respuesta ---
+        # MarkdownV2 con la transcripción y la respuesta escapadas: un "_" o "*" dictado no rompe el formato
+        entendido = f"📝 {mbold('Esto fue lo que entendí de tu audio:')}\n\n{mitalic(transcripcion)}"
+        estado.editar(entendido, parse_mode="MarkdownV2", forzar=False)
 
         # --- 3️) Detectar emoción en la transcripción ---
         emocion_detectada = detectar_emocion_por_palabras(transcripcion)
@@ -948,45 +1215,70 @@ def handle_audio(message):
             respuestas = DATASET["recomendaciones"].get(emocion_detectada, [])
             if respuestas:
                 respuesta = random.choice(respuestas)
-                bot.reply_to(
-                    message,
-                    f"🧠 *Detecté {emocion_detectada} en tu voz.*\n\n{respuesta}",
-                    parse_mode="Markdown"
+                estado.editar(
+                    f"{entendido}\n\n🧠 {mbold(f'Detecté {emocion_detectada} en tu voz.')}\n\n{escape_markdown(respuesta)}",
+                    parse_mode="MarkdownV2"
                 )
                 sentimiento = "NEG" if emocion_detectada in ["ansiedad", "estrés", "culpa", "frustración", "tristeza", "aburrimiento"] else "POS"
                 actualizar_memoria(user_id, sentimiento, respuesta)
-                save_interaction(user_id, 'audio', transcripcion, sentimiento, None, None, respuesta)
+                save_interaction(user_id, 'audio', transcripcion, sentimiento, None, None, respuesta, latencia_ms=ms_desde(inicio))
                 return
 
         # --- 4️) Si no se detecta emoción directa, usar el modelo de sentimiento ---
         sentimiento = analizar_sentimiento(transcripcion)
         respuesta = generar_recomendacion(transcripcion, sentimiento)
 
-        bot.reply_to(
-            message,
-            f"💬 *Reflexión MENTA:*\n\n{respuesta}",
-            parse_mode="Markdown"
+        estado.editar(
+            f"{entendido}\n\n💬 {mbold('Reflexión MENTA:')}\n\n{escape_markdown(respuesta)}",
+            parse_mode="MarkdownV2"
         )
         actualizar_memoria(user_id, sentimiento, respuesta)
-        save_interaction(user_id, 'audio', transcripcion, sentimiento, None, None, respuesta)
+        save_interaction(user_id, 'audio', transcripcion, sentimiento, None, None, respuesta, latencia_ms=ms_desde(inicio))
 
     except Exception as e:
-        print(f"❌ Error procesando audio: {e}")
+        logger.exception("❌ Error procesando audio")
         bot.reply_to(message, "Hubo un error al procesar tu audio 😔 Intentá nuevamente.")
 
 
-@bot.message_handler(content_types=["photo"])
+def analizar_foto_con_cache(image_bytes: bytes) -> Dict[str, Any]:
+    """
+    analizar_imagen_comida pasando por la caché perceptual: una foto igual o
+    casi igual a una ya analizada reutiliza ese análisis sin llamar al modelo.
+    """
+    h = None
+    if photo_cache is not None:
+        try:
+            h = dhash(image_bytes)
+            cacheado = photo_cache.get(h)
+            if cacheado is not None:
+                return cacheado
+        except Exception as e:
+            logger.warning("⚠️ No se pudo calcular el hash de la foto: %s", e)
+    mime = "image/jpeg"
+    if CONFIG.photo_reencode_quality:
+        image_bytes, mime = recomprimir_imagen(image_bytes, CONFIG.photo_target_side,
+                                               CONFIG.photo_reencode_quality, CONFIG.photo_reencode_format)
+    analisis = analizar_imagen_comida(image_bytes, mime)
+    if h is not None and not analisis.get("error"):
+        photo_cache.put(h, analisis)
+    return analisis
+
+
 def handle_photo(message: tlb.types.Message):
+    inicio = time.perf_counter()
     user_id = message.from_user.id
+    # no hace falta la variante más grande para reconocer la comida
+    foto = elegir_foto(message.photo, CONFIG.photo_target_side)
+    decision, motivo = admision.decidir("photo", metadatos_foto(foto))
+    if decision == RECHAZAR:
+        bot.reply_to(message, rechazo("photo", motivo))
+        return
     bot.send_chat_action(message.chat.id, "typing")
     bot.reply_to(message, "📸 Analizando tu comida con IA Vision...")
     try:
-        file_info = bot.get_file(message.photo[-1].file_id)
+        file_info = bot.get_file(foto.file_id)
         downloaded_file = bot.download_file(file_info.file_path)
-        temp_path = f"data/temp/{user_id}_{int(time.time())}.jpg"
-        with open(temp_path, "wb") as f:
-            f.write(downloaded_file)
-        analisis = analizar_imagen_comida(temp_path)
+        analisis = analizar_foto_con_cache(downloaded_file)
         feedback = formatear_analisis_imagen(analisis)
         bot.reply_to(message, feedback, parse_mode="HTML")
         # Analisis de sentimiento del texto de recomendacion
@@ -1004,33 +1296,134 @@ def handle_photo(message: tlb.types.Message):
         alimentos = ", ".join(analisis.get("alimentos", [])) if analisis.get("alimentos") else None
         agregar_log(user_id, f"[FOTO] {alimentos}", sentimiento, feedback[:100])
         actualizar_memoria(user_id, sentimiento, recomendacion_text)
-        save_interaction(user_id, 'photo', '', sentimiento, alimentos, analisis.get('evaluacion'), recomendacion_text)
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        print(f"✅ Imagen analizada para {user_id}")
+        save_interaction(user_id, 'photo', '', sentimiento, alimentos, analisis.get('evaluacion'), recomendacion_text, latencia_ms=ms_desde(inicio))
+        logger.debug("✅ Imagen analizada", extra={"user_id": user_id})
     except Exception as e:
-        print(f"❌ Error procesando imagen: {e}")
+        logger.exception("❌ Error procesando imagen", extra={"user_id": user_id})
         bot.send_message(message.chat.id, "⚠️ Hubo un problema al analizar la imagen. Probá de nuevo con otra foto.")
 
 # ============================================================================
-# 9. INICIO DEL BOT
+# 9. APLICACIÓN (create_app)
 # ============================================================================
 
-if __name__ == "__main__":
+HANDLERS = [
+    (cmd_start, {"commands": ["start", "reset"]}),
+    (mostrar_ayuda, {"commands": ["help", "ayuda"]}),
+    (cmd_progreso, {"commands": ["progreso"]}),
+    (cmd_metricas, {"commands": ["metricas"]}),
+    (cmd_dashboard, {"commands": ["dashboard"]}),
+    (cmd_admin_dashboard, {"commands": ["admin_dashboard"]}),
+    (handle_text, {"content_types": ["text"]}),
+    (handle_audio, {"content_types": ["voice"]}),
+    (handle_photo, {"content_types": ["photo"]}),
+]
+
+
+class App:
+    """Servicios de una instancia del bot, armados por create_app()."""
+
+    def __init__(self, config: Config, bot, dashboard_cache, render_pool, memory_cache):
+        self.config = config
+        self.bot = bot
+        self.dashboard_cache = dashboard_cache
+        self.render_pool = render_pool
+        self.memory_cache = memory_cache
+
+    def run(self):
+        """Polling de Telegram hasta que se corte; al salir libera el pool y los logs."""
+        try:
+            self.bot.infinity_polling(timeout=30, long_polling_timeout=20)
+        except KeyboardInterrupt:
+            print("\n🛑 Bot detenido manualmente.")
+        except Exception as e:
+            logger.critical("❌ Error: %s", e)
+            time.sleep(5)
+        finally:
+            self.close()
+
+    def close(self):
+        self.render_pool.shutdown(wait=False)
+        if stt_backend.loaded and stt_backend.get():
+            stt_backend.get().shutdown()
+        if groq_client.loaded:
+            groq_client.get().close()
+        get_log_writer().close()
+
+
+def create_app(config: Optional[Config] = None) -> App:
+    """
+    Arma el bot a partir de `config` (por defecto `Config.from_env()`): crea las
+    carpetas y la base, construye los servicios y registra los handlers.
+    """
+    global CONFIG, MEMORY_FILE, DB_FILE, bot, dashboard_cache, transcript_cache, render_pool, admision
+    global photo_cache
+    global memory_cache, groq_client, stt_backend, dashboard_renderer
+    config = config or Config.from_env()
+    if not config.telegram_token:
+        raise ValueError("❌ Faltan credenciales TELEGRAM_TOKEN en .env")
+
+    CONFIG = config
+    MEMORY_FILE = config.memory_file
+    DB_FILE = config.db_file
+
+    # Crear directorios necesarios
+    os.makedirs(config.data_dir, exist_ok=True)
     init_db()
+    # Logs de interacciones en la carpeta de la Config (migra user_logs.json si quedó)
+    get_log_writer(
+        config.log_dir or os.path.join(config.data_dir, "logs"),
+        max_bytes=config.log_max_bytes,
+        legacy_path=os.path.join(config.data_dir, "user_logs.json"),
+    )
+
+    # groq, el STT y el renderer dependen de la configuración: se resuelven de nuevo
+    groq_client = LazyResource(_crear_groq, name="groq")
+    stt_backend = LazyResource(_crear_stt, name="stt")
+    dashboard_renderer = LazyResource(_cargar_renderer, name="dashboard_renderer")
+    memory_cache = MemoryCache(
+        cargar_memoria_usuario,
+        guardar_memoria_usuario,
+        idle_seconds=config.memory_idle_seconds,
+        max_bytes=config.memory_max_bytes,
+    )
+    dashboard_cache = DashboardCache(DB_FILE, config.dashboard_cache_max_bytes, config.dashboard_cache_max_entries)
+    transcript_cache = TranscriptCache(DB_FILE, config.transcript_cache_max_bytes, config.transcript_cache_max_entries)
+    photo_cache = None
+    if config.photo_cache_threshold >= 0:
+        photo_cache = PhotoCache(DB_FILE, config.photo_cache_max_entries, config.photo_cache_threshold)
+    # Tabla de admisión de audios y fotos; el corte rápido/en partes coincide con STT_CHUNK_SECONDS
+    admision = Admision({
+        "voice": politica_voz(config.max_voice_bytes, config.max_voice_seconds, config.stt_chunk_seconds),
+        "photo": politica_foto(config.max_photo_bytes, config.max_photo_pixels),
+    })
+    # Pool de procesos para renderizar dashboards fuera de los hilos de Telegram.
+    # spawn: los workers importan este módulo sin efectos (no re-arman el bot ni cargan el modelo)
+    render_pool = RenderPool(max_workers=config.render_workers)
+
+    bot = tlb.TeleBot(config.telegram_token)
+    for handler, filtros in HANDLERS:
+        bot.register_message_handler(handler, **filtros)
+
+    return App(config, bot, dashboard_cache, render_pool, memory_cache)
+
+
+# ============================================================================
+# 10. INICIO DEL BOT
+# ============================================================================
+
+def main():
+    # Logging asíncrono (nivel y formato por LOG_LEVEL / LOG_FORMAT)
+    setup_logging()
+    app = create_app(Config.from_env())
+    if app.config.preload_models:
+        # el bot empieza a recibir mensajes mientras el modelo se carga
+        sentiment_analyzer.preload()
     print("\n" + "="*60)
     print("🤖 MENTA - Asistente de Bienestar Alimenticio, todo empieza desde la consciencia.")
     print("   Equipo: Guadalupe · Fabiola · Rocco")
     print("="*60 + "\n")
-    try:
-        bot.infinity_polling(timeout=30, long_polling_timeout=20)
-    except KeyboardInterrupt:
-        print("\n🛑 Bot detenido manualmente.")
-    except Exception as e:
-        print(f"\n❌ Error: {e}")
-        time.sleep(5)
+    app.run()
 
-    except Exception as e:
-        print(f"\n❌ Error: {e}")
 
-        time.sleep(5)
+if __name__ == "__main__":
+    main()
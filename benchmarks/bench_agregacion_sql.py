@@ -0,0 +1,105 @@
+"""
+bench_agregacion_sql.py
+-----------------------
+Compara las dos formas de obtener los datos del dashboard sobre una base
+sintética de 1M de interacciones:
+
+- "pandas": SELECT * del usuario a un DataFrame y agregación en pandas
+  (lo que hacía analysis/dashboard.py antes).
+- "sql": consultas GROUP BY de analysis/dashboard_queries.py, que devuelven
+  solo los puntos de cada gráfico.
+
+Mide latencia (mediana) y pico de memoria (tracemalloc) para un usuario
+grande y uno chico.
+
+Uso:
+    python benchmarks/bench_agregacion_sql.py [--filas 1000000] [--usuario-grande 200000] [--repeticiones 3]
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from datos_sinteticos import crear_db
+
+from analysis import dashboard_queries
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+def agregar_con_pandas(db_path, user_id):
+    conn = sqlite3.connect(db_path)
+    df = pd.read_sql_query("SELECT * FROM interactions WHERE user_id = ?", conn, params=(str(user_id),))
+    conn.close()
+    df["fecha"] = pd.to_datetime(df["timestamp"], format="ISO8601")
+    df["sentimiento_num"] = df["sentimiento"].map({"NEG": -1, "NEU": 0, "POS": 1})
+    diario = df.dropna(subset=["sentimiento_num"]).groupby(df["fecha"].dt.date)["sentimiento_num"].agg(["mean", "count"])
+    return {
+        "total": len(df),
+        "sentimiento_diario": diario,
+        "evaluaciones": df["evaluacion"].value_counts(),
+        "recomendaciones": df["recomendacion"].value_counts().head(10),
+    }
+
+
+def medir(fn, db_path, user_id, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        fn(db_path, user_id)
+        tiempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    fn(db_path, user_id)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(tiempos), pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=1_000_000, help="total de interacciones de la base")
+    parser.add_argument("--usuario-grande", type=int, default=200_000, help="interacciones del usuario más activo")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    # un usuario grande, uno chico y el resto repartido en usuarios de 1.000
+    chico = 500
+    resto = max(0, args.filas - args.usuario_grande - chico)
+    usuarios = {"grande": args.usuario_grande, "chico": chico}
+    usuarios.update({f"u{i}": 1_000 for i in range(resto // 1_000)})
+
+    carpeta = tempfile.mkdtemp(prefix="menta_bench_")
+    db_path = os.path.join(carpeta, "menta.db")
+    print(f"Generando base sintética con {sum(usuarios.values()):,} interacciones en {db_path}...")
+    crear_db(db_path, usuarios, dias=3 * 365)
+    conn = sqlite3.connect(db_path)
+    dashboard_queries.asegurar_indices(conn)
+    conn.close()
+
+    modos = [("sql", dashboard_queries.cargar_series)]
+    if pd is not None:
+        modos.insert(0, ("pandas", agregar_con_pandas))
+    else:
+        print("⚠️ pandas no disponible: solo se mide la agregación en SQL")
+
+    print(f"{'usuario':>8} {'filas':>9} {'modo':>7} {'tiempo (ms)':>12} {'pico mem (MB)':>14}")
+    for user_id in ("grande", "chico"):
+        resultados = {}
+        for nombre, fn in modos:
+            segundos, pico = medir(fn, db_path, user_id, args.repeticiones)
+            resultados[nombre] = (segundos, pico)
+            print(f"{user_id:>8} {usuarios[user_id]:>9,} {nombre:>7} {segundos * 1000:>12.1f} {pico / 1e6:>14.2f}")
+        if "pandas" in resultados:
+            (t_pd, m_pd), (t_sql, m_sql) = resultados["pandas"], resultados["sql"]
+            print(f"{'':>8} {'':>9} {'':>7} {t_pd / t_sql:>11.1f}x {m_pd / max(1, m_sql):>13.1f}x  (pandas/sql)")
+
+
+if __name__ == "__main__":
+    main()
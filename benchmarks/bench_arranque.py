@@ -0,0 +1,103 @@
+"""
+bench_arranque.py
+-----------------
+Mide el costo de importar BOT_final.py (arranque en frío) con
+`python -X importtime` en un proceso nuevo:
+
+- "lazy": como arranca hoy el bot (groq, transformers, pandas y matplotlib
+  se cargan recién en el primer uso).
+- "eager": importando además esos paquetes al inicio, como antes.
+
+Para cada modo muestra el tiempo total de import, la memoria residente
+máxima (RSS) del proceso y los módulos de primer nivel más caros. No carga
+el modelo de sentimiento (eso antes también ocurría al importar y era lo
+más lento, pero necesita descargar el modelo).
+
+Uso:
+    python benchmarks/bench_arranque.py [--repeticiones 3] [--top 12]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+PESADOS = ["groq", "transformers", "pandas", "matplotlib"]
+
+PRE_EAGER = "import matplotlib.pyplot, pandas, groq; from transformers import pipeline; "
+CODIGO = (
+    "import resource, sys; sys.path.insert(0, {raiz!r}); {pre}import BOT_final; "
+    "print('RSS_KB', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss); "
+    "print('CARGADOS', ','.join(m for m in {pesados!r} if m in sys.modules))"
+)
+
+
+def correr(modo):
+    """Un proceso nuevo que importa el bot; devuelve (segundos, rss_kb, cargados, costos por paquete)."""
+    codigo = CODIGO.format(raiz=RAIZ, pre=PRE_EAGER if modo == "eager" else "", pesados=PESADOS)
+    entorno = dict(os.environ, TELEGRAM_TOKEN=os.getenv("TELEGRAM_TOKEN", "0:bench"), PYTHONDONTWRITEBYTECODE="1")
+    # directorio temporal: el import no debería escribir nada, pero por las dudas no ensucia el repo
+    with tempfile.TemporaryDirectory(prefix="menta_arranque_") as cwd:
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo],
+                              cwd=cwd, env=entorno, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "error importando el bot")
+
+    rss_kb, cargados = 0, []
+    for linea in proc.stdout.splitlines():
+        if linea.startswith("RSS_KB"):
+            rss_kb = int(linea.split()[1])
+        elif linea.startswith("CARGADOS"):
+            cargados = [m for m in linea.split(" ", 1)[1].split(",") if m] if " " in linea else []
+
+    # formato: "import time: self [us] | cumulative | imported package"
+    por_paquete = defaultdict(int)
+    total_us = 0
+    for linea in proc.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado_us, nombre = linea.split(":", 1)[1].split("|")
+        # la sangría indica quién importó a quién: los de primer nivel tienen un solo espacio
+        # y su acumulado ya incluye todo lo que importaron
+        if len(nombre) - len(nombre.lstrip()) == 1:
+            por_paquete[nombre.strip().split(".")[0]] += int(acumulado_us)
+            total_us += int(acumulado_us)
+    return total_us / 1e6, rss_kb, cargados, por_paquete
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--top", type=int, default=12, help="paquetes más caros a mostrar")
+    args = parser.parse_args()
+
+    resultados = {}
+    for modo in ("lazy", "eager"):
+        tiempos, rss = [], []
+        try:
+            for _ in range(args.repeticiones):
+                segundos, rss_kb, cargados, por_paquete = correr(modo)
+                tiempos.append(segundos)
+                rss.append(rss_kb)
+        except RuntimeError as e:
+            print(f"⚠️ modo {modo}: {e}")
+            continue
+        resultados[modo] = (statistics.median(tiempos), statistics.median(rss))
+        print(f"\n=== {modo} ===")
+        print(f"import total: {statistics.median(tiempos) * 1000:.0f} ms · RSS máx: {statistics.median(rss) / 1024:.0f} MB")
+        print(f"paquetes pesados cargados: {', '.join(cargados) or 'ninguno'}")
+        print(f"{'paquete':<28} {'ms':>8}")
+        for nombre, us in sorted(por_paquete.items(), key=lambda kv: -kv[1])[: args.top]:
+            print(f"{nombre:<28} {us / 1000:>8.1f}")
+
+    if len(resultados) == 2:
+        (t_lazy, m_lazy), (t_eager, m_eager) = resultados["lazy"], resultados["eager"]
+        print(f"\nlazy vs eager: {t_eager / t_lazy:.1f}x más rápido, {(m_eager - m_lazy) / 1024:.0f} MB menos de RSS")
+
+
+if __name__ == "__main__":
+    main()
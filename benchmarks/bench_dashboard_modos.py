@@ -0,0 +1,67 @@
+"""
+bench_dashboard_modos.py
+------------------------
+Compara el dashboard con matplotlib (PNG en base64) contra el modo liviano
+(SVG inline + JSON) en tiempo de generación y tamaño del HTML, para usuarios
+con 10, 1.000 y 100.000 interacciones.
+
+Uso:
+    python benchmarks/bench_dashboard_modos.py [--tamanios 10 1000 100000] [--repeticiones 3]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from datos_sinteticos import crear_db
+
+from analysis import dashboard_svg
+
+try:
+    from analysis import dashboard as dashboard_png
+except ImportError:  # matplotlib/pandas no instalados
+    dashboard_png = None
+
+
+def medir(fn, db_path, user_id, repeticiones):
+    tiempos = []
+    html = ""
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        html = fn(db_path, user_id)
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos), len(html.encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanios", type=int, nargs="+", default=[10, 1_000, 100_000])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp(prefix="menta_bench_")
+    db_path = os.path.join(carpeta, "menta.db")
+    crear_db(db_path, {f"u{n}": n for n in args.tamanios})
+
+    modos = [("svg", dashboard_svg.render_dashboard_html)]
+    if dashboard_png is not None:
+        modos.insert(0, ("png", dashboard_png.render_dashboard_html))
+    else:
+        print("⚠️ matplotlib/pandas no disponibles: solo se mide el modo svg")
+
+    print(f"{'interacciones':>14} {'modo':>5} {'tiempo (ms)':>12} {'tamaño (KB)':>12}")
+    for n in args.tamanios:
+        resultados = {}
+        for nombre, fn in modos:
+            segundos, tamanio = medir(fn, db_path, f"u{n}", args.repeticiones)
+            resultados[nombre] = (segundos, tamanio)
+            print(f"{n:>14,} {nombre:>5} {segundos * 1000:>12.1f} {tamanio / 1024:>12.1f}")
+        if "png" in resultados:
+            (t_png, b_png), (t_svg, b_svg) = resultados["png"], resultados["svg"]
+            print(f"{'':>14} {'':>5} {t_png / t_svg:>11.1f}x {b_png / b_svg:>11.1f}x  (png/svg)")
+
+
+if __name__ == "__main__":
+    main()
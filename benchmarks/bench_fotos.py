@@ -0,0 +1,131 @@
+"""
+bench_fotos.py
+--------------
+Tamaño del request y latencia del análisis de fotos de comida según la
+variante que se manda al modelo de visión, contra la calidad del
+reconocimiento.
+
+Para cada foto de la carpeta de fixtures (`<nombre>.jpg` + opcional
+`<nombre>.txt` con los alimentos esperados separados por coma) se simulan
+las variantes que manda Telegram (JPEG de 320, 800 y 1280 px de lado mayor)
+y, sobre la elegida con el lado objetivo, recompresiones JPEG/WebP:
+
+- bytes del request (la imagen en base64, que es lo que viaja en el JSON)
+- latencia de `analizar_imagen_comida` (solo con GROQ_API_KEY)
+- aciertos: alimentos esperados que aparecen en la respuesta del modelo
+  (solo con GROQ_API_KEY y .txt de referencia)
+
+Uso:
+    python benchmarks/bench_fotos.py [--fixtures benchmarks/fixtures/fotos] [--lado 768]
+                                     [--calidades 60,80] [--sin-modelo]
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+import unicodedata
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.append(os.path.join(RAIZ, "src"))
+
+from PIL import Image  # noqa: E402
+
+from utils.media import recomprimir_imagen  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "fotos")
+# Lados de las PhotoSize que genera Telegram para una foto comprimida
+LADOS_TELEGRAM = (320, 800, 1280)
+CALIDAD_TELEGRAM = 87
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in texto if not unicodedata.combining(c)).strip()
+
+
+def variante_telegram(original, lado):
+    with Image.open(io.BytesIO(original)) as img:
+        img = img.convert("RGB")
+        img.thumbnail((lado, lado))
+        salida = io.BytesIO()
+        img.save(salida, format="JPEG", quality=CALIDAD_TELEGRAM)
+    return salida.getvalue()
+
+
+def cargar_fixtures(carpeta):
+    fotos = []
+    for nombre in sorted(os.listdir(carpeta)):
+        base, ext = os.path.splitext(nombre)
+        if ext.lower() not in (".jpg", ".jpeg", ".png", ".webp"):
+            continue
+        with open(os.path.join(carpeta, nombre), "rb") as f:
+            original = f.read()
+        esperados = []
+        if os.path.exists(os.path.join(carpeta, base + ".txt")):
+            with open(os.path.join(carpeta, base + ".txt"), encoding="utf-8") as f:
+                esperados = [normalizar(a) for a in f.read().split(",") if a.strip()]
+        fotos.append((nombre, original, esperados))
+    return fotos
+
+
+def analizador():
+    """analizar_imagen_comida del bot con la configuración del .env, o None sin API key."""
+    sys.path.insert(0, RAIZ)
+    import BOT_final
+
+    BOT_final.CONFIG = BOT_final.Config.from_env()
+    if not BOT_final.CONFIG.groq_api_key:
+        return None
+    return BOT_final.analizar_imagen_comida
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--lado", type=int, default=768, help="lado objetivo (PHOTO_TARGET_SIDE)")
+    parser.add_argument("--calidades", default="60,80", help="calidades de recompresión a probar")
+    parser.add_argument("--sin-modelo", action="store_true", help="medir solo tamaños, sin llamar a Groq")
+    args = parser.parse_args()
+
+    fotos = cargar_fixtures(args.fixtures) if os.path.isdir(args.fixtures) else []
+    if not fotos:
+        print(f"⚠️ No hay fotos en {args.fixtures}: poné .jpg de comidas (y opcionalmente .txt con los alimentos).")
+        return
+    analizar = None if args.sin_modelo else analizador()
+    if analizar is None and not args.sin_modelo:
+        print("⚠️ Sin GROQ_API_KEY: se miden solo tamaños.\n")
+
+    variantes = [(f"telegram {lado}px", lambda o, lado=lado: (variante_telegram(o, lado), "image/jpeg"))
+                 for lado in LADOS_TELEGRAM]
+    lado_elegido = min((lado for lado in LADOS_TELEGRAM if lado >= args.lado), default=max(LADOS_TELEGRAM))
+    for formato in ("jpeg", "webp"):
+        for calidad in (int(c) for c in args.calidades.split(",")):
+            variantes.append((f"{lado_elegido}px → {formato} q{calidad}",
+                              lambda o, f=formato, q=calidad: recomprimir_imagen(
+                                  variante_telegram(o, lado_elegido), args.lado, q, f)))
+
+    print(f"{len(fotos)} fotos\n")
+    print(f"{'variante':<24} {'KB request':>11} {'mediana s':>10} {'aciertos':>9}")
+    for nombre, fabricar in variantes:
+        tamanos, tiempos, aciertos, esperados_total = [], [], 0, 0
+        for _, original, esperados in fotos:
+            datos, mime = fabricar(original)
+            tamanos.append(len(datos) * 4 / 3)  # base64
+            if analizar is None:
+                continue
+            inicio = time.perf_counter()
+            resultado = analizar(datos, mime)
+            tiempos.append(time.perf_counter() - inicio)
+            respuesta = normalizar(" ".join(resultado.get("alimentos", [])) + " " + str(resultado.get("recomendacion", "")))
+            aciertos += sum(1 for a in esperados if a in respuesta)
+            esperados_total += len(esperados)
+        latencia = f"{statistics.median(tiempos):>10.2f}" if tiempos else f"{'-':>10}"
+        calidad = f"{aciertos / esperados_total:>9.0%}" if esperados_total else f"{'-':>9}"
+        print(f"{nombre:<24} {statistics.mean(tamanos) / 1024:>11.1f} {latencia} {calidad}")
+
+
+if __name__ == "__main__":
+    main()
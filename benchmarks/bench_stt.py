@@ -0,0 +1,152 @@
+"""
+bench_stt.py
+------------
+Compara los backends de speech-to-text (utils/stt.py) sobre un set de
+audios de prueba con su transcripción de referencia:
+
+- "groq":  Whisper remoto (necesita GROQ_API_KEY en el entorno).
+- "local": faster-whisper int8 en CPU (necesita `pip install faster-whisper`).
+
+La carpeta de fixtures tiene pares `<nombre>.ogg` (o .wav/.mp3/.m4a) +
+`<nombre>.txt` con lo que realmente se dice. Sirven notas de voz de
+Telegram exportadas; no se incluyen en el repo porque son voces reales.
+
+Para cada backend muestra latencia (mediana y p95 por audio, sin contar la
+carga del modelo local) y WER (word error rate: sustituciones + borrados +
+inserciones sobre las palabras de referencia, sin mayúsculas, tildes ni
+puntuación).
+
+Con `--partes SEGUNDOS` compara además, para cada backend, la transcripción
+de una sola vez contra la partida en pausas y transcripta en paralelo
+(como hace el bot con los audios largos): latencia de punta a punta y
+diferencia de texto entre ambas (0% = idénticas). Conviene usar audios de
+varios minutos.
+
+Uso:
+    python benchmarks/bench_stt.py [--fixtures benchmarks/fixtures/stt] [--backends groq,local]
+                                   [--modelo-local small] [--repeticiones 1]
+                                   [--partes 45 --workers 4 --por-usuario 2]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+import unicodedata
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils import audio_tools, stt  # noqa: E402
+from utils.groq_client import GroqService  # noqa: E402
+
+EXTENSIONES = (".ogg", ".oga", ".wav", ".mp3", ".m4a")
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "stt")
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r"[^\w\s]", " ", texto).split()
+
+
+def distancia_palabras(ref, hip):
+    """Distancia de Levenshtein entre dos listas de palabras."""
+    anterior = list(range(len(hip) + 1))
+    for i, r in enumerate(ref, 1):
+        actual = [i]
+        for j, h in enumerate(hip, 1):
+            actual.append(min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + (r != h)))
+        anterior = actual
+    return anterior[-1]
+
+
+def cargar_fixtures(carpeta):
+    pares = []
+    for nombre in sorted(os.listdir(carpeta)):
+        base, ext = os.path.splitext(nombre)
+        ref = os.path.join(carpeta, base + ".txt")
+        if ext.lower() in EXTENSIONES and os.path.exists(ref):
+            with open(os.path.join(carpeta, nombre), "rb") as f:
+                audio = f.read()
+            with open(ref, encoding="utf-8") as f:
+                pares.append((nombre, audio, f.read().strip()))
+    return pares
+
+
+def crear(nombre, modelo_local):
+    if nombre == "groq":
+        clave = os.getenv("GROQ_API_KEY") or os.getenv("CLAVE_API_GROQ")
+        if not clave:
+            raise RuntimeError("falta GROQ_API_KEY")
+        return stt.GroqSTT(GroqService(clave))
+    if nombre == "local":
+        backend = stt.LocalWhisperSTT(modelo_local)
+        inicio = time.perf_counter()
+        backend.model  # cargar antes de medir
+        print(f"   (modelo local '{modelo_local}' cargado en {time.perf_counter() - inicio:.1f} s)")
+        return backend
+    raise ValueError(f"backend desconocido: {nombre}")
+
+
+def comparar_partes(backend, pares, segundos, workers, por_usuario):
+    """Una sola llamada vs partes en paralelo: (mediana entera, mediana en partes, diferencia de texto)."""
+    transcriptor = stt.TranscriptorEnPartes(backend, workers, por_usuario)
+    enteros, en_partes, errores, palabras = [], [], 0, 0
+    for archivo, audio, _ in pares:
+        inicio = time.perf_counter()
+        entero = backend.transcribe(audio_tools.preprocesar(audio))
+        enteros.append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        partido = transcriptor.transcribe(audio_tools.preprocesar_en_partes(audio, segundos))
+        en_partes.append(time.perf_counter() - inicio)
+        ref = normalizar(entero)
+        errores += distancia_palabras(ref, normalizar(partido))
+        palabras += len(ref)
+    transcriptor.shutdown()
+    return statistics.median(enteros), statistics.median(en_partes), errores / max(palabras, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--backends", default="groq,local")
+    parser.add_argument("--modelo-local", default=stt.MODELO_LOCAL)
+    parser.add_argument("--repeticiones", type=int, default=1)
+    parser.add_argument("--partes", type=float, default=0, help="comparar contra partes de hasta N segundos")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--por-usuario", type=int, default=2)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.fixtures) or not (pares := cargar_fixtures(args.fixtures)):
+        print(f"⚠️ No hay fixtures en {args.fixtures}: poné pares audio.ogg + audio.txt (transcripción de referencia).")
+        return
+
+    print(f"{len(pares)} audios de prueba\n")
+    print(f"{'backend':<8} {'mediana s':>10} {'p95 s':>8} {'WER':>7}")
+    for nombre in (n.strip() for n in args.backends.split(",") if n.strip()):
+        try:
+            backend = crear(nombre, args.modelo_local)
+        except Exception as e:
+            print(f"{nombre:<8} ⚠️ no disponible: {e}")
+            continue
+        tiempos, errores, palabras = [], 0, 0
+        for archivo, audio, referencia in pares:
+            for _ in range(args.repeticiones):
+                inicio = time.perf_counter()
+                hipotesis = backend.transcribe(audio)
+                tiempos.append(time.perf_counter() - inicio)
+            ref = normalizar(referencia)
+            errores += distancia_palabras(ref, normalizar(hipotesis))
+            palabras += len(ref)
+        p95 = sorted(tiempos)[max(0, int(len(tiempos) * 0.95) - 1)]
+        print(f"{nombre:<8} {statistics.median(tiempos):>10.2f} {p95:>8.2f} {errores / max(palabras, 1):>7.1%}")
+        if args.partes:
+            entero, partido, diferencia = comparar_partes(backend, pares, args.partes, args.workers, args.por_usuario)
+            print(f"   en partes de {args.partes:.0f} s: {entero:.2f} s → {partido:.2f} s "
+                  f"({entero / partido:.1f}x), diferencia de texto {diferencia:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+datos_sinteticos.py
+-------------------
+Genera bases menta.db sintéticas para los benchmarks (no usa Telegram ni APIs).
+"""
+
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+SENTIMIENTOS = ["POS", "NEU", "NEG"]
+EVALUACIONES = ["saludable", "moderada", "poco_saludable"]
+RECOMENDACIONES = [f"Recomendación de ejemplo número {i} para cuidar tu bienestar 🌱" for i in range(40)]
+TIPOS = ["text", "text", "text", "audio", "photo"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT,
+    timestamp TEXT,
+    type TEXT,
+    text TEXT,
+    sentimiento TEXT,
+    alimentos TEXT,
+    evaluacion TEXT,
+    recomendacion TEXT
+)
+"""
+
+
+def crear_db(db_path, usuarios, seed=42, dias=365, batch=50_000):
+    """
+    Crea `db_path` con interacciones sintéticas.
+
+    Args:
+        usuarios: dict {user_id: cantidad_de_interacciones}
+    """
+    rnd = random.Random(seed)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(SCHEMA)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_interactions_user ON interactions(user_id)")
+    inicio = datetime(2025, 1, 1)
+    sql = ("INSERT INTO interactions (user_id, timestamp, type, text, sentimiento, alimentos, evaluacion, recomendacion) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+    for user_id, cantidad in usuarios.items():
+        paso = timedelta(days=dias) / max(1, cantidad)
+        filas = []
+        for i in range(cantidad):
+            tipo = rnd.choice(TIPOS)
+            es_foto = tipo == "photo"
+            filas.append((
+                str(user_id),
+                (inicio + paso * i).isoformat(),
+                tipo,
+                "" if es_foto else "hoy me siento " + rnd.choice(["bien", "cansado", "ansioso", "motivado"]) * 8,
+                rnd.choice(SENTIMIENTOS),
+                "arroz, pollo, ensalada" if es_foto else None,
+                rnd.choice(EVALUACIONES) if es_foto else None,
+                rnd.choice(RECOMENDACIONES),
+            ))
+            if len(filas) >= batch:
+                conn.executemany(sql, filas)
+                filas.clear()
+        if filas:
+            conn.executemany(sql, filas)
+    conn.commit()
+    conn.close()
+    return db_path
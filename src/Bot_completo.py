@@ -14,6 +14,7 @@ Equipo: Guadalupe · Fabiana · Rocco
 import os
 import time
 import json
+import logging
 import tempfile
 import telebot as tlb
 from dotenv import load_dotenv
@@ -25,6 +26,10 @@ from analysis.habit_recommender import generar_recomendacion
 from analysis.image_analysis import analizar_imagen_comida, generar_feedback_visual
 from utils.memory_manager import clear_memory, update_memory, get_memory
 from utils.progress_logger import add_log
+from utils.log_reader import iter_logs
+from utils.log_setup import setup_logging
+
+logger = logging.getLogger("menta.bot_completo")
 
 
 # ==============================
@@ -36,7 +41,7 @@ def cargar_dataset():
         with open("data/dataset.json", "r", encoding="utf-8") as f:
             return json.load(f)
     except Exception as e:
-        print(f"❌ Error al cargar dataset: {e}")
+        logger.error("❌ Error al cargar dataset: %s", e)
         return {}
 
 dataset = cargar_dataset()
@@ -94,11 +99,11 @@ def speech_to_text(audio_bytes: bytes) -> str:
         os.remove(temp_audio_path)
         
         texto = transcription.text
-        print(f"🎤 Audio transcrito: '{texto[:50]}...'")
+        logger.debug("🎤 Audio transcrito", extra={"largo_texto": len(texto or "")})
         return texto
         
     except Exception as e:
-        print(f"❌ Error en transcripción: {e}")
+        logger.error("❌ Error en transcripción: %s", e)
         return None
 
 
@@ -122,7 +127,7 @@ def send_welcome(message: tlb.types.Message):
         "_Uso IA para analizar tus emociones y darte consejos personalizados._ ✨"
     )
     
-    print(f"👤 Usuario conectado: {user_id} (@{username})")
+    logger.info("👤 Usuario conectado", extra={"user_id": user_id})
     bot.reply_to(message, bienvenida, parse_mode="Markdown")
 
 
@@ -152,29 +157,29 @@ def mostrar_progreso(message: tlb.types.Message):
     user_id = str(message.from_user.id)
     
     try:
-        # Cargar logs
-        with open("data/user_logs.json", "r", encoding="utf-8") as f:
-            logs = json.load(f)
-        
-        # Filtrar por usuario
-        user_logs = [log for log in logs if log["user_id"] == user_id]
+        # Recorrer los logs del usuario en streaming (sin cargar todo el historial)
+        conteo = {"POS": 0, "NEG": 0, "NEU": 0}
+        total = 0
+        ultimo = None
+        for log in iter_logs(user_id=user_id):
+            conteo[log.get("sentimiento")] = conteo.get(log.get("sentimiento"), 0) + 1
+            total += 1
+            ultimo = log
         
-        if not user_logs:
+        if not total:
             bot.reply_to(message, "📊 Aún no tenés registros. Empezá a contarme cómo te sentís.")
             return
         
         # Estadísticas
-        positivos = sum(1 for log in user_logs if log["sentimiento"] == "POS")
-        negativos = sum(1 for log in user_logs if log["sentimiento"] == "NEG")
-        neutros = sum(1 for log in user_logs if log["sentimiento"] == "NEU")
-        total = len(user_logs)
+        positivos = conteo["POS"]
+        negativos = conteo["NEG"]
+        neutros = conteo["NEU"]
         
         porc_pos = (positivos / total) * 100
         porc_neg = (negativos / total) * 100
         porc_neu = (neutros / total) * 100
         
         # Último sentimiento
-        ultimo = user_logs[-1]
         fecha_ultimo = ultimo["fecha"].split()[0]  # Solo fecha
         
         # Construir mensaje
@@ -199,10 +204,8 @@ def mostrar_progreso(message: tlb.types.Message):
         
         bot.reply_to(message, resumen, parse_mode="Markdown")
         
-    except FileNotFoundError:
-        bot.reply_to(message, "📊 Aún no hay datos para mostrar. Empezá a interactuar conmigo.")
     except Exception as e:
-        print(f"❌ Error al mostrar progreso: {e}")
+        logger.exception("❌ Error al mostrar progreso")
         bot.reply_to(message, "⚠️ No pude cargar tu progreso. Intentá más tarde.")
 
 
@@ -210,11 +213,12 @@ def mostrar_progreso(message: tlb.types.Message):
 def mostrar_stats(message: tlb.types.Message):
     """Estadísticas generales del bot (solo para admins o todos los usuarios)."""
     try:
-        with open("data/user_logs.json", "r", encoding="utf-8") as f:
-            logs = json.load(f)
-        
-        total_interacciones = len(logs)
-        usuarios_unicos = len(set(log["user_id"] for log in logs))
+        total_interacciones = 0
+        usuarios = set()
+        for log in iter_logs():
+            total_interacciones += 1
+            usuarios.add(log["user_id"])
+        usuarios_unicos = len(usuarios)
         
         stats = (
             f"📊 *Estadísticas del Bot:*\n\n"
@@ -229,7 +233,7 @@ def mostrar_stats(message: tlb.types.Message):
         bot.reply_to(message, stats, parse_mode="Markdown")
         
     except Exception as e:
-        print(f"❌ Error en stats: {e}")
+        logger.exception("❌ Error en stats")
         bot.reply_to(message, "⚠️ No pude cargar las estadísticas.")
 
 
@@ -248,7 +252,7 @@ def handle_text_message(message: tlb.types.Message):
         return
     
     bot.send_chat_action(message.chat.id, "typing")
-    print(f"💬 Mensaje de {user_id}: {texto[:50]}...")
+    logger.debug("💬 Mensaje recibido", extra={"user_id": user_id, "largo_texto": len(texto)})
 
     # 🧠 Análisis de sentimiento
     sentimiento = analizar_sentimiento(texto)
@@ -334,7 +338,7 @@ def handle_voice_message(message: tlb.types.Message):
         add_log(user_id, f"[VOZ] {texto}", sentimiento, respuesta)
         
     except Exception as e:
-        print(f"❌ Error procesando voz: {e}")
+        logger.exception("❌ Error procesando voz")
         bot.send_message(message.chat.id, "⚠️ Hubo un error con el audio. Intentá de nuevo.")
 
 
@@ -359,7 +363,7 @@ def handle_photo_message(message: tlb.types.Message):
         with open(temp_image_path, "wb") as f:
             f.write(downloaded_file)
         
-        print(f"📸 Imagen recibida de {user_id}, analizando...")
+        logger.debug("📸 Imagen recibida, analizando...", extra={"user_id": user_id})
         
         # Analizar con IA
         analisis = analizar_imagen_comida(temp_image_path)
@@ -385,10 +389,10 @@ def handle_photo_message(message: tlb.types.Message):
         if os.path.exists(temp_image_path):
             os.remove(temp_image_path)
         
-        print(f"✅ Imagen analizada exitosamente para {user_id}")
+        logger.debug("✅ Imagen analizada exitosamente", extra={"user_id": user_id})
         
     except Exception as e:
-        print(f"❌ Error al procesar imagen: {e}")
+        logger.exception("❌ Error al procesar imagen")
         bot.send_message(
             message.chat.id, 
             "⚠️ Hubo un problema al analizar tu imagen. Intentá con otra foto más clara."
@@ -399,6 +403,7 @@ def handle_photo_message(message: tlb.types.Message):
 # 🚀 INICIO DEL BOT
 # ==============================
 if __name__ == "__main__":
+    setup_logging()
     print("=" * 60)
     print("🤖 MENTA - Asistente de Bienestar Alimenticio")
     print("   Samsung Innovation Campus 2025")
@@ -416,6 +421,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\n🛑 Bot detenido manualmente por el usuario.")
     except Exception as e:
-        print(f"\n❌ Error crítico: {e}")
+        logger.critical("❌ Error crítico: %s", e)
         print("🔄 Reiniciando en 5 segundos...")
         time.sleep(5)
\ No newline at end of file
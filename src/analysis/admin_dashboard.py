@@ -0,0 +1,313 @@
+"""
+admin_dashboard.py
+------------------
+Dashboard global para administradores (todos los usuarios):
+
+- usuarios activos por día (DAU)
+- mezcla de sentimientos por día
+- evaluaciones de las fotos de comida
+- recomendaciones más servidas
+- latencia por modalidad (texto / audio / foto)
+
+La tabla `interactions` se recorre en bloques (`pd.read_sql_query(chunksize=...)`)
+ordenada por timestamp y cada bloque se reduce con pandas/NumPy a acumuladores
+chicos, así que la memoria no depende del tamaño de la tabla:
+
+- DAU: como las filas llegan en orden, un día queda cerrado cuando aparece
+  el siguiente; solo se guardan los usuarios del día en curso.
+- Latencias: histograma con bins logarítmicos fijos (percentiles aproximados).
+- Recomendaciones: conteo acotado a MAX_RECOMENDACIONES textos distintos; si
+  se supera se conservan los más frecuentes y el top queda marcado como aproximado.
+
+Uso (desde src/):
+    python -m analysis.admin_dashboard --db data/menta.db --desde 2025-10-01 --salida data/dashboard/admin.html
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from html import escape
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CHUNK_FILAS = 200_000
+MAX_RECOMENDACIONES = 5_000
+# bins de latencia: 1 ms a ~10 min, 20 por década
+BINS_LATENCIA_MS = np.logspace(0, np.log10(600_000), 115)
+SENTIMIENTOS = ["POS", "NEU", "NEG"]
+COLORES_SENTIMIENTO = {"POS": "#2e8b57", "NEU": "#9e9e9e", "NEG": "#d9534f"}
+
+
+# ============================================================================
+# AGREGACIÓN EN BLOQUES
+# ============================================================================
+
+class Acumulador:
+    """Estado de la agregación; `agregar_bloque` se llama una vez por chunk."""
+
+    def __init__(self, max_recomendaciones=MAX_RECOMENDACIONES):
+        self.max_recomendaciones = max_recomendaciones
+        self.filas = 0
+        self.dau = {}
+        self._dia_abierto = None
+        self._usuarios_dia = set()
+        self.sentimiento_diario = pd.DataFrame(columns=SENTIMIENTOS, dtype="int64")
+        self.evaluaciones = pd.Series(dtype="int64")
+        self.recomendaciones = pd.Series(dtype="int64")
+        self.recomendaciones_aproximadas = False
+        self.latencias = {}
+
+    def agregar_bloque(self, df):
+        if df.empty:
+            return
+        self.filas += len(df)
+        df = df.assign(dia=df["timestamp"].str.slice(0, 10))
+
+        # --- DAU (las filas llegan ordenadas por timestamp) ---
+        pares = df[["dia", "user_id"]].drop_duplicates()
+        for dia, usuarios in pares.groupby("dia", sort=True)["user_id"]:
+            if dia != self._dia_abierto:
+                self._cerrar_dia()
+                self._dia_abierto = dia
+            self._usuarios_dia.update(usuarios.to_numpy())
+
+        # --- Sentimiento por día ---
+        conteo = (
+            df[df["sentimiento"].isin(SENTIMIENTOS)]
+            .groupby(["dia", "sentimiento"]).size()
+            .unstack(fill_value=0)
+            .reindex(columns=SENTIMIENTOS, fill_value=0)
+        )
+        self.sentimiento_diario = self.sentimiento_diario.add(conteo, fill_value=0)
+
+        # --- Evaluaciones de fotos ---
+        self.evaluaciones = self.evaluaciones.add(df["evaluacion"].dropna().value_counts(), fill_value=0)
+
+        # --- Recomendaciones (conteo acotado) ---
+        self.recomendaciones = self.recomendaciones.add(df["recomendacion"].dropna().value_counts(), fill_value=0)
+        if len(self.recomendaciones) > self.max_recomendaciones:
+            self.recomendaciones = self.recomendaciones.nlargest(self.max_recomendaciones)
+            self.recomendaciones_aproximadas = True
+
+        # --- Latencia por modalidad (histograma) ---
+        con_latencia = df.dropna(subset=["latencia_ms"])
+        for tipo, valores in con_latencia.groupby("type")["latencia_ms"]:
+            valores = valores.to_numpy(dtype=float)
+            hist, _ = np.histogram(np.clip(valores, BINS_LATENCIA_MS[0], BINS_LATENCIA_MS[-1]), BINS_LATENCIA_MS)
+            estado = self.latencias.setdefault(tipo, {"hist": np.zeros(len(BINS_LATENCIA_MS) - 1, dtype=np.int64),
+                                                      "n": 0, "suma": 0.0, "max": 0.0})
+            estado["hist"] += hist
+            estado["n"] += len(valores)
+            estado["suma"] += float(valores.sum())
+            estado["max"] = max(estado["max"], float(valores.max()))
+
+    def _cerrar_dia(self):
+        if self._dia_abierto is not None:
+            self.dau[self._dia_abierto] = len(self._usuarios_dia)
+        self._usuarios_dia = set()
+
+    def resultado(self):
+        self._cerrar_dia()
+        self._dia_abierto = None
+        return {
+            "filas": self.filas,
+            "dau": pd.Series(self.dau, dtype="int64").sort_index(),
+            "sentimiento_diario": self.sentimiento_diario.sort_index().astype("int64"),
+            "evaluaciones": self.evaluaciones.sort_values(ascending=False).astype("int64"),
+            "recomendaciones": self.recomendaciones.nlargest(10).astype("int64"),
+            "recomendaciones_aproximadas": self.recomendaciones_aproximadas,
+            "latencias": {tipo: resumen_latencia(e) for tipo, e in sorted(self.latencias.items())},
+        }
+
+
+def percentil_histograma(hist, p):
+    """Percentil aproximado (borde superior del bin) a partir de un histograma de latencias."""
+    total = hist.sum()
+    if not total:
+        return 0.0
+    idx = int(np.searchsorted(np.cumsum(hist), total * p / 100))
+    return float(BINS_LATENCIA_MS[min(idx + 1, len(BINS_LATENCIA_MS) - 1)])
+
+
+def resumen_latencia(estado):
+    return {
+        "n": estado["n"],
+        "promedio_ms": estado["suma"] / estado["n"] if estado["n"] else 0.0,
+        "p50_ms": percentil_histograma(estado["hist"], 50),
+        "p95_ms": percentil_histograma(estado["hist"], 95),
+        "max_ms": estado["max"],
+    }
+
+
+def agregar(db_path, desde=None, hasta=None, chunk_filas=CHUNK_FILAS):
+    """
+    Recorre las interacciones (opcionalmente entre `desde` y `hasta`, fechas ISO)
+    en bloques de `chunk_filas` y devuelve los agregados globales.
+    """
+    conn = sqlite3.connect(db_path)
+    # el recorrido ordenado por fecha usa este índice (se crea una sola vez)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_interactions_ts ON interactions(timestamp)")
+    columnas = {row[1] for row in conn.execute("PRAGMA table_info(interactions)")}
+    latencia = "latencia_ms" if "latencia_ms" in columnas else "NULL AS latencia_ms"
+    condiciones, params = ["timestamp IS NOT NULL"], []
+    if desde:
+        condiciones.append("timestamp >= ?")
+        params.append(desde)
+    if hasta:
+        # inclusivo: todo el día `hasta`
+        condiciones.append("timestamp < ?")
+        params.append(hasta + "~")
+    sql = (f"SELECT user_id, timestamp, type, sentimiento, evaluacion, recomendacion, {latencia} "
+           f"FROM interactions WHERE {' AND '.join(condiciones)} ORDER BY timestamp")
+    acumulador = Acumulador()
+    try:
+        for bloque in pd.read_sql_query(sql, conn, params=params, chunksize=chunk_filas):
+            acumulador.agregar_bloque(bloque)
+    finally:
+        conn.close()
+    return acumulador.resultado()
+
+
+# ============================================================================
+# HTML
+# ============================================================================
+
+def _grafico_dau(dau):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 3.5))
+    ax = fig.subplots()
+    fechas = pd.to_datetime(dau.index)
+    ax.plot(fechas, dau.to_numpy(), color="#2a7c4e", linewidth=1.5)
+    ax.set_title("Usuarios activos por día")
+    ax.set_ylabel("Usuarios")
+    fig.autofmt_xdate()
+    return fig
+
+
+def _grafico_sentimiento(diario):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 3.5))
+    ax = fig.subplots()
+    proporciones = diario.div(diario.sum(axis=1).replace(0, 1), axis=0)
+    fechas = pd.to_datetime(proporciones.index)
+    ax.stackplot(fechas, *(proporciones[s].to_numpy() for s in SENTIMIENTOS),
+                 labels=SENTIMIENTOS, colors=[COLORES_SENTIMIENTO[s] for s in SENTIMIENTOS], alpha=0.85)
+    ax.set_ylim(0, 1)
+    ax.set_title("Mezcla de sentimientos por día")
+    ax.legend(loc="upper left", fontsize=8)
+    fig.autofmt_xdate()
+    return fig
+
+
+def _grafico_barras(conteos, titulo, horizontal=False, largo_etiqueta=50):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 4))
+    ax = fig.subplots()
+    etiquetas = [e if len(e) <= largo_etiqueta else e[: largo_etiqueta - 1] + "…" for e in map(str, conteos.index)]
+    if horizontal:
+        ax.barh(etiquetas[::-1], conteos.to_numpy()[::-1], color="skyblue")
+    else:
+        ax.bar(etiquetas, conteos.to_numpy(), color=["green", "orange", "red", "gray"][: len(conteos)])
+    ax.set_title(titulo)
+    fig.tight_layout()
+    return fig
+
+
+def render_admin_html(resumen):
+    """Arma el HTML del dashboard global a partir de lo que devuelve `agregar`."""
+    from analysis.dashboard import fig_to_base64
+
+    def img(fig):
+        return f'<img src="data:image/png;base64,{fig_to_base64(fig)}">'
+
+    dau = img(_grafico_dau(resumen["dau"])) if len(resumen["dau"]) else "<p>Sin datos.</p>"
+    sentimiento = img(_grafico_sentimiento(resumen["sentimiento_diario"])) if len(resumen["sentimiento_diario"]) else "<p>Sin datos.</p>"
+    evaluaciones = img(_grafico_barras(resumen["evaluaciones"], "Evaluación de las fotos")) if len(resumen["evaluaciones"]) else "<p>Sin fotos analizadas.</p>"
+    recs = img(_grafico_barras(resumen["recomendaciones"], "Recomendaciones más servidas", horizontal=True)) if len(resumen["recomendaciones"]) else "<p>Sin recomendaciones.</p>"
+    nota_recs = "<p><small>Conteo aproximado: hay más recomendaciones distintas que el límite del acumulador.</small></p>" if resumen["recomendaciones_aproximadas"] else ""
+
+    filas_latencia = "".join(
+        f"<tr><td>{escape(str(tipo))}</td><td>{l['n']:,}</td><td>{l['promedio_ms']:.0f}</td>"
+        f"<td>{l['p50_ms']:.0f}</td><td>{l['p95_ms']:.0f}</td><td>{l['max_ms']:.0f}</td></tr>"
+        for tipo, l in resumen["latencias"].items()
+    ) or '<tr><td colspan="6">Sin latencias registradas.</td></tr>'
+    dau_prom = resumen["dau"].mean() if len(resumen["dau"]) else 0
+
+    return f"""<html>
+<head>
+<meta charset="utf-8">
+<title>Dashboard global - MENTA</title>
+<style>
+body {{ font-family: Arial, sans-serif; margin: 40px; background: #fafafa; color: #333; }}
+h2 {{ color: #2a7c4e; }}
+h3 {{ color: #444; margin-top: 40px; }}
+img {{ display: block; margin-top: 10px; margin-bottom: 30px; max-width: 800px;
+      border-radius: 10px; box-shadow: 0 2px 6px rgba(0,0,0,0.2); }}
+table {{ border-collapse: collapse; background: #fff; }}
+td, th {{ border: 1px solid #ddd; padding: 6px 12px; text-align: right; }}
+</style>
+</head>
+<body>
+<h2>Dashboard global</h2>
+<p>{resumen['filas']:,} interacciones · {len(resumen['dau'])} días · {dau_prom:.1f} usuarios activos por día en promedio</p>
+<h3>Usuarios activos por día</h3>
+{dau}
+<h3>Mezcla de sentimientos</h3>
+{sentimiento}
+<h3>Evaluación de las fotos de comida</h3>
+{evaluaciones}
+<h3>Recomendaciones más servidas</h3>
+{recs}
+{nota_recs}
+<h3>Latencia por modalidad (ms)</h3>
+<table>
+<tr><th>Modalidad</th><th>Interacciones</th><th>Promedio</th><th>p50</th><th>p95</th><th>Máx</th></tr>
+{filas_latencia}
+</table>
+</body>
+</html>
+"""
+
+
+def generar_admin_html(db_path, desde=None, hasta=None):
+    """Agrega y arma el HTML en un solo paso (lo que corre el pool de render del bot)."""
+    if not os.path.exists(db_path):
+        return None
+    return render_admin_html(agregar(db_path, desde, hasta))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dashboard global de MENTA (todos los usuarios)")
+    parser.add_argument("--db", default="data/menta.db")
+    parser.add_argument("--desde", help="fecha inicial AAAA-MM-DD")
+    parser.add_argument("--hasta", help="fecha final AAAA-MM-DD (inclusive)")
+    parser.add_argument("--chunk", type=int, default=CHUNK_FILAS, help="filas por bloque")
+    parser.add_argument("--salida", default="data/dashboard/admin_dashboard.html")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    resumen = agregar(args.db, args.desde, args.hasta, args.chunk)
+    agregado = time.perf_counter() - inicio
+    html = render_admin_html(resumen)
+    os.makedirs(os.path.dirname(args.salida) or ".", exist_ok=True)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        f.write(html)
+
+    print(f"📊 {resumen['filas']:,} interacciones agregadas en {agregado:.1f} s")
+    if len(resumen["dau"]):
+        print(f"   Días: {len(resumen['dau'])} · DAU promedio {resumen['dau'].mean():.1f} · máximo {resumen['dau'].max()}")
+    for tipo, l in resumen["latencias"].items():
+        print(f"   Latencia {tipo}: p50 {l['p50_ms']:.0f} ms · p95 {l['p95_ms']:.0f} ms ({l['n']:,})")
+    print(f"   HTML guardado en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
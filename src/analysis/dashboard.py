@@ -0,0 +1,141 @@
+"""
+dashboard.py
+------------
+Genera el dashboard HTML de un usuario a partir de la tabla `interactions`
+de menta.db, con los gráficos embebidos en base64.
+
+Usa el backend Agg y la API orientada a objetos de matplotlib (Figure) en
+lugar de pyplot: no hay estado global compartido, así que se puede llamar
+desde varios procesos del pool de render (ver utils/render_pool.py).
+
+Los datos llegan ya agregados por SQLite (analysis/dashboard_queries.py):
+no se cargan las interacciones completas en memoria.
+"""
+
+import base64
+import io
+import logging
+import os
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+import numpy as np
+
+from analysis.dashboard_queries import cargar_series
+from analysis.downsampling import puntos_objetivo, reducir_indices, media_movil, ventana_media_movil
+
+logger = logging.getLogger(__name__)
+
+# Subir este número cada vez que cambie el HTML o los gráficos (invalida la caché)
+TEMPLATE_VERSION = 3
+
+
+def fig_to_base64(fig):
+    """Convierte una Figure en un PNG codificado en base64."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def render_dashboard_html(db_path, user_id):
+    """
+    Arma el HTML del dashboard con gráficos embebidos en base64.
+    No requiere archivos de imagen externos. Devuelve None si no hay base de datos.
+    """
+    if not os.path.exists(db_path):
+        logger.warning("⚠️ No hay base de datos. Generá interacciones antes de usar /dashboard.")
+        return None
+
+    series = cargar_series(db_path, user_id)
+    if not series["total"]:
+        return f"<h2>Dashboard - Usuario {user_id}</h2><p>No hay datos suficientes para generar el dashboard.</p>"
+
+    # --- Gráfico 1: Evolución del estado emocional (promedio diario) ---
+    # Con historiales de varios años la serie diaria se reduce a una cantidad de
+    # puntos proporcional al ancho del gráfico (LTTB) y se agrega la media móvil
+    mood_b64 = ""
+    diario = series["sentimiento_diario"]
+    if diario:
+        fig1 = Figure(figsize=(7, 4))
+        ax1 = fig1.subplots()
+        fechas = np.array([dia for dia, _, _ in diario], dtype="datetime64[D]")
+        valores = np.array([prom for _, prom, _ in diario], dtype=float)
+        x_num = fechas.astype(np.int64).astype(float)
+        objetivo = puntos_objetivo(fig1.get_figwidth(), fig1.dpi)
+        idx = reducir_indices(x_num, valores, objetivo)
+        tendencia = media_movil(valores, ventana_media_movil(len(valores), objetivo))
+
+        ax1.plot(fechas[idx], valores[idx], marker="o" if len(idx) <= 100 else None,
+                 linewidth=1 if len(idx) < len(valores) else 2, alpha=0.6, color="#2a7c4e", label="Promedio diario")
+        ax1.plot(fechas[idx], tendencia[idx], linewidth=2.5, color="#e07b39", label="Media móvil")
+        ax1.legend(loc="lower left", fontsize=8)
+        ax1.set_title("Evolución del estado emocional")
+        ax1.set_xlabel("Fecha")
+        ax1.set_ylabel("Nivel de emoción (-1 Negativo / +1 Positivo)")
+
+        # Rotar fechas y mostrar menos ticks para no amontonarlas
+        ax1.xaxis.set_major_locator(mdates.AutoDateLocator())
+        ax1.xaxis.set_major_formatter(mdates.DateFormatter("%d-%m"))
+        for label in ax1.get_xticklabels():
+            label.set_rotation(45)
+            label.set_horizontalalignment("right")
+        fig1.tight_layout()
+
+        mood_b64 = fig_to_base64(fig1)
+
+    # --- Gráfico 2: Frecuencia por evaluación de comidas ---
+    if series["evaluaciones"]:
+        etiquetas, cantidades = zip(*series["evaluaciones"])
+        fig2 = Figure()
+        ax2 = fig2.subplots()
+        ax2.bar(etiquetas, cantidades, color=["green", "orange", "red"])
+        ax2.set_title("Frecuencia por evaluación de comidas")
+        ax2.set_xlabel("Tipo de comida")
+        ax2.set_ylabel("Cantidad")
+        food_b64 = fig_to_base64(fig2)
+    else:
+        food_b64 = ""
+
+    # --- Gráfico 3: Recomendaciones más frecuentes ---
+    if series["recomendaciones"]:
+        etiquetas, cantidades = zip(*series["recomendaciones"])
+        fig3 = Figure()
+        ax3 = fig3.subplots()
+        ax3.barh(etiquetas[::-1], cantidades[::-1], color="skyblue")
+        ax3.set_title("Recomendaciones más frecuentes")
+        ax3.set_xlabel("Cantidad de veces")
+        recs_b64 = fig_to_base64(fig3)
+    else:
+        recs_b64 = ""
+
+    # Crea el HTML final con las imágenes embebidas
+    html = f"""
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>Dashboard - Usuario {user_id}</title>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 40px; background: #fafafa; color: #333; }}
+            h2 {{ color: #2a7c4e; }}
+            h3 {{ color: #444; margin-top: 40px; }}
+            img {{ display: block; margin-top: 10px; margin-bottom: 30px; max-width: 700px;
+                  border-radius: 10px; box-shadow: 0 2px 6px rgba(0,0,0,0.2); }}
+        </style>
+    </head>
+    <body>
+        <h2>Dashboard - Usuario {user_id}</h2>
+
+        <h3>Evolución del estado emocional</h3>
+        {'<img src="data:image/png;base64,' + mood_b64 + '">' if mood_b64 else '<p>No hay datos emocionales suficientes.</p>'}
+
+        <h3>Frecuencia por evaluación de comidas</h3>
+        {'<img src="data:image/png;base64,' + food_b64 + '">' if food_b64 else '<p>No hay datos de comidas suficientes.</p>'}
+
+        <h3>Recomendaciones más frecuentes</h3>
+        {'<img src="data:image/png;base64,' + recs_b64 + '">' if recs_b64 else '<p>No hay recomendaciones registradas.</p>'}
+    </body>
+    </html>
+    """
+    return html
@@ -0,0 +1,86 @@
+"""
+dashboard_queries.py
+--------------------
+Consultas agregadas (GROUP BY) que alimentan los gráficos del dashboard.
+Cada consulta devuelve solo los puntos que el gráfico necesita, así que la
+memoria y la latencia dependen de la cantidad de días/categorías y no del
+tamaño del historial (nunca se traen las columnas largas `text` completas).
+"""
+
+import sqlite3
+
+INDICES = (
+    # cubre el GROUP BY por día del gráfico de sentimiento
+    "CREATE INDEX IF NOT EXISTS idx_interactions_user_ts ON interactions(user_id, timestamp, sentimiento)",
+    "CREATE INDEX IF NOT EXISTS idx_interactions_user_eval ON interactions(user_id, evaluacion)",
+)
+
+
+def asegurar_indices(conn):
+    """Crea los índices que usan las consultas del dashboard (idempotente)."""
+    for sql in INDICES:
+        conn.execute(sql)
+    conn.commit()
+
+
+def total_interacciones(conn, user_id):
+    return conn.execute("SELECT COUNT(*) FROM interactions WHERE user_id = ?", (str(user_id),)).fetchone()[0]
+
+
+def sentimiento_diario(conn, user_id):
+    """Lista de (día 'YYYY-MM-DD', promedio de sentimiento -1..1, cantidad) ordenada por día."""
+    return conn.execute(
+        """
+        SELECT substr(timestamp, 1, 10) AS dia,
+               AVG(CASE sentimiento WHEN 'POS' THEN 1.0 WHEN 'NEG' THEN -1.0 ELSE 0.0 END),
+               COUNT(*)
+        FROM interactions
+        WHERE user_id = ? AND timestamp IS NOT NULL AND sentimiento IN ('POS', 'NEG', 'NEU')
+        GROUP BY dia
+        ORDER BY dia
+        """,
+        (str(user_id),),
+    ).fetchall()
+
+
+def conteo_evaluaciones(conn, user_id):
+    """Lista de (evaluacion, cantidad) de las fotos analizadas, de mayor a menor."""
+    return conn.execute(
+        """
+        SELECT evaluacion, COUNT(*) AS n
+        FROM interactions
+        WHERE user_id = ? AND evaluacion IS NOT NULL
+        GROUP BY evaluacion
+        ORDER BY n DESC
+        """,
+        (str(user_id),),
+    ).fetchall()
+
+
+def top_recomendaciones(conn, user_id, limite=10):
+    """Las `limite` recomendaciones más frecuentes como (texto, cantidad)."""
+    return conn.execute(
+        """
+        SELECT recomendacion, COUNT(*) AS n
+        FROM interactions
+        WHERE user_id = ? AND recomendacion IS NOT NULL
+        GROUP BY recomendacion
+        ORDER BY n DESC
+        LIMIT ?
+        """,
+        (str(user_id), limite),
+    ).fetchall()
+
+
+def cargar_series(db_path, user_id):
+    """Todas las series del dashboard en un dict (lo que usan los dos modos de render)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            "total": total_interacciones(conn, user_id),
+            "sentimiento_diario": [[dia, round(prom, 3), n] for dia, prom, n in sentimiento_diario(conn, user_id)],
+            "evaluaciones": [list(fila) for fila in conteo_evaluaciones(conn, user_id)],
+            "recomendaciones": [list(fila) for fila in top_recomendaciones(conn, user_id)],
+        }
+    finally:
+        conn.close()
@@ -0,0 +1,158 @@
+"""
+dashboard_svg.py
+----------------
+Versión liviana del dashboard: en lugar de tres PNG en base64 hechos con
+matplotlib, embebe las series agregadas como JSON compacto y dibuja los
+gráficos con SVG inline generado en Python. No usa JavaScript externo ni
+red, y no necesita matplotlib ni pandas.
+"""
+
+import json
+import os
+from datetime import date
+from html import escape
+
+from analysis.dashboard_queries import cargar_series
+
+# Subir este número cada vez que cambie el HTML o los gráficos (invalida la caché)
+TEMPLATE_VERSION = 3
+
+COLORES_EVALUACION = {"saludable": "#2e8b57", "moderada": "#f0a030", "poco_saludable": "#d9534f"}
+
+ANCHO = 700
+ALTO = 320
+MARGEN = {"izq": 60, "der": 20, "arriba": 20, "abajo": 60}
+
+
+# ============================================================================
+# GRÁFICOS SVG
+# ============================================================================
+
+def _svg(contenido, alto=ALTO):
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {ANCHO} {alto}" '
+            f'width="{ANCHO}" height="{alto}" role="img">{contenido}</svg>')
+
+
+def svg_sentimiento(puntos):
+    """Línea del promedio diario de sentimiento (-1 a +1), con el eje x proporcional al tiempo."""
+    if not puntos:
+        return ""
+    x0, x1 = MARGEN["izq"], ANCHO - MARGEN["der"]
+    y0, y1 = MARGEN["arriba"], ALTO - MARGEN["abajo"]
+    n = len(puntos)
+    # cada punto va en la posición de su fecha: los días sin datos dejan hueco
+    dias = [date.fromisoformat(p[0]).toordinal() for p in puntos]
+    primero, rango = dias[0], dias[-1] - dias[0]
+
+    def x(dia):
+        return x0 + (x1 - x0) * ((dia - primero) / rango if rango else 0.5)
+
+    def y(valor):
+        return y1 - (valor + 1) / 2 * (y1 - y0)
+
+    partes = []
+    for valor, etiqueta in ((1, "+1 Positivo"), (0, "0 Neutro"), (-1, "-1 Negativo")):
+        partes.append(f'<line x1="{x0}" x2="{x1}" y1="{y(valor):.1f}" y2="{y(valor):.1f}" stroke="#ddd"/>')
+        partes.append(f'<text x="{x0 - 6}" y="{y(valor) + 4:.1f}" font-size="11" text-anchor="end">{etiqueta}</text>')
+    coords = " ".join(f"{x(d):.1f},{y(p[1]):.1f}" for d, p in zip(dias, puntos))
+    partes.append(f'<polyline points="{coords}" fill="none" stroke="#2a7c4e" stroke-width="2"/>')
+    if n <= 120:
+        for d, (dia, valor, cantidad) in zip(dias, puntos):
+            partes.append(
+                f'<circle cx="{x(d):.1f}" cy="{y(valor):.1f}" r="3" fill="#2a7c4e">'
+                f'<title>{dia}: {valor:+.2f} ({cantidad})</title></circle>'
+            )
+    # como máximo ~8 etiquetas de fecha, repartidas parejo en el tiempo
+    marcas = min(8, rango)
+    for k in range(marcas + 1):
+        d = primero + round(k * rango / marcas) if marcas else primero
+        dia = date.fromordinal(d).isoformat()
+        partes.append(
+            f'<text x="{x(d):.1f}" y="{y1 + 16}" font-size="11" text-anchor="end" '
+            f'transform="rotate(-45 {x(d):.1f} {y1 + 16})">{dia[8:10]}-{dia[5:7]}</text>'
+        )
+    return _svg("".join(partes))
+
+
+def svg_barras(conteos, colores=None):
+    """Barras verticales para el conteo de evaluaciones de comidas."""
+    if not conteos:
+        return ""
+    x0, x1 = MARGEN["izq"], ANCHO - MARGEN["der"]
+    y0, y1 = MARGEN["arriba"], ALTO - MARGEN["abajo"]
+    maximo = max(c for _, c in conteos) or 1
+    ancho_barra = (x1 - x0) / len(conteos)
+    partes = [f'<line x1="{x0}" x2="{x1}" y1="{y1}" y2="{y1}" stroke="#999"/>']
+    for i, (etiqueta, cantidad) in enumerate(conteos):
+        alto = (y1 - y0) * cantidad / maximo
+        bx = x0 + i * ancho_barra + ancho_barra * 0.15
+        color = (colores or {}).get(str(etiqueta).lower().replace(" ", "_"), "#5b9bd5")
+        partes.append(f'<rect x="{bx:.1f}" y="{y1 - alto:.1f}" width="{ancho_barra * 0.7:.1f}" height="{alto:.1f}" fill="{color}"/>')
+        partes.append(f'<text x="{bx + ancho_barra * 0.35:.1f}" y="{y1 - alto - 4:.1f}" font-size="12" text-anchor="middle">{cantidad}</text>')
+        partes.append(f'<text x="{bx + ancho_barra * 0.35:.1f}" y="{y1 + 16}" font-size="12" text-anchor="middle">{escape(str(etiqueta))}</text>')
+    return _svg("".join(partes))
+
+
+def svg_barras_horizontales(conteos, largo_etiqueta=45):
+    """Barras horizontales para las recomendaciones más frecuentes."""
+    if not conteos:
+        return ""
+    alto_fila = 26
+    alto = MARGEN["arriba"] + alto_fila * len(conteos) + 10
+    x0, x1 = 320, ANCHO - 40
+    maximo = max(c for _, c in conteos) or 1
+    partes = []
+    for i, (etiqueta, cantidad) in enumerate(conteos):
+        y = MARGEN["arriba"] + i * alto_fila
+        largo = (x1 - x0) * cantidad / maximo
+        texto = str(etiqueta)
+        corto = texto if len(texto) <= largo_etiqueta else texto[: largo_etiqueta - 1] + "…"
+        partes.append(f'<text x="{x0 - 8}" y="{y + 15}" font-size="11" text-anchor="end"><title>{escape(texto)}</title>{escape(corto)}</text>')
+        partes.append(f'<rect x="{x0}" y="{y + 3}" width="{largo:.1f}" height="{alto_fila - 8}" fill="skyblue"/>')
+        partes.append(f'<text x="{x0 + largo + 4:.1f}" y="{y + 15}" font-size="11">{cantidad}</text>')
+    return _svg("".join(partes), alto)
+
+
+# ============================================================================
+# HTML
+# ============================================================================
+
+def render_dashboard_html(db_path, user_id):
+    """Arma el dashboard liviano (SVG + JSON). Devuelve None si no hay base de datos."""
+    if not os.path.exists(db_path):
+        return None
+    # las series ya vienen agregadas por SQLite (ver analysis/dashboard_queries.py)
+    series = cargar_series(db_path, user_id)
+    if not series["total"]:
+        return f"<h2>Dashboard - Usuario {user_id}</h2><p>No hay datos suficientes para generar el dashboard.</p>"
+
+    mood_svg = svg_sentimiento(series["sentimiento_diario"])
+    food_svg = svg_barras(series["evaluaciones"], COLORES_EVALUACION)
+    recs_svg = svg_barras_horizontales(series["recomendaciones"])
+    # "</" escapado para que el JSON no pueda cerrar el <script>
+    datos = json.dumps(series, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+    return f"""<html>
+<head>
+<meta charset="utf-8">
+<title>Dashboard - Usuario {user_id}</title>
+<style>
+body {{ font-family: Arial, sans-serif; margin: 40px; background: #fafafa; color: #333; }}
+h2 {{ color: #2a7c4e; }}
+h3 {{ color: #444; margin-top: 40px; }}
+svg {{ display: block; margin-top: 10px; margin-bottom: 30px; max-width: 700px; height: auto;
+      background: #fff; border-radius: 10px; box-shadow: 0 2px 6px rgba(0,0,0,0.2); }}
+</style>
+</head>
+<body>
+<h2>Dashboard - Usuario {user_id}</h2>
+<h3>Evolución del estado emocional (promedio diario)</h3>
+{mood_svg or '<p>No hay datos emocionales suficientes.</p>'}
+<h3>Frecuencia por evaluación de comidas</h3>
+{food_svg or '<p>No hay datos de comidas suficientes.</p>'}
+<h3>Recomendaciones más frecuentes</h3>
+{recs_svg or '<p>No hay recomendaciones registradas.</p>'}
+<script type="application/json" id="menta-datos">{datos}</script>
+</body>
+</html>
+"""
@@ -0,0 +1,103 @@
+"""
+downsampling.py
+---------------
+Reducción de series largas antes de graficarlas (NumPy).
+
+Un usuario con decenas de miles de interacciones no necesita decenas de miles
+de marcadores: el gráfico tiene unos cientos de píxeles de ancho. Acá se elige
+un subconjunto de puntos proporcional al ancho en píxeles que conserva la
+forma visual de la serie.
+
+- LTTB (Largest-Triangle-Three-Buckets): un punto por bucket, el que forma el
+  triángulo más grande con el punto anterior y el promedio del bucket siguiente.
+- min/max por bucket: conserva los extremos de cada bucket (útil para picos).
+"""
+
+import numpy as np
+
+# Píxeles horizontales por punto graficado
+PIXELES_POR_PUNTO = 2
+
+
+def puntos_objetivo(fig_ancho_pulgadas, dpi, pixeles_por_punto=PIXELES_POR_PUNTO):
+    """Cantidad de puntos razonable para una figura del ancho dado."""
+    return max(3, int(fig_ancho_pulgadas * dpi / pixeles_por_punto))
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Índices de los puntos elegidos por LTTB (siempre incluye el primero y el último).
+
+    Args:
+        x, y: secuencias numéricas del mismo largo (x ordenado de menor a mayor)
+        n_out: cantidad de puntos deseada
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets entre el primer y el último punto
+    bordes = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        # promedio del bucket siguiente (el último "bucket" es el punto final)
+        sig_inicio = bordes[i + 1]
+        sig_fin = bordes[i + 2] if i + 2 < len(bordes) else n
+        prom_x = x[sig_inicio:sig_fin].mean()
+        prom_y = y[sig_inicio:sig_fin].mean()
+        areas = np.abs(
+            (x[a] - prom_x) * (y[inicio:fin] - y[a])
+            - (x[a] - x[inicio:fin]) * (prom_y - y[a])
+        )
+        a = inicio + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+
+def minmax_indices(y, n_buckets):
+    """Índices del mínimo y el máximo de cada bucket, en orden (hasta 2 * n_buckets puntos)."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    bordes = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    elegidos = []
+    for inicio, fin in zip(bordes[:-1], bordes[1:]):
+        if fin <= inicio:
+            continue
+        tramo = y[inicio:fin]
+        elegidos.append(inicio + int(np.argmin(tramo)))
+        elegidos.append(inicio + int(np.argmax(tramo)))
+    return np.unique(np.array(elegidos, dtype=np.int64))
+
+
+def reducir_indices(x, y, n_out, metodo="lttb"):
+    """Índices a graficar según el método ("lttb" o "minmax")."""
+    if metodo == "minmax":
+        return minmax_indices(y, max(1, n_out // 2))
+    return lttb_indices(x, y, n_out)
+
+
+def media_movil(y, ventana):
+    """Media móvil centrada (los bordes usan la ventana disponible)."""
+    y = np.asarray(y, dtype=float)
+    if len(y) == 0 or ventana <= 1:
+        return y.copy()
+    ventana = min(ventana, len(y))
+    acumulada = np.cumsum(np.insert(y, 0, 0.0))
+    mitad = ventana // 2
+    idx = np.arange(len(y))
+    desde = np.clip(idx - mitad, 0, len(y))
+    hasta = np.clip(idx - mitad + ventana, 0, len(y))
+    return (acumulada[hasta] - acumulada[desde]) / (hasta - desde)
+
+
+def ventana_media_movil(n, n_out, minima=7):
+    """Ventana de la media móvil: al menos `minima`, y más ancha cuanto más se reduce la serie."""
+    return max(minima, n // max(1, n_out))
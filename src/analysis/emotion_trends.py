@@ -1,56 +1,56 @@
 """
 emotion_trends.py
 -----------------
-Lee el historial de progreso (user_logs.json) y genera un gráfico
+Lee el historial de progreso (logs NDJSON en data/logs) y genera un gráfico
 con la evolución de los estados emocionales del usuario a lo largo del tiempo.
 """
 
-import json
 import matplotlib.pyplot as plt
+import numpy as np
 from datetime import datetime
 
-LOG_FILE = "data/user_logs.json"
+from analysis.downsampling import puntos_objetivo, reducir_indices, media_movil, ventana_media_movil
+from utils.log_reader import iter_logs
 
-def cargar_logs():
-    """Carga los registros del archivo JSON."""
+def cargar_logs(user_id=None, desde=None, hasta=None):
+    """Itera los registros (opcionalmente de un solo usuario y rango de fechas) sin cargarlos todos."""
     try:
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        yield from iter_logs(user_id=user_id, desde=desde, hasta=hasta)
     except Exception as e:
         print(f"Error al cargar logs: {e}")
-        return []
 
 def generar_grafico(user_id=None):
     """Genera un gráfico de líneas mostrando la evolución emocional."""
-    logs = cargar_logs()
-    if not logs:
-        print("❌ No hay registros para mostrar.")
-        return
-
-    # Filtrar por usuario (opcional)
-    if user_id:
-        logs = [log for log in logs if log["user_id"] == str(user_id)]
-
-    if not logs:
-        print(f"⚠️ No se encontraron registros para el usuario {user_id}.")
-        return
-
-    # Convertir fechas y sentimientos a valores numéricos
-    fechas = [datetime.strptime(log["fecha"], "%Y-%m-%d %H:%M:%S") for log in logs]
-    sentimientos = [log["sentimiento"] for log in logs]
-
-    valores = []
-    for s in sentimientos:
+    # El filtro por usuario (opcional) lo resuelve el lector de logs; en una sola
+    # pasada se convierten fechas y sentimientos a valores numéricos
+    fechas, valores = [], []
+    for log in cargar_logs(user_id or None):
+        fechas.append(datetime.strptime(log["fecha"], "%Y-%m-%d %H:%M:%S"))
+        s = log["sentimiento"]
         if s == "POS":
             valores.append(1)
         elif s == "NEG":
             valores.append(-1)
         else:
             valores.append(0)
+    if not fechas:
+        if user_id:
+            print(f"⚠️ No se encontraron registros para el usuario {user_id}.")
+        else:
+            print("❌ No hay registros para mostrar.")
+        return
 
-    # Crear el gráfico
-    plt.figure(figsize=(9, 5))
-    plt.plot(fechas, valores, marker="o", linestyle="-", linewidth=2)
+    # Crear el gráfico (series largas se reducen con LTTB a ~1 punto cada 2 píxeles)
+    fig = plt.figure(figsize=(9, 5))
+    fechas = np.array(fechas, dtype="datetime64[s]")
+    valores = np.array(valores, dtype=float)
+    objetivo = puntos_objetivo(fig.get_figwidth(), fig.dpi)
+    idx = reducir_indices(fechas.astype(np.int64).astype(float), valores, objetivo)
+    tendencia = media_movil(valores, ventana_media_movil(len(valores), objetivo))
+    plt.plot(fechas[idx], valores[idx], marker="o" if len(idx) <= 100 else None,
+             linestyle="-", linewidth=2, alpha=0.6, label="Interacciones")
+    plt.plot(fechas[idx], tendencia[idx], linewidth=2.5, label="Media móvil")
+    plt.legend()
     plt.title("Evolución Emocional del Usuario", fontsize=14)
     plt.xlabel("Fecha y hora", fontsize=12)
     plt.ylabel("Sentimiento (1=Positivo, 0=Neutro, -1=Negativo)", fontsize=12)
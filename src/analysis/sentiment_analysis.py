@@ -7,10 +7,14 @@ usando un modelo preentrenado de Hugging Face.
 Modelo: pysentimiento/robertuito-sentiment-analysis
 """
 
+import logging
+
 from transformers import pipeline
 
+logger = logging.getLogger(__name__)
+
 # Inicializamos el modelo solo una vez
-print("🧠 Cargando modelo de análisis de sentimientos...")
+logger.info("🧠 Cargando modelo de análisis de sentimientos...")
 analizador = pipeline("sentiment-analysis", model="pysentimiento/robertuito-sentiment-analysis")
 
 def analizar_sentimiento(texto: str):
@@ -31,7 +35,7 @@ def analizar_sentimiento(texto: str):
         label = resultado["label"].upper()
         score = round(resultado["score"], 3)
 
-        print(f"🩵 Sentimiento detectado: {label} ({score}) para texto: '{texto[:50]}...'")
+        logger.debug("🩵 Sentimiento detectado", extra={"label": label, "score": score, "largo_texto": len(texto)})
 
         # Normalizamos nombres
         if "POS" in label:
@@ -42,5 +46,5 @@ def analizar_sentimiento(texto: str):
             return "NEU"
 
     except Exception as e:
-        print(f"Error en analizar_sentimiento: {e}")
+        logger.warning("Error en analizar_sentimiento: %s", e)
         return "NEU"
@@ -18,6 +18,7 @@ import os
 import json
 import time
 import base64
+import io
 import tempfile
 import sqlite3
 from datetime import datetime
@@ -31,6 +32,8 @@ from transformers import pipeline
 import matplotlib.pyplot as plt
 import pandas as pd
 
+from utils.artifact_store import ArtifactStore
+
 # ============================================================================
 # CONFIGURACIÓN INICIAL
 # ============================================================================
@@ -61,6 +64,15 @@ LOGS_FILE = "data/user_logs.json"
 DATASET_FILE = "data/dataset.json"
 DB_FILE = "data/menta.db"
 
+# Gráficos y HTML de los dashboards: archivos por hash de contenido + índice,
+# con límite de tamaño total y antigüedad (ver utils/artifact_store.py)
+DASHBOARD_DIR = "data/dashboard"
+artifact_store = ArtifactStore(
+    DASHBOARD_DIR,
+    max_bytes=int(os.getenv("ARTIFACT_MAX_BYTES", 200 * 1024 * 1024)),
+    max_age_seconds=float(os.getenv("ARTIFACT_MAX_AGE_DAYS", 30)) * 86400,
+)
+
 # ============================================================================
 # 0. BASE DE DATOS SQLITE - INTERACCIONES
 # ============================================================================
@@ -674,13 +686,23 @@ def agregar_log(user_id: int, mensaje: str, sentimiento: str, respuesta: str):
 # 7. DASHBOARD (GRAFICOS + HTML)
 # ============================================================================
 
+def guardar_grafico(nombre: str) -> str:
+    """
+    Guarda la figura actual de pyplot en el almacén y devuelve la ruta del PNG.
+    No desaloja: los límites se aplican al guardar el HTML, cuando el PNG ya
+    está referenciado y no puede borrarse antes de que el HTML lo use.
+    """
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format="png")
+    plt.close()
+    return artifact_store.put(nombre, buffer.getvalue(), "png", evict=False)
+
+
 def generate_dashboard_html(user_id: int) -> str:
     df = fetch_user_interactions(user_id)
     if df.empty:
-        html_path = f"data/dashboard/{user_id}_dashboard.html"
-        with open(html_path, "w", encoding="utf-8") as f:
-            f.write(f"<html><body><h2>No hay datos para el usuario {user_id}</h2></body></html>")
-        return html_path
+        html = f"<html><body><h2>No hay datos para el usuario {user_id}</h2></body></html>"
+        return artifact_store.put(f"{user_id}_dashboard.html", html, "html")
 
     # convertir timestamps
     df['ts'] = pd.to_datetime(df['timestamp'])
@@ -690,55 +712,49 @@ def generate_dashboard_html(user_id: int) -> str:
     def map_sent(s):
         return 1 if s == 'POS' else (-1 if s == 'NEG' else 0)
     df['sent_val'] = df['sentimiento'].map(map_sent)
-    mood_img = f"data/dashboard/{user_id}_mood.png"
     plt.figure(figsize=(8,3))
     plt.plot(df['ts'], df['sent_val'], marker='o')
     plt.title('Evolución del estado emocional')
     plt.xlabel('Fecha')
     plt.ylabel('Estado (POS=1, NEU=0, NEG=-1)')
     plt.tight_layout()
-    plt.savefig(mood_img)
-    plt.close()
+    mood_img = guardar_grafico(f"{user_id}_mood.png")
 
     # Gráfico 2: Frecuencia de comidas saludables vs no saludables
     df_food = df[df['type']=='photo']
     eval_counts = df_food['evaluacion'].fillna('desconocida').value_counts()
-    food_img = f"data/dashboard/{user_id}_food.png"
     plt.figure(figsize=(6,4))
     eval_counts.plot(kind='bar')
     plt.title('Frecuencia por evaluación de comidas')
     plt.xlabel('Evaluación')
     plt.ylabel('Veces')
     plt.tight_layout()
-    plt.savefig(food_img)
-    plt.close()
+    food_img = guardar_grafico(f"{user_id}_food.png")
 
     # Gráfico 3: Recomendaciones más frecuentes
     top_recs = df['recomendacion'].fillna('sin_recomendacion')
     top_recs = top_recs.value_counts().head(10)
-    recs_img = f"data/dashboard/{user_id}_recs.png"
     plt.figure(figsize=(8,3))
     top_recs.plot(kind='barh')
     plt.title('Recomendaciones más frecuentes')
     plt.tight_layout()
-    plt.savefig(recs_img)
-    plt.close()
-
-    # Crear HTML
-    html_path = f"data/dashboard/{user_id}_dashboard.html"
-    with open(html_path, "w", encoding="utf-8") as f:
-        f.write("<html><head><meta charset='utf-8'><title>Dashboard Menta</title></head><body>")
-        f.write(f"<h2>Dashboard - Usuario {user_id}</h2>")
-        f.write("<h3>Evolución del estado emocional</h3>")
-        f.write(f"<img src='{os.path.basename(mood_img)}' style='max-width:800px;'><br>")
-        f.write("<h3>Frecuencia por evaluación de comidas</h3>")
-        f.write(f"<img src='{os.path.basename(food_img)}' style='max-width:800px;'><br>")
-        f.write("<h3>Recomendaciones más frecuentes</h3>")
-        f.write(f"<img src='{os.path.basename(recs_img)}' style='max-width:800px;'><br>")
-        f.write("</body></html>")
-
-    # copiar imagenes a la misma carpeta (ya guardadas ahi), asegurarnos que html y imgs estén en data/dashboard
-    return html_path
+    recs_img = guardar_grafico(f"{user_id}_recs.png")
+
+    # Crear HTML (las imágenes quedan en la misma carpeta que el HTML)
+    partes = [
+        "<html><head><meta charset='utf-8'><title>Dashboard Menta</title></head><body>",
+        f"<h2>Dashboard - Usuario {user_id}</h2>",
+        "<h3>Evolución del estado emocional</h3>",
+        f"<img src='{os.path.basename(mood_img)}' style='max-width:800px;'><br>",
+        "<h3>Frecuencia por evaluación de comidas</h3>",
+        f"<img src='{os.path.basename(food_img)}' style='max-width:800px;'><br>",
+        "<h3>Recomendaciones más frecuentes</h3>",
+        f"<img src='{os.path.basename(recs_img)}' style='max-width:800px;'><br>",
+        "</body></html>",
+    ]
+    # el HTML declara sus PNG: no se desalojan mientras él exista y se borran con él
+    return artifact_store.put(f"{user_id}_dashboard.html", "".join(partes), "html",
+                              refs=(mood_img, food_img, recs_img))
 
 # ============================================================================
 # 8. MANEJADORES DEL BOT
@@ -785,16 +801,10 @@ def cmd_dashboard(message: tlb.types.Message):
     bot.send_chat_action(message.chat.id, "upload_document")
     try:
         html_path = generate_dashboard_html(user_id)
-        # enviar archivo HTML y las imagenes generadas
-        folder = os.path.dirname(html_path)
-        files_to_send = [html_path]
-        # incluir imagenes png generados para el usuario
-        for fname in os.listdir(folder):
-            if fname.startswith(str(user_id)) and (fname.endswith('.png') or fname.endswith('.html')):
-                files_to_send.append(os.path.join(folder, fname))
-        # Enviar html como documento
+        # Enviar html como documento (en disco se llama por su hash)
         with open(html_path, 'rb') as f:
-            bot.send_document(message.chat.id, f, caption='Dashboard generado (abrir en navegador)')
+            bot.send_document(message.chat.id, f, caption='Dashboard generado (abrir en navegador)',
+                              visible_file_name=f"{user_id}_dashboard.html")
     except Exception as e:
         print(f"❌ Error generando dashboard: {e}")
         bot.send_message(message.chat.id, "⚠️ No se pudo generar el dashboard.")
@@ -0,0 +1,89 @@
+"""
+admision.py
+-----------
+Control de admisión de audios y fotos ANTES de descargarlos, con los
+metadatos que Telegram ya manda en el mensaje (`voice.duration`,
+`file_size`, ancho y alto de cada PhotoSize).
+
+La política es una tabla por tipo de archivo: una lista de reglas
+(campo, operador, umbral, decisión) que se evalúan en orden; gana la
+primera que se cumple. Una regla con campo None se cumple siempre (sirve
+de default al final). Si falta el metadato de una regla, esa regla se
+saltea.
+
+Decisiones:
+- "rechazar":  no se descarga (muy grande o muy largo).
+- "rapida":    audio corto, se transcribe de una sola vez.
+- "en_partes": audio largo, se parte en pausas y se transcribe en paralelo.
+- "aceptar":   foto dentro de los límites.
+
+Cada decisión se cuenta en admision.<tipo>.<decisión> y los rechazos además
+por campo en admision.<tipo>.rechazar.<campo>.
+"""
+
+import operator
+
+from utils import metrics
+
+RECHAZAR = "rechazar"
+RAPIDA = "rapida"
+EN_PARTES = "en_partes"
+ACEPTAR = "aceptar"
+
+OPERADORES = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+# La Bot API no deja descargar archivos de más de 20 MB
+MAX_DESCARGA_BYTES = 20 * 1024 * 1024
+
+
+def politica_voz(max_bytes=MAX_DESCARGA_BYTES, max_segundos=15 * 60, corte_rapido=45):
+    return [
+        ("file_size", ">", max_bytes, RECHAZAR),
+        ("duration", ">", max_segundos, RECHAZAR),
+        ("duration", "<=", corte_rapido, RAPIDA),
+        (None, None, None, EN_PARTES),
+    ]
+
+
+def politica_foto(max_bytes=10 * 1024 * 1024, max_pixeles=40_000_000):
+    return [
+        ("file_size", ">", max_bytes, RECHAZAR),
+        ("pixeles", ">", max_pixeles, RECHAZAR),
+        (None, None, None, ACEPTAR),
+    ]
+
+
+class Admision:
+    def __init__(self, politicas=None):
+        self.politicas = politicas or {"voice": politica_voz(), "photo": politica_foto()}
+
+    def decidir(self, tipo, metadatos):
+        """
+        Decisión para un archivo de `tipo` ("voice", "photo") con `metadatos`
+        (dict campo → valor). Devuelve (decisión, campo de la regla que decidió).
+        """
+        for campo, op, umbral, decision in self.politicas[tipo]:
+            if campo is None:
+                break
+            valor = metadatos.get(campo)
+            if valor is not None and OPERADORES[op](valor, umbral):
+                break
+        else:
+            campo, decision = None, ACEPTAR
+        metrics.inc(f"admision.{tipo}.{decision}")
+        if decision == RECHAZAR:
+            metrics.inc(f"admision.{tipo}.rechazar.{campo}")
+        return decision, campo
+
+
+def metadatos_voz(voice):
+    return {"duration": voice.duration, "file_size": getattr(voice, "file_size", None)}
+
+
+def metadatos_foto(photo_size):
+    return {
+        "file_size": getattr(photo_size, "file_size", None),
+        "pixeles": photo_size.width * photo_size.height,
+        "ancho": photo_size.width,
+        "alto": photo_size.height,
+    }
@@ -0,0 +1,257 @@
+"""
+artifact_store.py
+-----------------
+Almacén de archivos generados (PNG y HTML de los dashboards) direccionado
+por contenido:
+
+- Cada archivo se guarda una sola vez como `<sha256>.<ext>` en la carpeta:
+  si dos renders producen el mismo gráfico, comparten el archivo.
+- Un índice SQLite (`index.db` en la misma carpeta) mapea nombres lógicos
+  (p. ej. "123_mood.png") al hash vigente, así que buscar el dashboard de un
+  usuario es una consulta y no un `os.listdir` de toda la carpeta.
+- Los archivos que ya no tienen nombre apuntándolos se borran al reemplazarse,
+  y `evict()` desaloja por antigüedad (último uso) y por tamaño total (LRU).
+- Un archivo puede declarar los que usa (`refs`, p. ej. el HTML y sus PNG):
+  mientras el HTML exista sus PNG no se desalojan, y al borrarse el HTML se
+  borran con él los PNG que ningún otro archivo usa.
+
+Uso (desde src/):
+    python -m utils.artifact_store data/dashboard            # uso de disco
+    python -m utils.artifact_store data/dashboard --evict    # aplicar límites
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 3600
+INDEX_FILE = "index.db"
+
+
+class ArtifactStore:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, max_age_seconds=DEFAULT_MAX_AGE_SECONDS,
+                 name="artifact_store"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.name = name
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS artifacts (
+            digest TEXT PRIMARY KEY,
+            ext TEXT,
+            size INTEGER,
+            created REAL,
+            last_used REAL
+        )
+        """)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS names (
+            name TEXT PRIMARY KEY,
+            digest TEXT
+        )
+        """)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS refs (
+            parent TEXT,
+            child TEXT,
+            PRIMARY KEY (parent, child)
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_last_used ON artifacts(last_used)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_names_digest ON names(digest)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_refs_child ON refs(child)")
+        conn.commit()
+        conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(os.path.join(self.directory, INDEX_FILE))
+
+    def _path(self, digest, ext):
+        return os.path.join(self.directory, f"{digest}.{ext}")
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def put(self, name, data, ext, refs=(), evict=True):
+        """
+        Guarda `data` (bytes o str) bajo el nombre lógico `name` y devuelve la
+        ruta del archivo. Si el contenido ya existía no se vuelve a escribir.
+        `refs` son las rutas (devueltas por put) de los archivos que este usa.
+        Con `evict=False` no se aplican los límites: es para los archivos que
+        todavía no tienen quién los referencie (los PNG antes de su HTML), que
+        si no podrían desalojarse antes de guardar el HTML que los usa.
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest, ext)
+        now = time.time()
+        with self._lock:
+            if not os.path.exists(path):
+                # escribir a un temporal y renombrar: nunca queda un archivo a medias con el nombre final
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+                metrics.inc(f"{self.name}.escrituras")
+            else:
+                metrics.inc(f"{self.name}.deduplicados")
+            conn = self._connect()
+            anterior = conn.execute("SELECT digest FROM names WHERE name = ?", (name,)).fetchone()
+            conn.execute(
+                "INSERT INTO artifacts (digest, ext, size, created, last_used) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(digest) DO UPDATE SET last_used = excluded.last_used",
+                (digest, ext, len(data), now, now),
+            )
+            conn.execute("INSERT OR REPLACE INTO names (name, digest) VALUES (?, ?)", (name, digest))
+            hijos = [os.path.basename(r).split(".", 1)[0] for r in refs]
+            conn.executemany("INSERT OR IGNORE INTO refs (parent, child) VALUES (?, ?)",
+                             [(digest, hijo) for hijo in hijos if hijo != digest])
+            if anterior and anterior[0] != digest:
+                self._delete_if_orphan(conn, anterior[0])
+            if evict:
+                self._evict(conn)
+            conn.commit()
+            conn.close()
+        return path
+
+    def get_path(self, name):
+        """Ruta del archivo vigente para `name`, o None si no existe."""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT a.digest, a.ext FROM names n JOIN artifacts a ON a.digest = n.digest WHERE n.name = ?",
+            (name,),
+        ).fetchone()
+        if row is None:
+            conn.close()
+            metrics.inc(f"{self.name}.misses")
+            return None
+        path = self._path(*row)
+        if not os.path.exists(path):
+            # alguien borró el archivo a mano: limpiar el índice
+            with self._lock:
+                self._delete(conn, *row)
+                conn.commit()
+            conn.close()
+            metrics.inc(f"{self.name}.misses")
+            return None
+        conn.execute("UPDATE artifacts SET last_used = ? WHERE digest = ?", (time.time(), row[0]))
+        conn.commit()
+        conn.close()
+        metrics.inc(f"{self.name}.hits")
+        return path
+
+    def evict(self):
+        """Aplica los límites de antigüedad y tamaño. Devuelve la cantidad de archivos borrados."""
+        with self._lock:
+            conn = self._connect()
+            borrados = self._evict(conn)
+            conn.commit()
+            conn.close()
+        return borrados
+
+    def disk_usage(self):
+        """Archivos, nombres y bytes que administra el almacén (según el índice)."""
+        conn = self._connect()
+        archivos, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+        nombres = conn.execute("SELECT COUNT(*) FROM names").fetchone()[0]
+        conn.close()
+        return {"archivos": archivos, "nombres": nombres, "bytes": total,
+                "max_bytes": self.max_bytes, "max_age_seconds": self.max_age_seconds}
+
+    # ------------------------------------------------------------------
+    # Internos (llamar con self._lock tomado)
+    # ------------------------------------------------------------------
+    def _delete(self, conn, digest, ext):
+        """Borra el archivo y, en cascada, los que usaba y nadie más usa. Devuelve (archivos, bytes)."""
+        size = conn.execute("SELECT size FROM artifacts WHERE digest = ?", (digest,)).fetchone()
+        conn.execute("DELETE FROM names WHERE digest = ?", (digest,))
+        conn.execute("DELETE FROM artifacts WHERE digest = ?", (digest,))
+        try:
+            os.remove(self._path(digest, ext))
+        except FileNotFoundError:
+            pass
+        archivos, liberados = 1, (size[0] or 0) if size else 0
+        hijos = [r[0] for r in conn.execute("SELECT child FROM refs WHERE parent = ?", (digest,))]
+        conn.execute("DELETE FROM refs WHERE parent = ?", (digest,))
+        for hijo in hijos:
+            if conn.execute("SELECT 1 FROM refs WHERE child = ? LIMIT 1", (hijo,)).fetchone():
+                continue
+            row = conn.execute("SELECT ext FROM artifacts WHERE digest = ?", (hijo,)).fetchone()
+            if row:
+                n, b = self._delete(conn, hijo, row[0])
+                archivos += n
+                liberados += b
+        return archivos, liberados
+
+    def _delete_if_orphan(self, conn, digest):
+        if conn.execute("SELECT 1 FROM names WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+            return
+        if conn.execute("SELECT 1 FROM refs WHERE child = ? LIMIT 1", (digest,)).fetchone():
+            # lo usa un HTML vigente: se borra junto con él
+            return
+        row = conn.execute("SELECT ext FROM artifacts WHERE digest = ?", (digest,)).fetchone()
+        if row:
+            self._delete(conn, digest, row[0])
+            metrics.inc(f"{self.name}.reemplazados")
+
+    def _evict(self, conn):
+        # los archivos que usa otro (PNG de un HTML) no se desalojan solos: caen con su HTML
+        libres = "SELECT digest, ext FROM artifacts WHERE digest NOT IN (SELECT child FROM refs)"
+        borrados = 0
+        # 1) por antigüedad
+        if self.max_age_seconds:
+            limite = time.time() - self.max_age_seconds
+            for digest, ext in conn.execute(libres + " AND last_used < ?", (limite,)).fetchall():
+                if conn.execute("SELECT 1 FROM artifacts WHERE digest = ?", (digest,)).fetchone():
+                    borrados += self._delete(conn, digest, ext)[0]
+        # 2) por tamaño total, del menos usado al más usado
+        archivos, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+        if total > self.max_bytes:
+            for digest, ext in conn.execute(libres + " ORDER BY last_used").fetchall():
+                if total <= self.max_bytes:
+                    break
+                if not conn.execute("SELECT 1 FROM artifacts WHERE digest = ?", (digest,)).fetchone():
+                    continue  # ya se borró en cascada
+                n, liberados = self._delete(conn, digest, ext)
+                total -= liberados
+                archivos -= n
+                borrados += n
+        if borrados:
+            metrics.inc(f"{self.name}.evictions", borrados)
+            archivos, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+        metrics.set_gauge(f"{self.name}.archivos", archivos)
+        metrics.set_gauge(f"{self.name}.bytes", total)
+        return borrados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uso de disco y limpieza del almacén de artefactos")
+    parser.add_argument("directory", nargs="?", default="data/dashboard")
+    parser.add_argument("--max-bytes", type=int, default=int(os.getenv("ARTIFACT_MAX_BYTES", DEFAULT_MAX_BYTES)))
+    parser.add_argument("--max-age-days", type=float, default=float(os.getenv("ARTIFACT_MAX_AGE_DAYS", DEFAULT_MAX_AGE_SECONDS / 86400)))
+    parser.add_argument("--evict", action="store_true", help="aplicar los límites de tamaño y antigüedad")
+    args = parser.parse_args(argv)
+
+    store = ArtifactStore(args.directory, args.max_bytes, args.max_age_days * 86400)
+    if args.evict:
+        print(f"🧹 Archivos borrados: {store.evict()}")
+    uso = store.disk_usage()
+    print(f"📦 {args.directory}: {uso['archivos']} archivos, {uso['nombres']} nombres, "
+          f"{uso['bytes'] / 1024 / 1024:.1f} MB de {uso['max_bytes'] / 1024 / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+audio_tools.py
+--------------
+Preprocesamiento de notas de voz antes de transcribirlas:
+
+1. Decodifica el OGG/Opus de Telegram (o cualquier formato que lea ffmpeg).
+2. Baja a mono y remuestrea a 16 kHz (lo que usa Whisper internamente).
+3. Recorta el silencio del principio y del final con un VAD de energía
+   (RMS por tramas de 30 ms contra un umbral relativo al ruido de fondo).
+4. Si es larga, la parte en las pausas (ver `partir_en_pausas`) para
+   transcribir los pedazos en paralelo.
+5. Vuelve a codificar cada parte en OGG/Opus mono a baja tasa de bits.
+
+El resultado pesa bastante menos que el original, así que la subida a
+Groq y la transcripción son más rápidas. Se registran
+audio.bytes_originales, audio.bytes_enviados y audio.notas_preprocesadas
+(el ahorro por nota es la diferencia sobre la cantidad de notas).
+
+Decodificar y codificar usa PyAV (`pip install av`; ya viene con
+faster-whisper). Si no está instalado o el audio no se puede leer, se
+devuelve el original sin tocar.
+"""
+
+import io
+import logging
+
+import numpy as np
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+TRAMA_MS = 30
+PADDING_MS = 200
+# Umbral de voz: X dB por encima del ruido de fondo (percentil bajo de las tramas),
+# sin pasar de RANGO_PICO_DB debajo de la trama más fuerte (audios casi sin pausas)
+# y nunca por debajo de UMBRAL_MIN_DBFS (silencio digital)
+MARGEN_RUIDO_DB = 8.0
+RANGO_PICO_DB = 20.0
+UMBRAL_MIN_DBFS = -50.0
+PERCENTIL_RUIDO = 10
+OPUS_BITRATE = 24000
+# Pausa mínima donde se puede cortar un audio largo
+PAUSA_MIN_MS = 300
+
+
+# ============================================================================
+# Decodificación y codificación (PyAV)
+# ============================================================================
+
+def decodificar(audio_bytes, rate=SAMPLE_RATE):
+    """PCM mono float32 en [-1, 1] a `rate` Hz."""
+    import av
+
+    partes = []
+    with av.open(io.BytesIO(audio_bytes)) as contenedor:
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=rate)
+        for frame in contenedor.decode(audio=0):
+            partes.extend(f.to_ndarray().reshape(-1) for f in resampler.resample(frame))
+        partes.extend(f.to_ndarray().reshape(-1) for f in resampler.resample(None))
+    if not partes:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(partes).astype(np.float32) / 32768.0
+
+
+def codificar_opus(pcm, rate=SAMPLE_RATE, bitrate=OPUS_BITRATE):
+    """OGG/Opus mono a partir de PCM float32."""
+    import av
+
+    salida = io.BytesIO()
+    muestras = (np.clip(pcm, -1.0, 1.0) * 32767).astype(np.int16)
+    with av.open(salida, mode="w", format="ogg") as contenedor:
+        stream = contenedor.add_stream("libopus", rate=rate, layout="mono")
+        stream.bit_rate = bitrate
+        frame = av.AudioFrame.from_ndarray(muestras.reshape(1, -1), format="s16", layout="mono")
+        frame.sample_rate = rate
+        for paquete in stream.encode(frame):
+            contenedor.mux(paquete)
+        for paquete in stream.encode(None):
+            contenedor.mux(paquete)
+    return salida.getvalue()
+
+
+# ============================================================================
+# VAD por energía
+# ============================================================================
+
+def energia_tramas(pcm, rate=SAMPLE_RATE, trama_ms=TRAMA_MS):
+    """Energía en dBFS de cada trama de `trama_ms` (la última incompleta se descarta)."""
+    largo = rate * trama_ms // 1000
+    n = len(pcm) // largo
+    if n == 0:
+        return np.zeros(0)
+    tramas = pcm[: n * largo].reshape(n, largo)
+    return 10 * np.log10(np.mean(tramas ** 2, axis=1) + 1e-12)
+
+
+def tramas_con_voz(energias):
+    """Máscara booleana de tramas por encima del umbral de voz."""
+    if len(energias) == 0:
+        return np.zeros(0, dtype=bool)
+    umbral = min(np.percentile(energias, PERCENTIL_RUIDO) + MARGEN_RUIDO_DB, energias.max() - RANGO_PICO_DB)
+    umbral = max(umbral, UMBRAL_MIN_DBFS)
+    return energias > umbral
+
+
+def recortar_silencio(pcm, rate=SAMPLE_RATE, padding_ms=PADDING_MS):
+    """
+    Recorta el silencio inicial y final dejando `padding_ms` de margen. Si no
+    hay ninguna trama con voz devuelve un array vacío.
+    """
+    voz = np.flatnonzero(tramas_con_voz(energia_tramas(pcm, rate)))
+    if len(voz) == 0:
+        return pcm[:0]
+    largo = rate * TRAMA_MS // 1000
+    padding = rate * padding_ms // 1000
+    inicio = max(0, voz[0] * largo - padding)
+    fin = min(len(pcm), (voz[-1] + 1) * largo + padding)
+    return pcm[inicio:fin]
+
+
+def partir_en_pausas(pcm, max_segundos, rate=SAMPLE_RATE, pausa_min_ms=PAUSA_MIN_MS):
+    """
+    Parte `pcm` en pedazos de hasta `max_segundos` cortando en el medio de
+    pausas de al menos `pausa_min_ms`. En cada ventana se elige la pausa más
+    larga de su segunda mitad (así no quedan pedazos muy cortos); si no hay
+    ninguna se corta en el límite.
+    """
+    largo = rate * TRAMA_MS // 1000
+    max_tramas = int(max_segundos * 1000 // TRAMA_MS)
+    total_tramas = -(-len(pcm) // largo)
+    if total_tramas <= max_tramas:
+        return [pcm]
+
+    # pausas candidatas: (trama del medio, duración en tramas)
+    voz = tramas_con_voz(energia_tramas(pcm, rate))
+    pausas, inicio = [], None
+    for i, hay_voz in enumerate(np.append(voz, True)):
+        if not hay_voz and inicio is None:
+            inicio = i
+        elif hay_voz and inicio is not None:
+            if (i - inicio) * TRAMA_MS >= pausa_min_ms:
+                pausas.append(((inicio + i) // 2, i - inicio))
+            inicio = None
+
+    cortes, desde = [], 0
+    while total_tramas - desde > max_tramas:
+        ventana = [(duracion, medio) for medio, duracion in pausas
+                   if desde + max_tramas // 2 <= medio <= desde + max_tramas]
+        desde = max(ventana)[1] if ventana else desde + max_tramas
+        cortes.append(desde * largo)
+    return np.split(pcm, cortes)
+
+
+# ============================================================================
+# Etapa completa
+# ============================================================================
+
+def preprocesar_en_partes(audio_bytes, max_segundos=None):
+    """
+    Nota de voz lista para subir: sin silencios en los extremos, 16 kHz mono,
+    OGG/Opus, partida en pausas si dura más de `max_segundos`. Devuelve la
+    lista de partes (vacía si no hay voz), o `[audio_bytes]` si algo falla o
+    si el resultado no es más chico.
+    """
+    try:
+        pcm = decodificar(audio_bytes)
+        recortado = recortar_silencio(pcm)
+        if not len(recortado):
+            partes = []
+        elif max_segundos:
+            partes = [codificar_opus(p) for p in partir_en_pausas(recortado, max_segundos)]
+        else:
+            partes = [codificar_opus(recortado)]
+    except ImportError:
+        metrics.inc("audio.preproc_omitido")
+        if max_segundos:
+            avisar_sin_partir("PyAV no está instalado")
+        return [audio_bytes]
+    except Exception as e:
+        logger.warning("⚠️ No se pudo preprocesar el audio: %s", e)
+        metrics.inc("audio.preproc_errores")
+        if max_segundos:
+            avisar_sin_partir("falló el preprocesado")
+        return [audio_bytes]
+    enviados = sum(len(p) for p in partes)
+    if len(partes) == 1 and enviados >= len(audio_bytes):
+        partes, enviados = [audio_bytes], len(audio_bytes)
+    metrics.inc("audio.notas_preprocesadas")
+    metrics.inc("audio.bytes_originales", len(audio_bytes))
+    metrics.inc("audio.bytes_enviados", enviados)
+    logger.debug("🎚️ Audio: %d → %d bytes en %d partes (%.1f s → %.1f s)",
+                 len(audio_bytes), enviados, len(partes), len(pcm) / SAMPLE_RATE, len(recortado) / SAMPLE_RATE)
+    return partes
+
+
+def avisar_sin_partir(motivo):
+    """Un audio que tocaba partir se transcribe entero: se cuenta en stt.en_partes_sin_partir."""
+    logger.warning("⚠️ Audio largo sin partir (%s): se transcribe de una sola vez", motivo)
+    metrics.inc("stt.en_partes_sin_partir")
+
+
+def preprocesar(audio_bytes):
+    """Como `preprocesar_en_partes` sin partir: bytes listos para subir, o b"" si no hay voz."""
+    partes = preprocesar_en_partes(audio_bytes)
+    return partes[0] if partes else b""
@@ -0,0 +1,47 @@
+"""
+bloom.py
+--------
+Filtro de Bloom mínimo para saber rápido si un user_id *puede* estar en un
+segmento de logs (sin falsos negativos, con pocos falsos positivos).
+"""
+
+import base64
+import hashlib
+import math
+
+
+class BloomFilter:
+    def __init__(self, num_bits, num_hashes, bits=None):
+        self.num_bits = max(8, int(num_bits))
+        self.num_hashes = max(1, int(num_hashes))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, n, fp_rate=0.01):
+        """Crea un filtro dimensionado para `n` elementos con la tasa de falsos positivos dada."""
+        n = max(1, n)
+        num_bits = math.ceil(-n * math.log(fp_rate) / (math.log(2) ** 2))
+        num_hashes = round((num_bits / n) * math.log(2))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(str(item).encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def to_dict(self):
+        return {"num_bits": self.num_bits, "num_hashes": self.num_hashes,
+                "bits": base64.b64encode(bytes(self.bits)).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["num_bits"], data["num_hashes"], bytearray(base64.b64decode(data["bits"])))
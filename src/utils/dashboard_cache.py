@@ -0,0 +1,128 @@
+"""
+dashboard_cache.py
+------------------
+Caché de dashboards ya generados, guardada en la misma base SQLite.
+La clave es (user_id, id de la última interacción, versión del template):
+si el usuario no tuvo interacciones nuevas desde el último render, el HTML
+(y el file_id de Telegram del documento ya subido) se reutilizan tal cual.
+
+Se guarda como máximo una entrada por usuario (las claves viejas quedan
+obsoletas apenas hay una interacción nueva) y se desaloja por LRU cuando
+se supera el tamaño total o la cantidad de entradas permitidas.
+"""
+
+import sqlite3
+import threading
+import time
+
+from utils import metrics
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 1000
+
+
+class DashboardCache:
+    def __init__(self, db_path, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._schema_ok = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        if not self._schema_ok:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS dashboard_cache (
+                user_id TEXT PRIMARY KEY,
+                last_interaction_id INTEGER,
+                template_version TEXT,
+                html TEXT,
+                file_id TEXT,
+                size INTEGER,
+                created REAL,
+                last_used REAL
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_dashboard_cache_last_used ON dashboard_cache(last_used)")
+            conn.commit()
+            self._schema_ok = True
+        return conn
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def get(self, user_id, last_interaction_id, template_version):
+        """Devuelve {"html", "file_id"} si hay un render vigente para esa clave, o None."""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT html, file_id FROM dashboard_cache WHERE user_id = ? AND last_interaction_id = ? AND template_version = ?",
+            (str(user_id), last_interaction_id, template_version),
+        ).fetchone()
+        if row is None:
+            conn.close()
+            metrics.inc("dashboard_cache.misses")
+            return None
+        conn.execute("UPDATE dashboard_cache SET last_used = ? WHERE user_id = ?", (time.time(), str(user_id)))
+        conn.commit()
+        conn.close()
+        metrics.inc("dashboard_cache.hits")
+        return {"html": row[0], "file_id": row[1]}
+
+    def put(self, user_id, last_interaction_id, template_version, html):
+        """Guarda un render (reemplaza el anterior del usuario) y aplica el límite de tamaño."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO dashboard_cache (user_id, last_interaction_id, template_version, html, file_id, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, NULL, ?, ?, ?)",
+                (str(user_id), last_interaction_id, template_version, html, len(html.encode("utf-8")), now, now),
+            )
+            self._evict(conn)
+            conn.commit()
+            conn.close()
+
+    def set_file_id(self, user_id, last_interaction_id, template_version, file_id):
+        """Recuerda el file_id de Telegram del documento subido para esa clave."""
+        conn = self._connect()
+        conn.execute(
+            "UPDATE dashboard_cache SET file_id = ? WHERE user_id = ? AND last_interaction_id = ? AND template_version = ?",
+            (file_id, str(user_id), last_interaction_id, template_version),
+        )
+        conn.commit()
+        conn.close()
+
+    def invalidate(self, user_id):
+        conn = self._connect()
+        conn.execute("DELETE FROM dashboard_cache WHERE user_id = ?", (str(user_id),))
+        conn.commit()
+        conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        entradas, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM dashboard_cache").fetchone()
+        conn.close()
+        return {"entradas": entradas, "bytes": total, "max_bytes": self.max_bytes, "max_entries": self.max_entries}
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+    def _evict(self, conn):
+        entradas, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM dashboard_cache").fetchone()
+        desalojados = 0
+        if entradas > self.max_entries or total > self.max_bytes:
+            # recorrer de la menos usada a la más usada hasta entrar en el límite
+            for user_id, size in conn.execute("SELECT user_id, size FROM dashboard_cache ORDER BY last_used").fetchall():
+                if entradas <= self.max_entries and total <= self.max_bytes:
+                    break
+                if entradas <= 1:
+                    break
+                conn.execute("DELETE FROM dashboard_cache WHERE user_id = ?", (user_id,))
+                entradas -= 1
+                total -= size or 0
+                desalojados += 1
+        if desalojados:
+            metrics.inc("dashboard_cache.evictions", desalojados)
+        metrics.set_gauge("dashboard_cache.entradas", entradas)
+        metrics.set_gauge("dashboard_cache.bytes", total)
@@ -0,0 +1,132 @@
+"""
+groq_client.py
+--------------
+Capa única para todas las llamadas a Groq (Whisper y visión):
+
+- Un solo cliente HTTP compartido (httpx con keep-alive y pool de
+  conexiones): los audios y fotos seguidos reutilizan la conexión TLS en
+  lugar de abrir una nueva por mensaje.
+- Timeout propio por endpoint ("stt", "vision", "chat").
+- Reintentos acotados ante 429, 5xx y errores de conexión, con backoff
+  exponencial con jitter (respeta Retry-After si Groq lo manda).
+- Métricas por llamada: groq.<endpoint>.segundos, .reintentos y .errores.
+
+El SDK de groq y httpx se importan recién al crear el cliente.
+"""
+
+import logging
+import random
+import threading
+import time
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUTS = {"stt": 60.0, "vision": 45.0, "chat": 30.0}
+DEFAULT_MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+MAX_CONEXIONES = 20
+CONEXIONES_KEEPALIVE = 10
+KEEPALIVE_SEGUNDOS = 60.0
+
+
+def es_reintentable(error):
+    """429, 5xx, timeouts y errores de conexión se reintentan; el resto (400, 401...) no."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    try:
+        import groq
+    except ImportError:
+        return False
+    return isinstance(error, groq.APIConnectionError)  # incluye APITimeoutError
+
+
+def espera_backoff(intento, error=None, base=BACKOFF_BASE, maximo=BACKOFF_MAX):
+    """Segundos a esperar antes del reintento `intento` (0, 1, 2...): full jitter o Retry-After."""
+    respuesta = getattr(error, "response", None)
+    retry_after = respuesta.headers.get("retry-after") if respuesta is not None else None
+    if retry_after:
+        try:
+            return min(maximo, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(maximo, base * (2 ** intento)))
+
+
+class GroqService:
+    def __init__(self, api_key, timeouts=None, max_retries=DEFAULT_MAX_RETRIES, name="groq"):
+        self.api_key = api_key
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.max_retries = max_retries
+        self.name = name
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """Cliente del SDK con el pool HTTP compartido (se crea en el primer uso)."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import httpx
+                    from groq import Groq
+
+                    http_client = httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=MAX_CONEXIONES,
+                            max_keepalive_connections=CONEXIONES_KEEPALIVE,
+                            keepalive_expiry=KEEPALIVE_SEGUNDOS,
+                        ),
+                        timeout=max(self.timeouts.values()),
+                    )
+                    # los reintentos los maneja _call (con jitter y métricas), no el SDK
+                    self._client = Groq(api_key=self.api_key, http_client=http_client, max_retries=0)
+        return self._client
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def transcribe(self, **kwargs):
+        """audio.transcriptions.create con el timeout de "stt"."""
+        return self._call("stt", lambda timeout: self.client.audio.transcriptions.create(timeout=timeout, **kwargs))
+
+    def vision(self, **kwargs):
+        """chat.completions.create con imágenes, con el timeout de "vision"."""
+        return self._call("vision", lambda timeout: self.client.chat.completions.create(timeout=timeout, **kwargs))
+
+    def chat(self, **kwargs):
+        """chat.completions.create de solo texto, con el timeout de "chat"."""
+        return self._call("chat", lambda timeout: self.client.chat.completions.create(timeout=timeout, **kwargs))
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+    def _call(self, endpoint, fn):
+        timeout = self.timeouts.get(endpoint, max(self.timeouts.values()))
+        intento = 0
+        while True:
+            inicio = time.perf_counter()
+            try:
+                resultado = fn(timeout)
+                metrics.observe(f"{self.name}.{endpoint}.segundos", time.perf_counter() - inicio)
+                return resultado
+            except Exception as e:
+                metrics.observe(f"{self.name}.{endpoint}.segundos", time.perf_counter() - inicio)
+                if intento >= self.max_retries or not es_reintentable(e):
+                    metrics.inc(f"{self.name}.{endpoint}.errores")
+                    raise
+                espera = espera_backoff(intento, e)
+                metrics.inc(f"{self.name}.{endpoint}.reintentos")
+                logger.warning("⚠️ Groq %s falló (%s), reintento %d en %.1f s",
+                               endpoint, type(e).__name__, intento + 1, espera)
+                time.sleep(espera)
+                intento += 1
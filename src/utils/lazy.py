@@ -0,0 +1,66 @@
+"""
+lazy.py
+-------
+Recursos pesados (modelos, clientes de APIs, módulos grandes como pandas o
+matplotlib) que se construyen la primera vez que se usan y no al importar
+el bot. Así un despliegue que solo recibe texto no paga el arranque ni la
+memoria de lo que nunca usa.
+
+    analizador = LazyResource(cargar_modelo, name="sentimiento")
+    analizador.preload()          # opcional: cargar en un hilo de fondo
+    modelo = analizador.get()     # bloquea solo si todavía se está cargando
+"""
+
+import importlib
+import logging
+import threading
+import time
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+_FALLO = object()
+
+
+class LazyResource:
+    def __init__(self, factory, name):
+        self.factory = factory
+        self.name = name
+        self._value = None
+        self._estado = None  # None = sin cargar, True = cargado, _FALLO = falló
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._estado is True
+
+    def get(self):
+        """
+        Devuelve el recurso, construyéndolo si hace falta. Si la construcción
+        falla se registra una sola vez y se devuelve None en adelante.
+        """
+        if self._estado is None:
+            with self._lock:
+                if self._estado is None:
+                    inicio = time.perf_counter()
+                    try:
+                        self._value = self.factory()
+                        self._estado = True
+                    except Exception as e:
+                        logger.warning("⚠️ No se pudo cargar %s: %s", self.name, e)
+                        self._value = None
+                        self._estado = _FALLO
+                    metrics.observe(f"lazy.{self.name}.carga_segundos", time.perf_counter() - inicio)
+        return self._value
+
+    def preload(self):
+        """Dispara la carga en un hilo de fondo (no bloquea). Devuelve el hilo."""
+        hilo = threading.Thread(target=self.get, name=f"precarga-{self.name}", daemon=True)
+        hilo.start()
+        return hilo
+
+
+def lazy_import(nombre):
+    """LazyResource que importa el módulo `nombre` en el primer uso."""
+    return LazyResource(lambda: importlib.import_module(nombre), name=nombre)
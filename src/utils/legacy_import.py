@@ -0,0 +1,352 @@
+"""
+legacy_import.py
+----------------
+Importa los logs viejos (data/user_logs.json, un array JSON gigante) a la
+tabla `interactions` de menta.db para que los dashboards vean esa historia.
+
+- Parsea el array de a un objeto por vez (no carga el archivo entero).
+- Normaliza los registros inconsistentes: `recomendacion` guardada como lista
+  (se queda la primera opción), registros con solo `respuesta` (quedan sin
+  recomendación), prefijos [TEXTO]/[VOZ]/[FOTO].
+- Inserta con executemany en transacciones grandes.
+- Es reanudable: guarda el offset del último lote confirmado y, como cada
+  registro tiene una clave única (`source_key`), re-ejecutarlo no duplica nada.
+
+Cuando el bot arranca migra user_logs.json al primer segmento del log NDJSON
+(ver progress_logger.migrar_legacy) y lo renombra a user_logs.json.migrado.
+Por eso también se puede importar desde el `.migrado` o desde ese segmento
+(interactions-00000000-0000.ndjson.gz); las tres formas generan las mismas
+claves, así que importar más de una no duplica registros. Sin argumento se
+usa la primera que exista.
+
+Uso (desde src/):
+    python -m utils.legacy_import --db data/menta.db
+    python -m utils.legacy_import data/logs/interactions-00000000-0000.ndjson.gz --db data/menta.db
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from utils.progress_logger import LEGACY_FILE, LOG_DIR, legacy_segment_path
+
+DEFAULT_BATCH = 5000
+CHUNK_SIZE = 64 * 1024
+
+PREFIJOS_TIPO = {"[TEXTO]": "text", "[VOZ]": "audio", "[AUDIO]": "audio", "[FOTO]": "photo"}
+
+
+# ============================================================================
+# PARSER INCREMENTAL
+# ============================================================================
+
+def iter_json_array(f, offset=0, chunk_size=CHUNK_SIZE):
+    """
+    Itera los objetos de un array JSON top-level leyendo de a bloques.
+    Devuelve tuplas (objeto, offset_siguiente) donde el offset es la posición
+    (en caracteres) justo después del objeto, para poder reanudar desde ahí.
+    """
+    decoder = json.JSONDecoder()
+    f.seek(0)
+    if offset:
+        # avanzar hasta el offset guardado (el archivo se abre en modo texto)
+        restante = offset
+        while restante > 0:
+            leido = f.read(min(chunk_size, restante))
+            if not leido:
+                return
+            restante -= len(leido)
+    base = offset  # posición absoluta de buf[0]
+    buf = ""
+    pos = 0
+    empezado = offset > 0
+    eof = False
+
+    while True:
+        # saltear separadores
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if not empezado and pos < len(buf):
+            if buf[pos] != "[":
+                raise ValueError("El archivo no contiene un array JSON")
+            empezado = True
+            pos += 1
+            continue
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        if pos < len(buf):
+            try:
+                obj, fin = decoder.raw_decode(buf, pos)
+                yield obj, base + fin
+                pos = fin
+                continue
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+        if eof:
+            return
+        # hace falta más texto (objeto incompleto o buffer vacío): se descarta lo
+        # ya consumido una sola vez por bloque leído
+        base += pos
+        buf = buf[pos:]
+        pos = 0
+        bloque = f.read(chunk_size)
+        if not bloque:
+            eof = True
+        buf += bloque
+
+
+def iter_ndjson(f, offset=0):
+    """
+    Itera los objetos de un archivo NDJSON. El offset es la cantidad de líneas
+    ya leídas; una línea que no es JSON válido se devuelve como None.
+    """
+    for numero, linea in enumerate(f, 1):
+        if numero <= offset or not linea.strip():
+            continue
+        try:
+            yield json.loads(linea), numero
+        except ValueError:
+            yield None, numero
+
+
+def es_ndjson(path):
+    return path.endswith((".ndjson", ".ndjson.gz"))
+
+
+def abrir(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    return opener(path, "rt", encoding="utf-8")
+
+
+def fuentes_por_defecto(legacy_path=LEGACY_FILE, log_dir=LOG_DIR):
+    """El historial viejo en sus tres formas, en orden de preferencia."""
+    segmento = legacy_segment_path(log_dir)
+    return [legacy_path, legacy_path + ".migrado", segmento + ".gz", segmento]
+
+
+def nombre_fuente(path):
+    """
+    Nombre con el que se arman las `source_key`: el del archivo original, sea
+    cual sea la forma en que se lee (así el mismo registro tiene la misma clave).
+    """
+    nombre = os.path.basename(path)
+    if nombre.endswith(".migrado"):
+        return nombre[: -len(".migrado")]
+    if es_ndjson(path):
+        return os.path.basename(LEGACY_FILE)
+    return nombre
+
+
+# ============================================================================
+# NORMALIZACIÓN
+# ============================================================================
+
+def _normalizar_recomendacion(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, list):
+        # versiones viejas guardaban la lista completa de opciones del dataset en
+        # lugar de la que se sirvió; como no hay forma de saber cuál fue, se
+        # importa siempre la primera para que la columna tenga un solo valor
+        opciones = [str(v) for v in valor if v]
+        return opciones[0] if opciones else None
+    return str(valor)
+
+
+def normalizar(registro):
+    """Convierte un registro viejo a una fila de `interactions` (o None si no sirve)."""
+    if not isinstance(registro, dict) or not registro.get("user_id") or not registro.get("fecha"):
+        return None
+    mensaje = str(registro.get("mensaje") or "").strip()
+    tipo = "text"
+    for prefijo, valor in PREFIJOS_TIPO.items():
+        if mensaje.upper().startswith(prefijo):
+            tipo = valor
+            mensaje = mensaje[len(prefijo):].strip()
+            break
+    # `respuesta` (formato viejo) es la respuesta armada, truncada a 100
+    # caracteres con su encabezado: no es una recomendación, así que no se usa
+    recomendacion = _normalizar_recomendacion(registro.get("recomendacion"))
+    sentimiento = str(registro.get("sentimiento") or "NEU").upper()
+    if sentimiento not in ("POS", "NEG", "NEU"):
+        sentimiento = "NEU"
+    fecha = str(registro["fecha"]).strip().replace(" ", "T")
+    return {
+        "user_id": str(registro["user_id"]),
+        "timestamp": fecha,
+        "type": tipo,
+        "text": mensaje if tipo != "photo" else "",
+        "sentimiento": sentimiento,
+        "alimentos": mensaje if tipo == "photo" and mensaje else None,
+        "evaluacion": None,
+        "recomendacion": recomendacion,
+    }
+
+
+def source_key(source, numero, fila):
+    """Clave estable por registro: mismo archivo y misma posición -> misma clave."""
+    firma = f"{fila['user_id']}|{fila['timestamp']}|{fila['text']}|{fila['alimentos']}"
+    return f"{source}:{numero}:{hashlib.sha1(firma.encode('utf-8')).hexdigest()[:16]}"
+
+
+# ============================================================================
+# BASE DE DATOS
+# ============================================================================
+
+def preparar_db(conn):
+    c = conn.cursor()
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS interactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT,
+        timestamp TEXT,
+        type TEXT,
+        text TEXT,
+        sentimiento TEXT,
+        alimentos TEXT,
+        evaluacion TEXT,
+        recomendacion TEXT
+    )
+    """)
+    columnas = {row[1] for row in c.execute("PRAGMA table_info(interactions)")}
+    if "source_key" not in columnas:
+        c.execute("ALTER TABLE interactions ADD COLUMN source_key TEXT")
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_interactions_source_key ON interactions(source_key)")
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS import_progress (
+        source TEXT PRIMARY KEY,
+        offset INTEGER,
+        registros INTEGER,
+        terminado INTEGER DEFAULT 0
+    )
+    """)
+    conn.commit()
+
+
+def _leer_progreso(conn, source):
+    row = conn.execute("SELECT offset, registros, terminado FROM import_progress WHERE source = ?", (source,)).fetchone()
+    return row if row else (0, 0, 0)
+
+
+def _guardar_progreso(conn, source, offset, registros, terminado=0):
+    conn.execute(
+        "INSERT OR REPLACE INTO import_progress (source, offset, registros, terminado) VALUES (?, ?, ?, ?)",
+        (source, offset, registros, terminado),
+    )
+
+
+# ============================================================================
+# IMPORTACIÓN
+# ============================================================================
+
+def importar(json_path, db_path, batch_size=DEFAULT_BATCH, desde_cero=False, progreso=None):
+    """
+    Importa `json_path` a `db_path`. Devuelve un dict con el reporte.
+    `json_path` puede ser el array JSON viejo (o su `.migrado`) o el segmento
+    NDJSON al que lo migró el bot.
+
+    Args:
+        desde_cero: ignora el progreso guardado y vuelve a recorrer todo
+            (igual no duplica gracias a `source_key`)
+        progreso: callback opcional(reporte_parcial) llamado después de cada lote
+    """
+    # el progreso se guarda por archivo (los offsets dependen del formato) y
+    # las claves por fuente original
+    clave_progreso = os.path.basename(json_path)
+    source = nombre_fuente(json_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    preparar_db(conn)
+
+    offset, numero, terminado = (0, 0, 0) if desde_cero else _leer_progreso(conn, clave_progreso)
+    reporte = {"archivo": json_path, "leidos": 0, "insertados": 0, "duplicados": 0,
+               "invalidos": 0, "reanudado_desde": numero, "segundos": 0.0}
+    if terminado:
+        reporte["ya_importado"] = True
+        conn.close()
+        return reporte
+
+    sql = ("INSERT OR IGNORE INTO interactions (user_id, timestamp, type, text, sentimiento, alimentos, "
+           "evaluacion, recomendacion, source_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+    inicio = time.perf_counter()
+    lote = []
+
+    def confirmar(nuevo_offset):
+        antes = conn.total_changes
+        conn.executemany(sql, lote)
+        insertados = conn.total_changes - antes
+        _guardar_progreso(conn, clave_progreso, nuevo_offset, numero)
+        conn.commit()
+        reporte["insertados"] += insertados
+        reporte["duplicados"] += len(lote) - insertados
+        lote.clear()
+        if progreso:
+            progreso(dict(reporte, segundos=time.perf_counter() - inicio))
+
+    with abrir(json_path) as f:
+        ultimo_offset = offset
+        registros = iter_ndjson(f, offset) if es_ndjson(json_path) else iter_json_array(f, offset)
+        for registro, ultimo_offset in registros:
+            numero += 1
+            reporte["leidos"] += 1
+            fila = normalizar(registro)
+            if fila is None:
+                reporte["invalidos"] += 1
+            else:
+                lote.append((fila["user_id"], fila["timestamp"], fila["type"], fila["text"],
+                             fila["sentimiento"], fila["alimentos"], fila["evaluacion"],
+                             fila["recomendacion"], source_key(source, numero, fila)))
+            if len(lote) >= batch_size:
+                confirmar(ultimo_offset)
+        confirmar(ultimo_offset)
+
+    _guardar_progreso(conn, clave_progreso, ultimo_offset, numero, terminado=1)
+    conn.commit()
+    conn.close()
+    reporte["segundos"] = time.perf_counter() - inicio
+    return reporte
+
+
+def formatear_reporte(reporte):
+    if reporte.get("ya_importado"):
+        return f"✅ {reporte['archivo']} ya estaba importado (usá --desde-cero para recorrerlo otra vez)."
+    segundos = reporte["segundos"] or 1e-9
+    return (
+        f"📥 Importación de {reporte['archivo']}\n"
+        f"   leídos:      {reporte['leidos']}\n"
+        f"   insertados:  {reporte['insertados']}\n"
+        f"   duplicados:  {reporte['duplicados']}\n"
+        f"   inválidos:   {reporte['invalidos']}\n"
+        f"   reanudado desde el registro {reporte['reanudado_desde']}\n"
+        f"   tiempo: {reporte['segundos']:.2f}s  ({reporte['leidos'] / segundos:,.0f} registros/s)"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importa user_logs.json (formato viejo) a menta.db")
+    parser.add_argument("json_path", nargs="?", default=None,
+                        help="user_logs.json, su .migrado o el segmento migrado (default: el primero que exista)")
+    parser.add_argument("--db", default="data/menta.db")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="registros por transacción")
+    parser.add_argument("--desde-cero", action="store_true", help="ignorar el progreso guardado")
+    args = parser.parse_args(argv)
+
+    def mostrar(parcial):
+        print(f"   ... {parcial['leidos']} registros ({parcial['insertados']} nuevos)", flush=True)
+
+    json_path = args.json_path or next((p for p in fuentes_por_defecto() if os.path.exists(p)), None)
+    if json_path is None:
+        print(f"⚠️ No se encontró el historial viejo en ninguna de sus formas: {', '.join(fuentes_por_defecto())}")
+        return
+    reporte = importar(json_path, args.db, args.batch, args.desde_cero, progreso=mostrar)
+    print(formatear_reporte(reporte))
+
+
+if __name__ == "__main__":
+    main()
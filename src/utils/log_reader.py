@@ -0,0 +1,172 @@
+"""
+log_reader.py
+-------------
+Lectura en streaming de los logs de interacciones (ver ndjson_log.py).
+Recorre los segmentos de a uno, incluidos los comprimidos con gzip, sin
+cargar todo el historial en memoria. Con los sidecars de cada segmento
+(fecha mínima/máxima y filtro de Bloom de usuarios) se saltean segmentos
+enteros que no pueden tener registros del filtro pedido.
+
+Mientras data/user_logs.json (formato viejo) no se haya migrado al primer
+segmento (ver progress_logger.migrar_legacy), sus registros se leen primero
+directamente desde ese archivo.
+
+Uso como herramienta de consulta:
+    python -m utils.log_reader --user 5090077182 --desde 2025-10-01 --hasta 2025-10-31
+    python -m utils.log_reader --user 5090077182 --count
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+from datetime import date, datetime
+
+from utils import metrics
+from utils.bloom import BloomFilter
+from utils.ndjson_log import list_segments, segment_base, sidecar_path
+from utils.progress_logger import LEGACY_FILE, LOG_DIR, current_log_dir, legacy_segment_path
+
+FECHA_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _to_fecha(value, fin=False):
+    """Normaliza un límite de fecha al formato de los logs ('YYYY-MM-DD HH:MM:SS')."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime(FECHA_FORMAT)
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d") + (" 23:59:59" if fin else " 00:00:00")
+    value = str(value).strip()
+    if len(value) == 10:  # solo fecha
+        return value + (" 23:59:59" if fin else " 00:00:00")
+    return value
+
+
+def _load_sidecar(path):
+    try:
+        with open(sidecar_path(path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _segment_may_match(meta, user_id, desde, hasta):
+    """False solo si el sidecar garantiza que el segmento no tiene coincidencias."""
+    if desde and meta.get("max_fecha") and meta["max_fecha"] < desde:
+        return False
+    if hasta and meta.get("min_fecha") and meta["min_fecha"] > hasta:
+        return False
+    if user_id is not None and meta.get("users"):
+        if user_id not in BloomFilter.from_dict(meta["users"]):
+            return False
+    return True
+
+
+def _iter_segment(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    try:
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # línea cortada (por ejemplo si el proceso murió escribiendo)
+                    metrics.inc("log_reader.lineas_invalidas")
+    except FileNotFoundError:
+        # el segmento se comprimió/rotó mientras listábamos
+        return
+
+
+def _iter_legacy(path):
+    """Registros de user_logs.json (array JSON) leídos de a uno."""
+    from utils.legacy_import import iter_json_array
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for obj, _ in iter_json_array(f):
+                if isinstance(obj, dict):
+                    # el formato viejo a veces guardaba el user_id como número
+                    yield dict(obj, user_id=str(obj.get("user_id")))
+    except FileNotFoundError:
+        # se migró mientras empezábamos a leer
+        return
+    except ValueError:
+        metrics.inc("log_reader.legacy_invalido")
+
+
+def iter_logs(user_id=None, desde=None, hasta=None, log_dir=None, name="interactions", legacy_path=LEGACY_FILE):
+    """
+    Itera los registros de log en orden cronológico aplicando los filtros.
+
+    Args:
+        user_id: solo registros de este usuario (opcional)
+        desde / hasta: límites inclusivos (str 'YYYY-MM-DD[ HH:MM:SS]', date o datetime)
+        log_dir: carpeta de los logs (por defecto la del escritor de progress_logger)
+        legacy_path: user_logs.json del formato viejo, leído si todavía no se migró
+    """
+    user_id = str(user_id) if user_id is not None else None
+    desde = _to_fecha(desde)
+    hasta = _to_fecha(hasta, fin=True)
+    log_dir = log_dir or current_log_dir()
+    fuentes = []
+    if legacy_path and os.path.exists(legacy_path):
+        fuentes.append(None)
+    # el listado se toma una vez: si la migración ya está en él, el archivo viejo no se lee
+    fuentes += list_segments(log_dir, name)
+    migrado = legacy_segment_path(log_dir, name)[: -len(".ndjson")]
+    if any(segment_base(p) == migrado for p in fuentes if p):
+        fuentes = [p for p in fuentes if p]
+    for path in fuentes:
+        if path is None:
+            metrics.inc("log_reader.legacy_leido")
+            registros = _iter_legacy(legacy_path)
+        else:
+            meta = _load_sidecar(path)
+            if meta is not None and not _segment_may_match(meta, user_id, desde, hasta):
+                metrics.inc("log_reader.segmentos_salteados")
+                continue
+            metrics.inc("log_reader.segmentos_leidos")
+            registros = _iter_segment(path)
+        for record in registros:
+            if user_id is not None and str(record.get("user_id")) != user_id:
+                continue
+            fecha = record.get("fecha") or ""
+            if desde and fecha < desde:
+                continue
+            if hasta and fecha > hasta:
+                continue
+            yield record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta los logs de interacciones en streaming.")
+    parser.add_argument("--user", help="user_id a filtrar")
+    parser.add_argument("--desde", help="fecha inicial (YYYY-MM-DD o 'YYYY-MM-DD HH:MM:SS')")
+    parser.add_argument("--hasta", help="fecha final inclusiva")
+    parser.add_argument("--log-dir", default=None, help=f"carpeta de logs (default {LOG_DIR})")
+    parser.add_argument("--count", action="store_true", help="solo mostrar la cantidad de registros")
+    args = parser.parse_args(argv)
+
+    total = 0
+    for record in iter_logs(args.user, args.desde, args.hasta, args.log_dir):
+        total += 1
+        if not args.count:
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+    if args.count:
+        print(total)
+    snap = metrics.snapshot()["counters"]
+    print(
+        f"segmentos leídos: {snap.get('log_reader.segmentos_leidos', 0):g}, "
+        f"salteados: {snap.get('log_reader.segmentos_salteados', 0):g}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+log_setup.py
+------------
+Configuración del logging del bot. Los handlers de Telegram solo encolan el
+registro (QueueHandler) y un hilo en segundo plano (QueueListener) es el que
+formatea y escribe en la consola, así el I/O no frena el procesamiento de
+mensajes.
+
+Variables de entorno:
+    LOG_LEVEL          nivel mínimo (DEBUG, INFO, WARNING...). Default WARNING.
+    LOG_FORMAT         "text" o "json". Default text.
+    LOG_DEBUG_SAMPLE   fracción de los mensajes DEBUG que se escriben (0 a 1). Default 1.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime
+
+# Atributos propios de LogRecord: todo lo demás vino por `extra=` y va al JSON
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro, con los campos de `extra=` incluidos."""
+
+    def format(self, record):
+        data = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legible para desarrollo, con los campos extra al final."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%H:%M:%S")
+
+    def format(self, record):
+        base = super().format(record)
+        extras = {k: v for k, v in record.__dict__.items() if k not in _RESERVED and not k.startswith("_")}
+        if extras:
+            base += " " + " ".join(f"{k}={v}" for k, v in extras.items())
+        return base
+
+
+class DebugSampler(logging.Filter):
+    """Deja pasar solo una fracción de los mensajes DEBUG (los de mucho volumen)."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+def setup_logging(level=None, fmt=None, debug_sample=None, stream=None):
+    """
+    Configura el logger raíz con un QueueHandler y arranca el listener.
+    Se puede llamar más de una vez: la segunda reemplaza la configuración.
+    """
+    global _listener
+    level = (level or os.getenv("LOG_LEVEL", "WARNING")).upper()
+    fmt = (fmt or os.getenv("LOG_FORMAT", "text")).lower()
+    if debug_sample is None:
+        debug_sample = float(os.getenv("LOG_DEBUG_SAMPLE", "1"))
+
+    shutdown_logging()
+
+    salida = logging.StreamHandler(stream or sys.stdout)
+    salida.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    cola = queue.SimpleQueue()
+    encolador = logging.handlers.QueueHandler(cola)
+    encolador.addFilter(DebugSampler(debug_sample))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(encolador)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(cola, salida, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Vacía la cola y detiene el listener (se registra con atexit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
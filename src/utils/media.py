@@ -0,0 +1,80 @@
+"""
+media.py
+--------
+Manejo en memoria de los archivos que manda el usuario (audios y fotos).
+
+Lo que devuelve `bot.download_file` ya son bytes en memoria: en lugar de
+escribirlos a `data/` y volver a leerlos para subirlos a Groq, se envuelven
+en un buffer. Solo los archivos más grandes que `spill_bytes` pasan a un
+temporal anónimo del sistema (que se borra solo al cerrarse), para no tener
+copias grandes duplicadas en RAM con varios mensajes en paralelo.
+
+    with buffer_media(datos) as buf:
+        client.transcribe(file=("audio.ogg", buf), ...)
+
+Para las fotos, `elegir_foto` toma la PhotoSize más chica que alcanza la
+resolución objetivo (Telegram manda varias: ~90, 320, 800 y 1280 px de
+lado mayor) y `recomprimir_imagen` la puede volver a codificar con una
+calidad más baja antes de mandarla al modelo de visión.
+"""
+
+import io
+import tempfile
+
+from utils import metrics
+
+# Por encima de este tamaño el buffer se vuelca a disco (default 8 MB)
+DEFAULT_SPILL_BYTES = 8 * 1024 * 1024
+
+
+def buffer_media(data, spill_bytes=DEFAULT_SPILL_BYTES):
+    """
+    Buffer de solo lectura (posicionado al inicio) con `data`. Queda en
+    memoria salvo que supere `spill_bytes`; usarlo con `with` para liberarlo.
+    """
+    buf = tempfile.SpooledTemporaryFile(max_size=spill_bytes)
+    buf.write(data)
+    buf.seek(0)
+    # SpooledTemporaryFile pasa a disco recién cuando se supera max_size
+    metrics.inc("media.a_disco" if len(data) > spill_bytes else "media.en_memoria")
+    return buf
+
+
+# Lado mayor (px) suficiente para reconocer comida; las variantes más grandes
+# solo agrandan el request y la latencia del modelo de visión
+DEFAULT_LADO_OBJETIVO = 768
+
+
+def elegir_foto(photo_sizes, lado_objetivo=DEFAULT_LADO_OBJETIVO):
+    """La PhotoSize más chica con lado mayor >= `lado_objetivo` (o la más grande si ninguna llega)."""
+    por_tamano = sorted(photo_sizes, key=lambda p: p.width * p.height)
+    for foto in por_tamano:
+        if max(foto.width, foto.height) >= lado_objetivo:
+            break
+    else:
+        foto = por_tamano[-1]
+    metrics.inc("media.foto_variante_max" if foto is por_tamano[-1] else "media.foto_variante_reducida")
+    return foto
+
+
+def recomprimir_imagen(data, lado_max=DEFAULT_LADO_OBJETIVO, calidad=80, formato="jpeg"):
+    """
+    Reduce la imagen a `lado_max` de lado mayor (si es más grande) y la codifica
+    como JPEG o WebP con `calidad`. Devuelve (bytes, mime); si no se puede
+    abrir o el resultado no es más chico, devuelve la original como JPEG.
+    """
+    try:
+        from PIL import Image
+
+        with Image.open(io.BytesIO(data)) as img:
+            img = img.convert("RGB")
+            img.thumbnail((lado_max, lado_max))
+            salida = io.BytesIO()
+            img.save(salida, format=formato.upper(), quality=calidad)
+    except Exception:
+        metrics.inc("media.recompresion_omitida")
+        return data, "image/jpeg"
+    if salida.tell() >= len(data):
+        return data, "image/jpeg"
+    metrics.inc("media.bytes_foto_ahorrados", len(data) - salida.tell())
+    return salida.getvalue(), f"image/{formato.lower()}"
@@ -0,0 +1,155 @@
+"""
+memory_cache.py
+---------------
+Caché en memoria de la memoria contextual de cada usuario.
+Los usuarios que no escriben hace tiempo (o los menos usados cuando se
+supera el presupuesto de memoria) se desalojan y se vuelven a cargar
+desde el almacenamiento la próxima vez que mandan un mensaje.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from utils import metrics
+
+# Valores por defecto: 30 minutos de inactividad y 8 MB de memoria
+DEFAULT_IDLE_SECONDS = 30 * 60
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+# Cada cuánto se recorre la caché buscando usuarios inactivos
+SWEEP_INTERVAL = 60
+
+
+def _estimar_bytes(data):
+    """Tamaño aproximado de una entrada (su JSON serializado)."""
+    return len(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+
+class MemoryCache:
+    """
+    Caché LRU de memorias de usuario con desalojo por inactividad y por tamaño.
+
+    Args:
+        load_fn: función(user_key) -> dict | None que lee un usuario del almacenamiento
+        save_fn: función(user_key, dict) que persiste un usuario
+        idle_seconds: segundos sin actividad antes de desalojar a un usuario
+        max_bytes: presupuesto de memoria aproximado para toda la caché
+    """
+
+    def __init__(self, load_fn, save_fn, idle_seconds=DEFAULT_IDLE_SECONDS,
+                 max_bytes=DEFAULT_MAX_BYTES, name="memory_cache"):
+        self._load_fn = load_fn
+        self._save_fn = save_fn
+        self.idle_seconds = idle_seconds
+        self.max_bytes = max_bytes
+        self.name = name
+        self._lock = threading.RLock()
+        # user_key -> [data, ultimo_acceso, bytes]
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._last_sweep = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def get(self, user_key):
+        """Devuelve la memoria del usuario (o None), recargándola si fue desalojada."""
+        user_key = str(user_key)
+        with self._lock:
+            entry = self._entries.get(user_key)
+            if entry is not None:
+                entry[1] = time.monotonic()
+                self._entries.move_to_end(user_key)
+                metrics.inc(f"{self.name}.hits")
+                self._maybe_sweep()
+                return entry[0]
+
+        # Miss: recargar desde el almacenamiento fuera del lock
+        metrics.inc(f"{self.name}.misses")
+        inicio = time.perf_counter()
+        data = self._load_fn(user_key)
+        metrics.observe(f"{self.name}.reload_seconds", time.perf_counter() - inicio)
+        if data is None:
+            return None
+        with self._lock:
+            # Otro hilo pudo haberlo cargado mientras tanto
+            entry = self._entries.get(user_key)
+            if entry is not None:
+                return entry[0]
+            self._store(user_key, data)
+            self._maybe_sweep()
+        return data
+
+    def put(self, user_key, data):
+        """Guarda la memoria del usuario en la caché y en el almacenamiento."""
+        user_key = str(user_key)
+        self._save_fn(user_key, data)
+        with self._lock:
+            self._store(user_key, data)
+            self._maybe_sweep()
+
+    def discard(self, user_key):
+        """Quita a un usuario de la caché sin tocar el almacenamiento."""
+        with self._lock:
+            self._remove(str(user_key))
+            self._publish()
+
+    def evict_idle(self):
+        """Desaloja a los usuarios inactivos. Devuelve cuántos se quitaron."""
+        with self._lock:
+            return self._evict_idle(time.monotonic())
+
+    def stats(self):
+        """Residencia actual de la caché."""
+        with self._lock:
+            return {"residentes": len(self._entries), "bytes": self._bytes,
+                    "max_bytes": self.max_bytes, "idle_seconds": self.idle_seconds}
+
+    # ------------------------------------------------------------------
+    # Internos (se llaman con el lock tomado)
+    # ------------------------------------------------------------------
+    def _store(self, user_key, data):
+        self._remove(user_key)
+        size = _estimar_bytes(data)
+        self._entries[user_key] = [data, time.monotonic(), size]
+        self._bytes += size
+        self._evict_over_budget()
+        self._publish()
+
+    def _remove(self, user_key):
+        entry = self._entries.pop(user_key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _evict_over_budget(self):
+        # Siempre queda al menos el usuario recién usado
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            user_key, _ = next(iter(self._entries.items()))
+            self._remove(user_key)
+            metrics.inc(f"{self.name}.evictions.budget")
+
+    def _evict_idle(self, now):
+        self._last_sweep = now
+        limite = now - self.idle_seconds
+        quitados = 0
+        # El OrderedDict está ordenado por último acceso: cortamos al primer activo
+        while self._entries:
+            user_key, entry = next(iter(self._entries.items()))
+            if entry[1] > limite:
+                break
+            self._remove(user_key)
+            quitados += 1
+        if quitados:
+            metrics.inc(f"{self.name}.evictions.idle", quitados)
+        self._publish()
+        return quitados
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep >= min(SWEEP_INTERVAL, self.idle_seconds):
+            self._evict_idle(now)
+
+    def _publish(self):
+        metrics.set_gauge(f"{self.name}.residentes", len(self._entries))
+        metrics.set_gauge(f"{self.name}.bytes", self._bytes)
@@ -0,0 +1,92 @@
+"""
+metrics.py
+----------
+Registro simple de métricas en memoria (contadores, valores y latencias)
+compartido por todos los módulos del bot. Es thread-safe porque telebot
+atiende los mensajes en varios hilos.
+"""
+
+import threading
+from collections import defaultdict, deque
+
+# Cantidad de muestras recientes que se guardan por latencia (para percentiles)
+MAX_SAMPLES = 512
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_gauges = {}
+_timings = {}
+
+
+def inc(name, value=1):
+    """Incrementa un contador."""
+    with _lock:
+        _counters[name] += value
+
+
+def set_gauge(name, value):
+    """Guarda el valor actual de una métrica (residentes, bytes, etc.)."""
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name, seconds):
+    """Registra una duración en segundos."""
+    with _lock:
+        timing = _timings.get(name)
+        if timing is None:
+            timing = _timings[name] = {"count": 0, "total": 0.0, "max": 0.0, "samples": deque(maxlen=MAX_SAMPLES)}
+        timing["count"] += 1
+        timing["total"] += seconds
+        timing["max"] = max(timing["max"], seconds)
+        timing["samples"].append(seconds)
+
+
+def _percentile(ordenados, p):
+    if not ordenados:
+        return 0.0
+    idx = min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))
+    return ordenados[idx]
+
+
+def snapshot():
+    """Devuelve una copia de todas las métricas registradas."""
+    with _lock:
+        timings = {}
+        for name, t in _timings.items():
+            ordenados = sorted(t["samples"])
+            timings[name] = {
+                "count": t["count"],
+                "avg": t["total"] / t["count"] if t["count"] else 0.0,
+                "p50": _percentile(ordenados, 0.5),
+                "p95": _percentile(ordenados, 0.95),
+                "max": t["max"],
+            }
+        return {"counters": dict(_counters), "gauges": dict(_gauges), "timings": timings}
+
+
+def format_report(prefix=""):
+    """Arma un resumen en texto plano de las métricas que empiezan con `prefix`."""
+    snap = snapshot()
+    lineas = []
+    for name, value in sorted(snap["gauges"].items()):
+        if name.startswith(prefix):
+            lineas.append(f"{name} = {value}")
+    for name, value in sorted(snap["counters"].items()):
+        if name.startswith(prefix):
+            lineas.append(f"{name} = {value:g}")
+    for name, t in sorted(snap["timings"].items()):
+        if name.startswith(prefix):
+            lineas.append(
+                f"{name}: n={t['count']} avg={t['avg'] * 1000:.1f}ms "
+                f"p95={t['p95'] * 1000:.1f}ms max={t['max'] * 1000:.1f}ms"
+            )
+    return "\n".join(lineas) if lineas else "Sin métricas registradas."
+
+
+def reset():
+    """Borra todas las métricas (útil en benchmarks)."""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _timings.clear()
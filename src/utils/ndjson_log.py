@@ -0,0 +1,243 @@
+"""
+ndjson_log.py
+-------------
+Log de interacciones append-only en formato NDJSON (un JSON por línea).
+El archivo activo se abre una sola vez y cada registro es un append de una
+línea, así que escribir cuesta lo mismo sin importar cuánta historia haya.
+El segmento activo rota por tamaño y por día, y los segmentos rotados se
+comprimen con gzip en segundo plano.
+
+Cada segmento rotado tiene un sidecar `.meta.json` con la fecha mínima y
+máxima y un filtro de Bloom de los user_id, para que log_reader.py pueda
+saltearse segmentos enteros sin abrirlos.
+
+`write_segment` escribe de una vez un segmento ya rotado (se usa para migrar
+el historial viejo de user_logs.json, ver progress_logger.py).
+"""
+
+import glob
+import gzip
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+
+from utils.bloom import BloomFilter
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+ACTIVE_SUFFIX = ".ndjson"
+ROTATED_SUFFIX = ".ndjson.gz"
+SIDECAR_SUFFIX = ".meta.json"
+
+
+def segment_base(path):
+    """Ruta de un segmento sin la extensión (.ndjson o .ndjson.gz)."""
+    for suffix in (ROTATED_SUFFIX, ACTIVE_SUFFIX):
+        if path.endswith(suffix):
+            return path[: -len(suffix)]
+    return path
+
+
+def sidecar_path(path):
+    """Ruta del sidecar con los metadatos de un segmento."""
+    return segment_base(path) + SIDECAR_SUFFIX
+
+
+def list_segments(directory, name="interactions"):
+    """Segmentos rotados (más viejos primero) seguidos del activo si existe."""
+    patron = os.path.join(directory, f"{name}-*")
+    encontrados = set(glob.glob(patron))
+    rotados = sorted(
+        p for p in encontrados
+        if p.endswith(ROTATED_SUFFIX)
+        # un .ndjson rotado cuyo .gz ya existe está terminando de comprimirse
+        or (p.endswith(ACTIVE_SUFFIX) and p[: -len(ACTIVE_SUFFIX)] + ROTATED_SUFFIX not in encontrados)
+    )
+    activo = os.path.join(directory, name + ACTIVE_SUFFIX)
+    if os.path.exists(activo):
+        rotados.append(activo)
+    return rotados
+
+
+class NDJSONLog:
+    """
+    Escritor NDJSON con rotación.
+
+    Estructura en disco (para name="interactions"):
+        interactions.ndjson                      -> segmento activo
+        interactions-20251028-0001.ndjson.gz     -> segmentos rotados
+        interactions-20251028-0001.meta.json     -> sidecar del segmento
+    """
+
+    def __init__(self, directory, name="interactions", max_bytes=DEFAULT_MAX_BYTES, compress=True):
+        self.directory = directory
+        self.name = name
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.active_path = os.path.join(directory, name + ACTIVE_SUFFIX)
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._day = None
+        self._pending = []
+        # Estadísticas del segmento activo (para su sidecar)
+        self._min_fecha = None
+        self._max_fecha = None
+        self._users = set()
+        self._count = 0
+        os.makedirs(directory, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def append(self, record):
+        """Agrega un registro (dict) como una línea del segmento activo."""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        data_len = len(line.encode("utf-8"))
+        today = datetime.now().strftime("%Y%m%d")
+        with self._lock:
+            if self._file is None:
+                self._open()
+            if self._size > 0 and (self._day != today or self._size + data_len > self.max_bytes):
+                self._rotate()
+                self._open()
+            if self._size == 0:
+                self._day = today
+            self._file.write(line)
+            self._size += data_len
+            self._track(record)
+
+    def rotate(self):
+        """Fuerza la rotación del segmento activo (si tiene datos)."""
+        with self._lock:
+            if self._file is None:
+                self._open()
+            if self._size > 0:
+                self._rotate()
+
+    def close(self):
+        """Cierra el archivo activo y espera a que terminen las compresiones."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            pending, self._pending = self._pending, []
+        for t in pending:
+            t.join()
+
+    def segments(self):
+        """Segmentos rotados (más viejos primero) seguidos del activo si existe."""
+        return list_segments(self.directory, self.name)
+
+    # ------------------------------------------------------------------
+    # Internos (se llaman con el lock tomado)
+    # ------------------------------------------------------------------
+    def _open(self):
+        # buffering=1 -> line-buffered: cada registro llega al SO al terminar la línea
+        self._file = open(self.active_path, "a", encoding="utf-8", buffering=1)
+        self._size = self._file.tell()
+        self._reset_stats()
+        if self._size > 0:
+            mtime = os.path.getmtime(self.active_path)
+            self._day = datetime.fromtimestamp(mtime).strftime("%Y%m%d")
+            # Reconstruir las estadísticas del segmento activo (acotado por max_bytes)
+            with open(self.active_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._track(json.loads(line))
+                    except ValueError:
+                        continue
+
+    def _reset_stats(self):
+        self._min_fecha = None
+        self._max_fecha = None
+        self._users = set()
+        self._count = 0
+
+    def _track(self, record):
+        fecha = record.get("fecha")
+        if fecha:
+            if self._min_fecha is None or fecha < self._min_fecha:
+                self._min_fecha = fecha
+            if self._max_fecha is None or fecha > self._max_fecha:
+                self._max_fecha = fecha
+        if record.get("user_id") is not None:
+            self._users.add(str(record["user_id"]))
+        self._count += 1
+
+    def _write_sidecar(self, path):
+        _write_meta(path, self._min_fecha, self._max_fecha, self._count, self._users)
+
+    def _next_segment_path(self):
+        patron = os.path.join(self.directory, f"{self.name}-{self._day}-*{SIDECAR_SUFFIX}")
+        seq = len(glob.glob(patron)) + 1
+        while True:
+            base = os.path.join(self.directory, f"{self.name}-{self._day}-{seq:04d}")
+            if not any(os.path.exists(base + suf) for suf in (ACTIVE_SUFFIX, ROTATED_SUFFIX, SIDECAR_SUFFIX)):
+                return base + ACTIVE_SUFFIX
+            seq += 1
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        destino = self._next_segment_path()
+        os.replace(self.active_path, destino)
+        self._write_sidecar(destino)
+        self._reset_stats()
+        self._size = 0
+        if self.compress:
+            t = threading.Thread(target=_gzip_segment, args=(destino,), daemon=True)
+            t.start()
+            self._pending = [p for p in self._pending if p.is_alive()] + [t]
+
+
+def write_segment(path, records, compress=True):
+    """
+    Escribe `records` como un segmento rotado completo en `path` (.ndjson),
+    con su sidecar, y lo comprime. El archivo aparece recién al terminar, así
+    los lectores nunca ven un segmento a medias. Devuelve la cantidad escrita.
+    """
+    fechas, users, count = [], set(), 0
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if record.get("fecha"):
+                    fechas = [min(fechas + [record["fecha"]]), max(fechas + [record["fecha"]])]
+                if record.get("user_id") is not None:
+                    users.add(str(record["user_id"]))
+                count += 1
+    except BaseException:
+        os.remove(tmp)
+        raise
+    if not count:
+        os.remove(tmp)
+        return 0
+    os.replace(tmp, path)
+    _write_meta(path, fechas[0] if fechas else None, fechas[-1] if fechas else None, count, users)
+    if compress:
+        _gzip_segment(path)
+    return count
+
+
+def _write_meta(path, min_fecha, max_fecha, count, users):
+    """Escribe el sidecar de un segmento (fechas, cantidad y Bloom de usuarios)."""
+    bloom = BloomFilter.for_capacity(len(users))
+    for user in users:
+        bloom.add(user)
+    meta = {"min_fecha": min_fecha, "max_fecha": max_fecha, "count": count, "users": bloom.to_dict()}
+    tmp = sidecar_path(path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, sidecar_path(path))
+
+
+def _gzip_segment(path):
+    """Comprime un segmento rotado y borra el original."""
+    tmp = path + ".gz.tmp"
+    with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(tmp, path[: -len(ACTIVE_SUFFIX)] + ROTATED_SUFFIX)
+    os.remove(path)
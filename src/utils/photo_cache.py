@@ -0,0 +1,168 @@
+"""
+photo_cache.py
+--------------
+Caché de análisis de fotos de comida por hash perceptual.
+
+Cuando alguien manda de nuevo la misma foto (o una casi igual: otra
+compresión, un recorte mínimo, la misma toma repetida) no hace falta volver
+a llamar al modelo de visión. Cada foto se resume en un dHash de 64 bits
+(`dhash`): fotos casi iguales difieren en pocos bits, fotos distintas en
+~30. Los hashes de los análisis recientes se indexan en un BK-tree, que
+encuentra los vecinos a distancia de Hamming <= umbral sin recorrer todo.
+
+Los análisis se guardan en la base SQLite del bot (tabla photo_cache), el
+árbol se arma en memoria al iniciar y se desaloja por LRU al superar
+`max_entries`.
+"""
+
+import io
+import json
+import sqlite3
+import threading
+import time
+
+from utils import metrics
+
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_UMBRAL = 5
+
+
+def dhash(data, tamano=8):
+    """Hash de diferencias (dHash) de `tamano`² bits de una imagen en bytes."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        gris = img.convert("L").resize((tamano + 1, tamano), Image.LANCZOS)
+        pixeles = list(gris.tobytes())  # modo "L": un byte por píxel
+    valor = 0
+    for fila in range(tamano):
+        for col in range(tamano):
+            izq = pixeles[fila * (tamano + 1) + col]
+            der = pixeles[fila * (tamano + 1) + col + 1]
+            valor = (valor << 1) | (izq > der)
+    return valor
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Árbol BK sobre distancia de Hamming: cada hijo cuelga de su distancia al padre."""
+
+    def __init__(self):
+        self.raiz = None  # (hash, valor, {distancia: nodo})
+        self.tamano = 0
+
+    def agregar(self, h, valor):
+        self.tamano += 1
+        if self.raiz is None:
+            self.raiz = (h, valor, {})
+            return
+        nodo = self.raiz
+        while True:
+            d = hamming(h, nodo[0])
+            hijo = nodo[2].get(d)
+            if hijo is None:
+                nodo[2][d] = (h, valor, {})
+                return
+            nodo = hijo
+
+    def buscar(self, h, radio):
+        """Lista de (distancia, hash, valor) a distancia <= radio, de la más cercana a la más lejana."""
+        encontrados = []
+        pendientes = [self.raiz] if self.raiz else []
+        while pendientes:
+            nodo_h, valor, hijos = pendientes.pop()
+            d = hamming(h, nodo_h)
+            if d <= radio:
+                encontrados.append((d, nodo_h, valor))
+            # desigualdad triangular: solo pueden estar cerca los hijos con |k - d| <= radio
+            pendientes.extend(hijo for k, hijo in hijos.items() if d - radio <= k <= d + radio)
+        return sorted(encontrados, key=lambda t: t[0])
+
+
+class PhotoCache:
+    def __init__(self, db_path, max_entries=DEFAULT_MAX_ENTRIES, umbral=DEFAULT_UMBRAL):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.umbral = umbral
+        self._lock = threading.Lock()
+        conn = self._connect()
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS photo_cache (
+            hash TEXT PRIMARY KEY,
+            analisis TEXT,
+            created REAL,
+            last_used REAL
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_photo_cache_last_used ON photo_cache(last_used)")
+        conn.commit()
+        self._reconstruir(conn)
+        conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def get(self, h):
+        """Análisis guardado de la foto más parecida a `h` dentro del umbral, o None."""
+        with self._lock:
+            vecinos = self._arbol.buscar(h, self.umbral)
+        if not vecinos:
+            metrics.inc("photo_cache.misses")
+            return None
+        distancia, h_cache, analisis = vecinos[0]
+        conn = self._connect()
+        conn.execute("UPDATE photo_cache SET last_used = ? WHERE hash = ?", (time.time(), format(h_cache, "016x")))
+        conn.commit()
+        conn.close()
+        metrics.inc("photo_cache.hits")
+        metrics.inc(f"photo_cache.hits_distancia_{distancia}")
+        return json.loads(analisis)
+
+    def put(self, h, analisis):
+        """Guarda el análisis de la foto con hash `h` y aplica el límite de entradas."""
+        now = time.time()
+        clave = format(h, "016x")
+        datos = json.dumps(analisis, ensure_ascii=False)
+        with self._lock:
+            conn = self._connect()
+            existia = conn.execute("SELECT 1 FROM photo_cache WHERE hash = ?", (clave,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO photo_cache (hash, analisis, created, last_used) VALUES (?, ?, ?, ?)",
+                (clave, datos, now, now),
+            )
+            conn.commit()
+            if existia or self._arbol.tamano >= self.max_entries:
+                # el BK-tree no borra nodos: desalojar en la base y volver a armarlo
+                self._evict(conn)
+                self._reconstruir(conn)
+            else:
+                self._arbol.agregar(h, datos)
+            metrics.set_gauge("photo_cache.entradas", self._arbol.tamano)
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Internos (llamar con self._lock tomado, salvo en __init__)
+    # ------------------------------------------------------------------
+    def _reconstruir(self, conn):
+        self._arbol = BKTree()
+        for clave, datos in conn.execute("SELECT hash, analisis FROM photo_cache"):
+            self._arbol.agregar(int(clave, 16), datos)
+
+    def _evict(self, conn):
+        entradas = conn.execute("SELECT COUNT(*) FROM photo_cache").fetchone()[0]
+        if entradas <= self.max_entries:
+            return
+        # desalojar de a un 10% para no reconstruir el árbol en cada foto nueva
+        sobran = entradas - int(self.max_entries * 0.9)
+        conn.execute(
+            "DELETE FROM photo_cache WHERE hash IN (SELECT hash FROM photo_cache ORDER BY last_used LIMIT ?)",
+            (sobran,),
+        )
+        conn.commit()
+        metrics.inc("photo_cache.evictions", sobran)
@@ -0,0 +1,217 @@
+"""
+pregenerar_dashboards.py
+------------------------
+Job nocturno que deja listos los dashboards de los usuarios con
+interacciones nuevas desde su último render, para que el /dashboard de la
+mañana salga directo de la caché (utils/dashboard_cache.py) sin renderizar.
+
+- Candidatos: usuarios cuya última interacción (MAX(id)) no coincide con la
+  guardada en dashboard_cache para la versión de template actual. Se
+  ordenan por actividad y se limitan a la capacidad de la caché.
+- Los renders corren en paralelo en el pool de procesos (utils/render_pool.py)
+  y cada resultado se guarda en la caché apenas termina, así que si el job se
+  corta, al volver a correrlo solo quedan los usuarios que faltaban.
+- Límite de renders por minuto para no competir con el bot si comparten máquina.
+- Al final escribe un resumen JSON con cuántos dashboards se hicieron y cuánto tardaron.
+
+Uso (desde src/):
+    python -m utils.pregenerar_dashboards --db data/menta.db --modo png --por-minuto 120
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from utils import metrics
+from utils.dashboard_cache import DashboardCache, DEFAULT_MAX_BYTES, DEFAULT_MAX_ENTRIES
+from utils.log_setup import setup_logging
+from utils.render_pool import RenderPool
+
+logger = logging.getLogger(__name__)
+
+
+def cargar_renderer(modo):
+    """Módulo de render y versión de template, con la misma clave que usa BOT_final."""
+    if modo == "svg":
+        from analysis import dashboard_svg as renderer
+    else:
+        from analysis import dashboard as renderer
+    return renderer, f"{modo}-{renderer.TEMPLATE_VERSION}"
+
+
+def buscar_candidatos(db_path, template_version, min_interacciones=1, limite=None):
+    """
+    Usuarios con interacciones nuevas desde su último render (o sin render
+    vigente para esta versión), de más a menos activos.
+    Devuelve una lista de (user_id, last_interaction_id).
+    """
+    conn = sqlite3.connect(db_path)
+    sql = """
+        SELECT i.user_id, MAX(i.id) AS ultima, COUNT(*) AS n
+        FROM interactions i
+        LEFT JOIN dashboard_cache c ON c.user_id = i.user_id
+        GROUP BY i.user_id
+        HAVING n >= ?
+           AND (MAX(c.last_interaction_id) IS NULL
+                OR MAX(c.last_interaction_id) != ultima
+                OR MAX(c.template_version) != ?)
+        ORDER BY n DESC
+    """
+    params = [min_interacciones, template_version]
+    if limite:
+        sql += " LIMIT ?"
+        params.append(limite)
+    filas = conn.execute(sql, params).fetchall()
+    conn.close()
+    return [(user_id, ultima) for user_id, ultima, _ in filas]
+
+
+def _render_medido(fn, db_path, user_id):
+    """Corre en el proceso del pool: devuelve (html, segundos de render sin contar la cola)."""
+    inicio = time.perf_counter()
+    html = fn(db_path, user_id)
+    return html, time.perf_counter() - inicio
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def pregenerar(db_path, modo="png", workers=None, por_minuto=0, min_interacciones=1, limite=None,
+               cache=None, progreso=None):
+    """
+    Renderiza los dashboards pendientes y los guarda en la caché.
+    Devuelve un dict con el resumen de la corrida.
+    """
+    renderer, version = cargar_renderer(modo)
+    cache = cache or DashboardCache(db_path)
+    # no tiene sentido renderizar más de lo que entra en la caché
+    limite = min(limite or cache.max_entries, cache.max_entries)
+    cache.stats()  # crea la tabla dashboard_cache si todavía no existe
+    candidatos = buscar_candidatos(db_path, version, min_interacciones, limite)
+
+    pool = RenderPool(max_workers=workers, name="pregeneracion")
+    # como mucho dos renders esperando por proceso: si el job se corta se pierde poco trabajo
+    en_vuelo = threading.BoundedSemaphore(pool.max_workers * 2)
+    intervalo = 60.0 / por_minuto if por_minuto else 0.0
+    lock = threading.Lock()
+    resumen = {
+        "inicio": datetime.now().isoformat(timespec="seconds"),
+        "modo": modo,
+        "template_version": version,
+        "candidatos": len(candidatos),
+        "renderizados": 0,
+        "errores": 0,
+        "bytes": 0,
+    }
+    duraciones = []
+    inicio_total = time.perf_counter()
+
+    def al_terminar(user_id, last_id):
+        def callback(resultado, error):
+            try:
+                html, segundos = resultado if error is None else (None, 0.0)
+                if html is None:
+                    logger.warning("⚠️ No se pudo renderizar el dashboard", extra={"user_id": user_id, "error": str(error)})
+                    with lock:
+                        resumen["errores"] += 1
+                    return
+                cache.put(user_id, last_id, version, html)
+                with lock:
+                    resumen["renderizados"] += 1
+                    resumen["bytes"] += len(html.encode("utf-8"))
+                    duraciones.append(segundos)
+                    hechos = resumen["renderizados"] + resumen["errores"]
+                if progreso:
+                    progreso(hechos, len(candidatos))
+            finally:
+                en_vuelo.release()
+        return callback
+
+    proximo = time.monotonic()
+    try:
+        for user_id, last_id in candidatos:
+            if intervalo:
+                espera = proximo - time.monotonic()
+                if espera > 0:
+                    time.sleep(espera)
+                proximo = max(proximo, time.monotonic()) + intervalo
+            en_vuelo.acquire()
+            pool.submit(("pregeneracion", user_id), _render_medido, renderer.render_dashboard_html, db_path, user_id,
+                        on_done=al_terminar(user_id, last_id))
+        # esperar a que terminen los que quedan en vuelo
+        for _ in range(pool.max_workers * 2):
+            en_vuelo.acquire()
+    finally:
+        pool.shutdown(wait=True)
+
+    resumen["fin"] = datetime.now().isoformat(timespec="seconds")
+    resumen["segundos_total"] = round(time.perf_counter() - inicio_total, 3)
+    resumen["render_segundos"] = {
+        "promedio": round(sum(duraciones) / len(duraciones), 3) if duraciones else 0.0,
+        "p50": round(_percentil(duraciones, 50), 3),
+        "p95": round(_percentil(duraciones, 95), 3),
+        "max": round(max(duraciones, default=0.0), 3),
+    }
+    metrics.inc("pregeneracion.renderizados", resumen["renderizados"])
+    metrics.inc("pregeneracion.errores", resumen["errores"])
+    return resumen
+
+
+def formatear_resumen(resumen):
+    r = resumen["render_segundos"]
+    return (
+        f"📊 Pregeneración de dashboards ({resumen['template_version']})\n"
+        f"   Candidatos: {resumen['candidatos']}\n"
+        f"   Renderizados: {resumen['renderizados']} ({resumen['bytes'] / 1024:.0f} KB)\n"
+        f"   Errores: {resumen['errores']}\n"
+        f"   Tiempo total: {resumen['segundos_total']:.1f} s\n"
+        f"   Por dashboard: prom {r['promedio']:.2f} s · p50 {r['p50']:.2f} s · p95 {r['p95']:.2f} s · máx {r['max']:.2f} s"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pregenera los dashboards de usuarios con interacciones nuevas")
+    parser.add_argument("--db", default="data/menta.db")
+    parser.add_argument("--modo", choices=["png", "svg"], default=os.getenv("DASHBOARD_MODE", "png"))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("RENDER_WORKERS", 0)) or None)
+    parser.add_argument("--por-minuto", type=int, default=0, help="máximo de renders por minuto (0 = sin límite)")
+    parser.add_argument("--min-interacciones", type=int, default=1, help="solo usuarios con al menos N interacciones")
+    parser.add_argument("--limite", type=int, default=None, help="máximo de usuarios a renderizar")
+    parser.add_argument("--resumen", default=None, help="archivo JSON del resumen (default: data/dashboard/pregeneracion-AAAAMMDD-HHMMSS.json)")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    cache = DashboardCache(
+        args.db,
+        int(os.getenv("DASHBOARD_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    )
+
+    def mostrar(hechos, total):
+        if hechos % 50 == 0 or hechos == total:
+            print(f"   ... {hechos}/{total} dashboards", flush=True)
+
+    resumen = pregenerar(args.db, args.modo, args.workers, args.por_minuto, args.min_interacciones,
+                         args.limite, cache=cache, progreso=mostrar)
+    # con la hora en el nombre, volver a correrlo el mismo día no pisa el resumen anterior
+    destino = args.resumen or os.path.join(
+        os.path.dirname(args.db) or ".", "dashboard", f"pregeneracion-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+    with open(destino, "w", encoding="utf-8") as f:
+        json.dump(resumen, f, ensure_ascii=False, indent=2)
+    print(formatear_resumen(resumen))
+    print(f"   Resumen guardado en {destino}")
+
+
+if __name__ == "__main__":
+    main()
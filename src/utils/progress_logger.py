@@ -3,30 +3,93 @@ progress_logger.py
 ------------------
 Registra todas las interacciones de los usuarios (fecha, emoción, mensaje, recomendación)
 para generar un historial de progreso.
+
+Los registros se agregan a un log NDJSON append-only en data/logs (ver ndjson_log.py),
+así que agregar una entrada no depende del tamaño del historial.
+
+El historial del formato viejo (data/user_logs.json, un array JSON) se migra una
+sola vez al primer segmento del log cuando se crea el escritor; hasta entonces
+log_reader.iter_logs lo lee directamente.
 """
 
-import json
+import logging
 import os
+import threading
 from datetime import datetime
 
-LOG_FILE = "data/user_logs.json"
+from utils.ndjson_log import NDJSONLog, DEFAULT_MAX_BYTES, ROTATED_SUFFIX, write_segment
+
+LOG_DIR = os.getenv("LOG_DIR", "data/logs")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", DEFAULT_MAX_BYTES))
+LEGACY_FILE = "data/user_logs.json"
+
+logger = logging.getLogger(__name__)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer(log_dir=None, max_bytes=None, legacy_path=None):
+    """
+    Devuelve el escritor NDJSON compartido (se crea la primera vez). El bot pasa
+    la carpeta de su Config; sin `log_dir` se usa la del escritor ya creado o
+    LOG_DIR. Si la carpeta cambia, el escritor anterior se cierra.
+    """
+    global _writer
+    if _writer is None or (log_dir and _writer.directory != log_dir):
+        with _writer_lock:
+            if _writer is None or (log_dir and _writer.directory != log_dir):
+                if _writer is not None:
+                    _writer.close()
+                directorio = log_dir or LOG_DIR
+                migrar_legacy(directorio, legacy_path or LEGACY_FILE)
+                _writer = NDJSONLog(directorio, max_bytes=max_bytes or LOG_MAX_BYTES)
+    return _writer
+
+
+def current_log_dir():
+    """Carpeta del escritor en uso (la que configuró el bot) o LOG_DIR."""
+    return _writer.directory if _writer is not None else LOG_DIR
+
+
+def legacy_segment_path(log_dir, name="interactions"):
+    """Segmento reservado para el historial viejo: por su fecha queda antes que todos."""
+    return os.path.join(log_dir, f"{name}-00000000-0000.ndjson")
+
+
+def legacy_migrado(log_dir, name="interactions"):
+    base = legacy_segment_path(log_dir, name)
+    return os.path.exists(base) or os.path.exists(base[: -len(".ndjson")] + ROTATED_SUFFIX)
+
+
+def migrar_legacy(log_dir=LOG_DIR, legacy_path=LEGACY_FILE):
+    """
+    Migra una sola vez `legacy_path` (array JSON del formato viejo) al primer
+    segmento del log y lo renombra a .migrado. Devuelve los registros migrados.
+    """
+    if not os.path.exists(legacy_path):
+        return 0
+    # import diferido: legacy_import solo hace falta mientras quede el archivo viejo
+    from utils.legacy_import import iter_json_array
 
-def _load_logs():
-    if os.path.exists(LOG_FILE):
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return []
-    return []
+    total = 0
+    os.makedirs(log_dir, exist_ok=True)
+    if not legacy_migrado(log_dir):
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                registros = (dict(obj, user_id=str(obj.get("user_id")))
+                             for obj, _ in iter_json_array(f) if isinstance(obj, dict))
+                total = write_segment(legacy_segment_path(log_dir), registros)
+        except ValueError:
+            logger.warning("⚠️ %s no es un array JSON válido: no se migra", legacy_path)
+            return 0
+    os.replace(legacy_path, legacy_path + ".migrado")
+    logger.info("🗒️ Historial viejo migrado a %s (%d registros)", log_dir, total)
+    return total
 
-def _save_logs(logs):
-    with open(LOG_FILE, "w", encoding="utf-8") as f:
-        json.dump(logs, f, ensure_ascii=False, indent=2)
 
 def add_log(user_id, texto, sentimiento, recomendacion):
     """Agrega una nueva entrada al historial de progreso."""
-    logs = _load_logs()
     log_entry = {
         "user_id": str(user_id),
         "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -34,6 +97,5 @@ def add_log(user_id, texto, sentimiento, recomendacion):
         "sentimiento": sentimiento,
         "recomendacion": recomendacion
     }
-    logs.append(log_entry)
-    _save_logs(logs)
-    print(f"🗒️ Registro agregado → {user_id}: {sentimiento}")
+    get_writer().append(log_entry)
+    logger.debug("🗒️ Registro agregado", extra={"user_id": str(user_id), "sentimiento": sentimiento})
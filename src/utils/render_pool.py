@@ -0,0 +1,134 @@
+"""
+render_pool.py
+--------------
+Pool de procesos para trabajos pesados de CPU (render de dashboards con
+matplotlib) fuera de los hilos de polling de Telegram.
+
+- Los trabajos se deduplican por clave: si un usuario aprieta /dashboard
+  varias veces mientras su render está en curso, todo se junta en un solo
+  trabajo y todos los callbacks reciben el mismo resultado.
+- Los callbacks corren en un hilo de entrega aparte, así subir el documento
+  a Telegram no bloquea la recepción de otros resultados del pool.
+- Si un proceso hijo muere (BrokenProcessPool) el pool se descarta y el
+  próximo trabajo arranca uno nuevo.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker():
+    # Backend sin ventana en los procesos hijos (antes de importar matplotlib)
+    os.environ["MPLBACKEND"] = "Agg"
+
+
+class RenderPool:
+    def __init__(self, max_workers=None, delivery_threads=2, name="render_pool", start_method="spawn"):
+        self.name = name
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.start_method = start_method
+        self._delivery_threads = delivery_threads
+        self._executor = None
+        self._delivery = None
+        self._lock = threading.Lock()
+        # clave -> {destino: callback} esperando ese resultado
+        self._pending = {}
+
+    def _ensure_started(self):
+        if self._executor is None:
+            # spawn (default): los hijos no heredan los hilos ni el estado del bot
+            ctx = multiprocessing.get_context(self.start_method)
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=ctx, initializer=_init_worker)
+        if self._delivery is None:
+            self._delivery = ThreadPoolExecutor(self._delivery_threads, thread_name_prefix=f"{self.name}-entrega")
+
+    def _descartar_roto(self, executor):
+        # llamar con self._lock tomado; el próximo submit arma un pool nuevo
+        if executor is not None and executor is self._executor:
+            self._executor = None
+            executor.shutdown(wait=False)
+            metrics.inc(f"{self.name}.pool_roto")
+            logger.error("❌ Pool de render roto (murió un proceso), se va a recrear")
+
+    def submit(self, key, fn, *args, on_done, destino=None):
+        """
+        Encola fn(*args) en un proceso del pool. `on_done(resultado, error)` se
+        llama al terminar. Devuelve True si se creó un trabajo nuevo y False si
+        se sumó a uno que ya estaba en curso para la misma clave.
+
+        `destino` (por ejemplo el chat_id) evita entregar dos veces el mismo
+        resultado al mismo lugar cuando el trabajo se pide repetidas veces.
+
+        Si el pool no acepta el trabajo (BrokenProcessPool, pool cerrado) la
+        excepción se propaga y la clave queda libre para reintentar.
+        """
+        destino = destino if destino is not None else id(on_done)
+        with self._lock:
+            if key in self._pending:
+                self._pending[key].setdefault(destino, on_done)
+                metrics.inc(f"{self.name}.deduplicados")
+                return False
+            self._ensure_started()
+            self._pending[key] = {destino: on_done}
+            metrics.set_gauge(f"{self.name}.en_curso", len(self._pending))
+            inicio = time.perf_counter()
+            try:
+                future = self._executor.submit(fn, *args)
+            except Exception as e:
+                # sin esto la clave quedaría "en curso" para siempre
+                del self._pending[key]
+                metrics.set_gauge(f"{self.name}.en_curso", len(self._pending))
+                if isinstance(e, BrokenProcessPool):
+                    self._descartar_roto(self._executor)
+                raise
+            executor = self._executor
+        metrics.inc(f"{self.name}.trabajos")
+        future.add_done_callback(lambda f: self._finish(key, f, inicio, executor))
+        return True
+
+    def pending(self, key):
+        with self._lock:
+            return key in self._pending
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, delivery = self._executor, self._delivery
+            self._executor = self._delivery = None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        if delivery is not None:
+            delivery.shutdown(wait=wait)
+
+    def _finish(self, key, future, inicio, executor):
+        metrics.observe(f"{self.name}.segundos", time.perf_counter() - inicio)
+        error = future.exception()
+        with self._lock:
+            callbacks = list(self._pending.pop(key, {}).values())
+            metrics.set_gauge(f"{self.name}.en_curso", len(self._pending))
+            if isinstance(error, BrokenProcessPool):
+                self._descartar_roto(executor)
+            delivery = self._delivery
+        resultado = None if error else future.result()
+        if error:
+            metrics.inc(f"{self.name}.errores")
+        for callback in callbacks:
+            if delivery is not None:
+                delivery.submit(self._run_callback, callback, resultado, error)
+            else:
+                self._run_callback(callback, resultado, error)
+
+    @staticmethod
+    def _run_callback(callback, resultado, error):
+        try:
+            callback(resultado, error)
+        except Exception:
+            logger.exception("❌ Error entregando resultado del pool de render")
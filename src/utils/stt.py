@@ -0,0 +1,218 @@
+"""
+stt.py
+------
+Backends de speech-to-text intercambiables detrás de `speech_to_text`:
+
+- "groq":  Whisper remoto (whisper-large-v3-turbo) a través del GroqService
+           compartido.
+- "local": Whisper en CPU con faster-whisper (CTranslate2) cuantizado a
+           int8. No depende de la red ni de la cuota de la API; el modelo se
+           descarga y carga recién en la primera transcripción que lo use.
+
+`crear_backend("groq,local", ...)` arma una cadena con fallback: si el
+primero falla (error, timeout, API caída) se prueba el siguiente. "local"
+se omite (con un aviso en el log) si faster-whisper no está instalado. Cada backend registra stt.<nombre>.segundos y
+stt.<nombre>.errores; los pasos al siguiente se cuentan en stt.fallback.
+
+`TranscriptorEnPartes` transcribe en paralelo las partes de un audio largo
+(ver utils/audio_tools.partir_en_pausas) y une el texto en orden.
+
+    pip install faster-whisper   # solo si se usa el backend "local"
+"""
+
+import functools
+import importlib.util
+import io
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import metrics
+from utils.media import DEFAULT_SPILL_BYTES, buffer_media
+
+logger = logging.getLogger(__name__)
+
+IDIOMA = "es"
+PROMPT = "Usuario hablando sobre alimentación o emociones"
+MODELO_GROQ = "whisper-large-v3-turbo"
+MODELO_LOCAL = "small"
+
+
+class GroqSTT:
+    name = "groq"
+
+    def __init__(self, service, model=MODELO_GROQ, language=IDIOMA, prompt=PROMPT, spill_bytes=DEFAULT_SPILL_BYTES):
+        self.service = service
+        self.model = model
+        self.language = language
+        self.prompt = prompt
+        self.spill_bytes = spill_bytes
+
+    def transcribe(self, audio_bytes):
+        # los bytes descargados se suben tal cual, sin pasar por disco
+        with buffer_media(audio_bytes, self.spill_bytes) as audio_file:
+            transcription = self.service.transcribe(
+                model=self.model,
+                file=("audio.ogg", audio_file),
+                language=self.language,
+                prompt=self.prompt,
+                response_format="json",
+            )
+        return transcription.text
+
+
+class LocalWhisperSTT:
+    name = "local"
+
+    def __init__(self, model_size=MODELO_LOCAL, compute_type="int8", cpu_threads=0, language=IDIOMA, prompt=PROMPT):
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.language = language
+        self.prompt = prompt
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from faster_whisper import WhisperModel
+
+                    inicio = time.perf_counter()
+                    self._model = WhisperModel(self.model_size, device="cpu", compute_type=self.compute_type,
+                                               cpu_threads=self.cpu_threads)
+                    metrics.observe("stt.local.carga_segundos", time.perf_counter() - inicio)
+                    logger.info("✅ Whisper local cargado (%s, %s)", self.model_size, self.compute_type)
+        return self._model
+
+    def transcribe(self, audio_bytes):
+        # beam_size=1 (greedy): en CPU es bastante más rápido y para notas de voz cortas pierde poco
+        segmentos, _ = self.model.transcribe(io.BytesIO(audio_bytes), language=self.language,
+                                             initial_prompt=self.prompt, beam_size=1)
+        return " ".join(s.text.strip() for s in segmentos).strip()
+
+
+class FallbackSTT:
+    """Prueba los backends en orden y devuelve el primer resultado."""
+
+    def __init__(self, backends):
+        self.backends = list(backends)
+        self.name = ",".join(b.name for b in self.backends)
+
+    def transcribe(self, audio_bytes):
+        ultimo_error = None
+        for i, backend in enumerate(self.backends):
+            if i > 0:
+                metrics.inc("stt.fallback")
+                logger.warning("⚠️ STT %s falló (%s), probando %s", self.backends[i - 1].name, ultimo_error, backend.name)
+            inicio = time.perf_counter()
+            try:
+                texto = backend.transcribe(audio_bytes)
+                metrics.observe(f"stt.{backend.name}.segundos", time.perf_counter() - inicio)
+                return texto
+            except Exception as e:
+                metrics.observe(f"stt.{backend.name}.segundos", time.perf_counter() - inicio)
+                metrics.inc(f"stt.{backend.name}.errores")
+                ultimo_error = e
+        raise RuntimeError(f"ningún backend de STT disponible: {ultimo_error}") from ultimo_error
+
+
+class TranscriptorEnPartes:
+    """
+    Transcribe las partes de un audio con un pool de hilos compartido y une
+    el texto en el orden original. Cada usuario tiene como máximo
+    `max_por_usuario` partes en vuelo: el hilo del handler espera antes de
+    encolar la siguiente, así un audio de 10 minutos no acapara el pool ni
+    la cuota de la API.
+    """
+
+    def __init__(self, backend, max_workers=4, max_por_usuario=2):
+        self.backend = backend
+        self.max_por_usuario = max_por_usuario
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stt")
+        # un semáforo por usuario con audios en curso; desaparece cuando nadie lo usa
+        self._semaforos = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def _semaforo(self, user_id):
+        with self._lock:
+            sem = self._semaforos.get(user_id)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.max_por_usuario)
+                self._semaforos[user_id] = sem
+            return sem
+
+    def transcribe(self, partes, user_id=None, on_parcial=None):
+        """
+        Texto completo de `partes`. Si se pasa `on_parcial(texto, hechas, total)`
+        se la llama cada vez que se completa una parte más del principio del
+        audio (el texto parcial siempre está en orden).
+        """
+        if len(partes) == 1:
+            return self.backend.transcribe(partes[0])
+        metrics.inc("stt.audios_en_partes")
+        metrics.inc("stt.partes", len(partes))
+        sem = self._semaforo(user_id)
+        futuros, textos = [], []
+
+        def juntar(esperar):
+            # agrega en orden los resultados del principio del audio; con esperar=False
+            # solo los que ya terminaron
+            hechas = len(textos)
+            while len(textos) < len(futuros) and (esperar or futuros[len(textos)].done()):
+                textos.append(futuros[len(textos)].result().strip())
+                if esperar:
+                    break
+            if on_parcial and hechas < len(textos) < len(partes):
+                on_parcial(" ".join(t for t in textos if t), len(textos), len(partes))
+
+        for parte in partes:
+            sem.acquire()
+            try:
+                futuro = self._pool.submit(self.backend.transcribe, parte)
+            except Exception:
+                sem.release()
+                raise
+            futuro.add_done_callback(lambda _: sem.release())
+            futuros.append(futuro)
+            juntar(esperar=False)
+        while len(textos) < len(futuros):
+            juntar(esperar=True)
+        return " ".join(t for t in textos if t)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+
+@functools.lru_cache(maxsize=None)
+def faster_whisper_disponible():
+    """True si faster-whisper se puede importar; si no, lo avisa una sola vez."""
+    # find_spec no importa el paquete: el modelo y CTranslate2 se cargan recién al transcribir
+    if importlib.util.find_spec("faster_whisper") is not None:
+        return True
+    logger.warning("⚠️ faster-whisper no está instalado: se omite el backend de STT local "
+                   "(pip install faster-whisper para usarlo)")
+    return False
+
+
+def crear_backend(nombres, groq_service=None, local_model=MODELO_LOCAL, local_threads=0, spill_bytes=DEFAULT_SPILL_BYTES):
+    """
+    Cadena de backends a partir de `nombres` ("groq,local", "local"...).
+    "groq" se omite si no hay servicio (sin API key) y "local" si
+    faster-whisper no está instalado. Devuelve None si no queda ninguno.
+    """
+    backends = []
+    for nombre in (n.strip().lower() for n in nombres.split(",")):
+        if nombre == "groq":
+            if groq_service is not None:
+                backends.append(GroqSTT(groq_service, spill_bytes=spill_bytes))
+        elif nombre == "local":
+            if faster_whisper_disponible():
+                backends.append(LocalWhisperSTT(local_model, cpu_threads=local_threads))
+        elif nombre:
+            logger.warning("⚠️ Backend de STT desconocido: %s", nombre)
+    return FallbackSTT(backends) if backends else None
@@ -0,0 +1,116 @@
+"""
+transcript_cache.py
+-------------------
+Caché persistente de transcripciones de notas de voz, en la misma base
+SQLite del bot.
+
+Cada transcripción se guarda bajo una o más claves:
+- "tg:<file_unique_id>": el id estable de Telegram para ese archivo. Un audio
+  reenviado (o re-enviado después de un error) tiene el mismo id, así que el
+  acierto evita tanto la descarga como la llamada a Whisper.
+- "sha256:<hash>": hash del contenido, para el mismo audio llegado por otra
+  vía (otro file_unique_id, un archivo subido de nuevo).
+
+El tamaño está acotado por cantidad de claves y bytes de texto; se desaloja
+por LRU.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+
+from utils import metrics
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 20000
+
+
+def clave_telegram(file_unique_id):
+    return f"tg:{file_unique_id}"
+
+
+def clave_contenido(data):
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+class TranscriptCache:
+    def __init__(self, db_path, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._schema_ok = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        if not self._schema_ok:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS transcript_cache (
+                key TEXT PRIMARY KEY,
+                text TEXT,
+                size INTEGER,
+                created REAL,
+                last_used REAL
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_transcript_cache_last_used ON transcript_cache(last_used)")
+            conn.commit()
+            self._schema_ok = True
+        return conn
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def get(self, key):
+        """Transcripción guardada bajo `key`, o None."""
+        conn = self._connect()
+        row = conn.execute("SELECT text FROM transcript_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            conn.close()
+            return None
+        conn.execute("UPDATE transcript_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        conn.commit()
+        conn.close()
+        metrics.inc(f"transcript_cache.hits_{key.split(':', 1)[0]}")
+        return row[0]
+
+    def put(self, keys, text):
+        """Guarda `text` bajo todas las `keys` y aplica los límites."""
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO transcript_cache (key, text, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                [(key, text, size, now, now) for key in keys],
+            )
+            self._evict(conn)
+            conn.commit()
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        entradas, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcript_cache").fetchone()
+        conn.close()
+        return {"entradas": entradas, "bytes": total, "max_bytes": self.max_bytes, "max_entries": self.max_entries}
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+    def _evict(self, conn):
+        entradas, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcript_cache").fetchone()
+        desalojados = 0
+        if entradas > self.max_entries or total > self.max_bytes:
+            # de la menos usada a la más usada hasta entrar en el límite
+            for key, size in conn.execute("SELECT key, size FROM transcript_cache ORDER BY last_used").fetchall():
+                if entradas <= self.max_entries and total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM transcript_cache WHERE key = ?", (key,))
+                entradas -= 1
+                total -= size or 0
+                desalojados += 1
+        if desalojados:
+            metrics.inc("transcript_cache.evictions", desalojados)
+        metrics.set_gauge("transcript_cache.entradas", entradas)
+        metrics.set_gauge("transcript_cache.bytes", total)
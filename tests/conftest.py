@@ -0,0 +1,14 @@
+"""
+Configuración común de los tests: los módulos del bot se importan como desde
+src/ (`from utils import ...`, `from analysis import ...`).
+
+Uso (desde la raíz del proyecto):
+    python -m pytest -q
+"""
+
+import os
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
@@ -0,0 +1,59 @@
+"""Tests de la tabla de admisión (utils/admision.py)."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from utils.admision import (
+    ACEPTAR, EN_PARTES, RAPIDA, RECHAZAR, Admision, metadatos_foto, metadatos_voz, politica_foto, politica_voz,
+)
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def admision():
+    return Admision({
+        "voice": politica_voz(max_bytes=20 * MB, max_segundos=600, corte_rapido=45),
+        "photo": politica_foto(max_bytes=10 * MB, max_pixeles=1_000_000),
+    })
+
+
+@pytest.mark.parametrize("metadatos, esperado", [
+    ({"duration": 10, "file_size": 50_000}, (RAPIDA, "duration")),
+    ({"duration": 45, "file_size": 50_000}, (RAPIDA, "duration")),
+    ({"duration": 46, "file_size": 50_000}, (EN_PARTES, None)),
+    ({"duration": 601, "file_size": 50_000}, (RECHAZAR, "duration")),
+    ({"duration": 10, "file_size": 21 * MB}, (RECHAZAR, "file_size")),
+])
+def test_voz(admision, metadatos, esperado):
+    assert admision.decidir("voice", metadatos) == esperado
+
+
+def test_gana_la_primera_regla_que_se_cumple(admision):
+    # muy grande y muy largo: decide el tamaño, que está primero en la tabla
+    assert admision.decidir("voice", {"duration": 900, "file_size": 30 * MB}) == (RECHAZAR, "file_size")
+
+
+def test_metadato_faltante_saltea_la_regla(admision):
+    assert admision.decidir("voice", {"duration": 10, "file_size": None}) == (RAPIDA, "duration")
+    # sin duración tampoco se puede elegir la vía rápida: cae en el default
+    assert admision.decidir("voice", {"duration": None, "file_size": None}) == (EN_PARTES, None)
+
+
+def test_foto(admision):
+    assert admision.decidir("photo", {"file_size": 200_000, "pixeles": 800 * 600}) == (ACEPTAR, None)
+    assert admision.decidir("photo", {"file_size": 11 * MB, "pixeles": 800 * 600}) == (RECHAZAR, "file_size")
+    assert admision.decidir("photo", {"file_size": None, "pixeles": 2000 * 1000}) == (RECHAZAR, "pixeles")
+
+
+def test_tabla_sin_default_acepta():
+    admision = Admision({"voice": [("duration", ">", 60, RECHAZAR)]})
+    assert admision.decidir("voice", {"duration": 30}) == (ACEPTAR, None)
+
+
+def test_metadatos_de_telegram(admision):
+    voice = SimpleNamespace(duration=120)  # sin file_size
+    assert metadatos_voz(voice) == {"duration": 120, "file_size": None}
+    foto = SimpleNamespace(width=1280, height=960, file_size=150_000)
+    assert admision.decidir("photo", metadatos_foto(foto)) == (RECHAZAR, "pixeles")
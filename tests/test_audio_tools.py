@@ -0,0 +1,93 @@
+"""Tests de partir_en_pausas (utils/audio_tools.py) con PCM sintético."""
+
+import numpy as np
+import pytest
+
+from utils.audio_tools import SAMPLE_RATE, TRAMA_MS, partir_en_pausas
+
+RATE = SAMPLE_RATE
+
+
+def voz(segundos, frecuencia=220.0):
+    t = np.arange(int(segundos * RATE)) / RATE
+    return (0.5 * np.sin(2 * np.pi * frecuencia * t)).astype(np.float32)
+
+
+def pausa(segundos, semilla=0):
+    # ruido de fondo a ~-60 dBFS: claramente debajo del umbral de voz
+    ruido = np.random.default_rng(semilla).normal(0, 1e-3, int(segundos * RATE))
+    return ruido.astype(np.float32)
+
+
+def armar(*tramos):
+    """Concatena tramos ("v", seg) / ("p", seg) y devuelve (pcm, [(inicio, fin) de cada pausa en s])."""
+    partes, pausas, t = [], [], 0.0
+    for i, (tipo, seg) in enumerate(tramos):
+        if tipo == "p":
+            partes.append(pausa(seg, i))
+            pausas.append((t, t + seg))
+        else:
+            partes.append(voz(seg))
+        t += seg
+    return np.concatenate(partes), pausas
+
+
+def segundos(muestras):
+    return muestras / RATE
+
+
+def test_audio_corto_queda_entero():
+    pcm, _ = armar(("v", 3), ("p", 1), ("v", 3))
+    resultado = partir_en_pausas(pcm, max_segundos=10)
+    assert len(resultado) == 1
+    assert resultado[0] is pcm
+
+
+def test_corta_en_la_pausa_mas_larga_de_la_segunda_mitad():
+    pcm, pausas = armar(
+        ("v", 4.0), ("p", 0.4),   # primera mitad de la ventana: no se usa
+        ("v", 1.5), ("p", 0.35),  # segunda mitad, corta
+        ("v", 1.15), ("p", 1.0),  # segunda mitad, la más larga
+        ("v", 3.0), ("p", 0.4), ("v", 6.0),
+    )
+    resultado = partir_en_pausas(pcm, max_segundos=10)
+    assert len(resultado) == 2
+    corte = segundos(len(resultado[0]))
+    inicio, fin = pausas[2]
+    assert inicio < corte < fin
+
+
+def test_partes_respetan_el_maximo_y_conservan_el_audio():
+    pcm, pausas = armar(*([("v", 3.0), ("p", 0.5)] * 10))
+    resultado = partir_en_pausas(pcm, max_segundos=8)
+    assert len(resultado) > 1
+    assert all(segundos(len(p)) <= 8 for p in resultado)
+    np.testing.assert_array_equal(np.concatenate(resultado), pcm)
+    # todos los cortes caen dentro de alguna pausa
+    posicion = 0
+    for parte in resultado[:-1]:
+        posicion += len(parte)
+        assert any(inicio <= segundos(posicion) <= fin for inicio, fin in pausas)
+
+
+def test_pausas_cortas_no_sirven_para_cortar():
+    pcm, _ = armar(*([("v", 2.0), ("p", 0.15)] * 8))
+    resultado = partir_en_pausas(pcm, max_segundos=6, pausa_min_ms=300)
+    largo_trama = RATE * TRAMA_MS // 1000
+    max_tramas = int(6 * 1000 // TRAMA_MS)
+    # sin pausas válidas se corta justo en el límite de la ventana
+    assert [len(p) for p in resultado[:-1]] == [max_tramas * largo_trama] * (len(resultado) - 1)
+
+
+def test_sin_pausas_corta_en_el_limite():
+    pcm = voz(25)
+    resultado = partir_en_pausas(pcm, max_segundos=10)
+    largo_trama = RATE * TRAMA_MS // 1000
+    assert [len(p) for p in resultado[:-1]] == [333 * largo_trama] * 2
+    assert sum(len(p) for p in resultado) == len(pcm)
+
+
+@pytest.mark.parametrize("max_segundos", [5, 12.5])
+def test_ninguna_parte_supera_el_maximo(max_segundos):
+    pcm, _ = armar(("v", 7), ("p", 0.6), ("v", 2), ("p", 0.3), ("v", 9), ("p", 1.2), ("v", 4))
+    assert all(segundos(len(p)) <= max_segundos for p in partir_en_pausas(pcm, max_segundos))
@@ -0,0 +1,60 @@
+"""Tests del importador del historial viejo (utils/legacy_import.py)."""
+
+import json
+import sqlite3
+
+from utils.legacy_import import importar
+from utils.progress_logger import legacy_segment_path, migrar_legacy
+
+REGISTROS = [
+    {"user_id": 1, "fecha": "2024-01-01 10:00:00", "mensaje": "[VOZ] estoy cansado", "sentimiento": "NEG",
+     "recomendacion": ["dormí más", "tomá agua"]},
+    {"user_id": "2", "fecha": "2024-01-02 11:00:00", "mensaje": "hola", "sentimiento": "POS",
+     "respuesta": "🌱 *Hola*..."},
+    {"user_id": "2", "fecha": "2024-01-03 12:00:00", "mensaje": "[FOTO] milanesa", "sentimiento": "NEU"},
+]
+
+
+def filas(db):
+    conn = sqlite3.connect(db)
+    resultado = conn.execute("SELECT user_id, type, recomendacion FROM interactions ORDER BY timestamp").fetchall()
+    conn.close()
+    return resultado
+
+
+def test_importa_el_array_viejo(tmp_path):
+    legacy = tmp_path / "user_logs.json"
+    legacy.write_text(json.dumps(REGISTROS), encoding="utf-8")
+    db = str(tmp_path / "menta.db")
+    reporte = importar(str(legacy), db)
+    assert reporte["insertados"] == 3
+    assert filas(db) == [("1", "audio", "dormí más"), ("2", "text", None), ("2", "photo", None)]
+
+
+def test_el_historial_migrado_genera_las_mismas_claves(tmp_path):
+    legacy = tmp_path / "user_logs.json"
+    legacy.write_text(json.dumps(REGISTROS), encoding="utf-8")
+    db = str(tmp_path / "menta.db")
+    log_dir = str(tmp_path / "logs")
+    assert importar(str(legacy), db)["insertados"] == 3
+
+    # el bot arrancó: el archivo pasó a un segmento NDJSON y quedó como .migrado
+    assert migrar_legacy(log_dir, str(legacy)) == 3
+    segmento = legacy_segment_path(log_dir) + ".gz"
+    for path in (segmento, str(legacy) + ".migrado"):
+        reporte = importar(path, db)
+        assert (reporte["leidos"], reporte["insertados"], reporte["duplicados"]) == (3, 0, 3)
+    assert len(filas(db)) == 3
+
+
+def test_importa_directo_desde_el_segmento(tmp_path):
+    legacy = tmp_path / "user_logs.json"
+    legacy.write_text(json.dumps(REGISTROS), encoding="utf-8")
+    log_dir = str(tmp_path / "logs")
+    migrar_legacy(log_dir, str(legacy))
+    db = str(tmp_path / "menta.db")
+    reporte = importar(legacy_segment_path(log_dir) + ".gz", db)
+    assert reporte["insertados"] == 3
+    assert filas(db)[0] == ("1", "audio", "dormí más")
+    # ya terminado: no se vuelve a recorrer
+    assert importar(legacy_segment_path(log_dir) + ".gz", db).get("ya_importado")
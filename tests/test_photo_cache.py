@@ -0,0 +1,116 @@
+"""Tests del BK-tree y la caché de análisis de fotos (utils/photo_cache.py)."""
+
+import io
+import random
+import sqlite3
+
+import pytest
+
+from utils import photo_cache
+from utils.photo_cache import BKTree, PhotoCache, dhash, hamming
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    """time.time() de photo_cache que avanza un segundo por llamada (LRU determinístico)."""
+    ahora = [1000.0]
+
+    def time_falso():
+        ahora[0] += 1
+        return ahora[0]
+
+    monkeypatch.setattr(photo_cache.time, "time", time_falso)
+    return ahora
+
+
+def cerca(h, bits, semilla=0):
+    """`h` con `bits` bits distintos."""
+    for pos in random.Random(semilla).sample(range(64), bits):
+        h ^= 1 << pos
+    return h
+
+
+def test_bktree_encuentra_lo_mismo_que_fuerza_bruta():
+    rnd = random.Random(1)
+    hashes = [rnd.getrandbits(64) for _ in range(300)]
+    hashes += [cerca(h, rnd.randint(1, 6), i) for i, h in enumerate(hashes[:100])]
+    arbol = BKTree()
+    for i, h in enumerate(hashes):
+        arbol.agregar(h, i)
+    assert arbol.tamano == len(hashes)
+
+    for consulta in hashes[:50] + [rnd.getrandbits(64) for _ in range(20)]:
+        for radio in (0, 3, 8):
+            esperados = {(hamming(consulta, h), h, i) for i, h in enumerate(hashes) if hamming(consulta, h) <= radio}
+            encontrados = arbol.buscar(consulta, radio)
+            assert set(encontrados) == esperados
+            distancias = [d for d, _, _ in encontrados]
+            assert distancias == sorted(distancias)
+
+
+def test_bktree_vacio():
+    assert BKTree().buscar(0, 10) == []
+
+
+def test_get_por_similitud(tmp_path):
+    cache = PhotoCache(str(tmp_path / "menta.db"), umbral=5)
+    base = 0x0123456789ABCDEF
+    cache.put(base, {"alimentos": ["tarta"]})
+    assert cache.get(base) == {"alimentos": ["tarta"]}
+    assert cache.get(cerca(base, 4)) == {"alimentos": ["tarta"]}
+    assert cache.get(cerca(base, 12)) is None
+
+
+def test_desaloja_por_lru_y_reconstruye(tmp_path, reloj):
+    cache = PhotoCache(str(tmp_path / "menta.db"), max_entries=10, umbral=0)
+    hashes = [random.Random(i).getrandbits(64) for i in range(11)]
+    for i, h in enumerate(hashes[:10]):
+        cache.put(h, {"n": i})
+    # las dos primeras se usan de nuevo: pasan a ser las más recientes
+    assert cache.get(hashes[0]) == {"n": 0}
+    assert cache.get(hashes[1]) == {"n": 1}
+
+    cache.put(hashes[10], {"n": 10})  # supera max_entries: queda el 90%, se van las menos usadas
+    assert cache._arbol.tamano == 9
+    presentes = [i for i, h in enumerate(hashes) if cache.get(h) is not None]
+    assert presentes == [0, 1, 4, 5, 6, 7, 8, 9, 10]
+
+
+def test_reemplazo_no_duplica_nodos(tmp_path):
+    cache = PhotoCache(str(tmp_path / "menta.db"))
+    cache.put(42, {"v": 1})
+    cache.put(42, {"v": 2})
+    assert cache._arbol.tamano == 1
+    assert cache.get(42) == {"v": 2}
+
+
+def test_el_arbol_se_arma_desde_la_base(tmp_path):
+    db = str(tmp_path / "menta.db")
+    PhotoCache(db).put(0xFFFF, {"alimentos": ["empanada"]})
+    nueva = PhotoCache(db)
+    assert nueva._arbol.tamano == 1
+    assert nueva.get(0xFFFE) == {"alimentos": ["empanada"]}
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT hash FROM photo_cache").fetchall() == [(format(0xFFFF, "016x"),)]
+    conn.close()
+
+
+def test_dhash_tolera_recompresion():
+    Image = pytest.importorskip("PIL.Image")
+    from PIL import ImageDraw
+
+    # "plato" sintético: fondo en degradé con un par de formas
+    img = Image.linear_gradient("L").resize((320, 240)).convert("RGB")
+    dibujo = ImageDraw.Draw(img)
+    dibujo.ellipse((40, 30, 200, 190), fill=(230, 200, 120))
+    dibujo.ellipse((150, 90, 290, 220), fill=(60, 140, 60))
+
+    def jpeg(imagen, calidad):
+        salida = io.BytesIO()
+        imagen.save(salida, format="JPEG", quality=calidad)
+        return salida.getvalue()
+
+    original = dhash(jpeg(img, 95))
+    assert hamming(original, dhash(jpeg(img, 40))) <= 5
+    assert hamming(original, dhash(jpeg(img.resize((160, 120)), 80))) <= 5
+    assert hamming(original, dhash(jpeg(img.transpose(Image.FLIP_LEFT_RIGHT), 95))) > 5
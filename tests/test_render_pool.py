@@ -0,0 +1,124 @@
+"""Tests de la deduplicación y la recuperación de errores de RenderPool (utils/render_pool.py)."""
+
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from utils.render_pool import RenderPool
+
+
+class ExecutorFalso:
+    """Devuelve futuros que el test resuelve a mano."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.trabajos = []
+        self.cerrado = False
+
+    def submit(self, fn, *args):
+        if self.error is not None:
+            raise self.error
+        futuro = Future()
+        self.trabajos.append((fn, args, futuro))
+        return futuro
+
+    def shutdown(self, wait=True):
+        self.cerrado = True
+
+
+class Entregas:
+    """Callbacks on_done que anotan lo recibido y avisan cuando llegan todos."""
+
+    def __init__(self, esperadas):
+        self.recibidas = []
+        self._faltan = esperadas
+        self._lock = threading.Lock()
+        self.listo = threading.Event()
+
+    def callback(self, nombre):
+        def on_done(resultado, error):
+            with self._lock:
+                self.recibidas.append((nombre, resultado, error))
+                self._faltan -= 1
+                if self._faltan == 0:
+                    self.listo.set()
+        return on_done
+
+
+@pytest.fixture
+def pool():
+    pool = RenderPool(max_workers=1)
+    pool._executor = ExecutorFalso()
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def test_pedidos_repetidos_se_juntan_en_un_trabajo(pool):
+    entregas = Entregas(2)
+    assert pool.submit("u1", len, "abc", on_done=entregas.callback("a"), destino=1) is True
+    assert pool.submit("u1", len, "abc", on_done=entregas.callback("b"), destino=2) is False
+    assert pool.pending("u1")
+    assert len(pool._executor.trabajos) == 1
+
+    pool._executor.trabajos[0][2].set_result("<html>")
+    assert entregas.listo.wait(5)
+    assert sorted(entregas.recibidas) == [("a", "<html>", None), ("b", "<html>", None)]
+    assert not pool.pending("u1")
+
+
+def test_mismo_destino_recibe_una_sola_vez(pool):
+    entregas = Entregas(1)
+    pool.submit("u1", len, "x", on_done=entregas.callback("primero"), destino=99)
+    pool.submit("u1", len, "x", on_done=entregas.callback("segundo"), destino=99)
+    pool._executor.trabajos[0][2].set_result(1)
+    assert entregas.listo.wait(5)
+    assert entregas.recibidas == [("primero", 1, None)]
+
+
+def test_claves_distintas_son_trabajos_distintos(pool):
+    pool.submit("u1", len, "x", on_done=lambda r, e: None)
+    pool.submit("u2", len, "x", on_done=lambda r, e: None)
+    assert len(pool._executor.trabajos) == 2
+
+
+def test_error_del_trabajo_llega_a_todos(pool):
+    entregas = Entregas(2)
+    pool.submit("u1", len, "x", on_done=entregas.callback("a"), destino=1)
+    pool.submit("u1", len, "x", on_done=entregas.callback("b"), destino=2)
+    error = ValueError("sin datos")
+    pool._executor.trabajos[0][2].set_exception(error)
+    assert entregas.listo.wait(5)
+    assert {(nombre, err) for nombre, _, err in entregas.recibidas} == {("a", error), ("b", error)}
+
+
+def test_submit_fallido_libera_la_clave(pool):
+    roto = ExecutorFalso(error=BrokenProcessPool("murió un worker"))
+    pool._executor = roto
+    with pytest.raises(BrokenProcessPool):
+        pool.submit("u1", len, "x", on_done=lambda r, e: None)
+    assert not pool.pending("u1")
+    # el pool roto se descarta para que el próximo pedido arme uno nuevo
+    assert pool._executor is None and roto.cerrado
+
+    pool._executor = ExecutorFalso()
+    assert pool.submit("u1", len, "x", on_done=lambda r, e: None) is True
+
+
+def test_submit_con_pool_cerrado_libera_la_clave(pool):
+    pool._executor = ExecutorFalso(error=RuntimeError("cannot schedule new futures after shutdown"))
+    with pytest.raises(RuntimeError):
+        pool.submit("u1", len, "x", on_done=lambda r, e: None)
+    assert not pool.pending("u1")
+
+
+def test_pool_real_con_procesos():
+    pool = RenderPool(max_workers=1)
+    entregas = Entregas(1)
+    try:
+        pool.submit(("pow", 2, 10), pow, 2, 10, on_done=entregas.callback("real"))
+        assert entregas.listo.wait(60)
+    finally:
+        pool.shutdown(wait=True)
+    assert entregas.recibidas == [("real", 1024, None)]
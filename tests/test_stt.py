@@ -0,0 +1,185 @@
+"""Tests de utils/stt.py: TranscriptorEnPartes con backends falsos y crear_backend."""
+
+import gc
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from utils import stt
+from utils.audio_tools import SAMPLE_RATE, TRAMA_MS, partir_en_pausas
+from utils.stt import TranscriptorEnPartes, crear_backend
+
+
+class BackendFalso:
+    """Devuelve el texto de cada parte; las primeras tardan más (terminan desordenadas)."""
+
+    name = "falso"
+
+    def __init__(self, demora=0.02, falla_en=None):
+        self.demora = demora
+        self.falla_en = falla_en
+        self.en_vuelo = 0
+        self.max_en_vuelo = 0
+        self._lock = threading.Lock()
+
+    def transcribe(self, parte):
+        texto, orden = parte
+        with self._lock:
+            self.en_vuelo += 1
+            self.max_en_vuelo = max(self.max_en_vuelo, self.en_vuelo)
+        try:
+            time.sleep(self.demora * (5 - orden % 5))
+            if orden == self.falla_en:
+                raise RuntimeError(f"falló la parte {orden}")
+            return f" {texto} "
+        finally:
+            with self._lock:
+                self.en_vuelo -= 1
+
+
+def partes(n):
+    return [(f"p{i}", i) for i in range(n)]
+
+
+@pytest.fixture
+def transcriptor():
+    creados = []
+
+    def crear(backend, **kwargs):
+        t = TranscriptorEnPartes(backend, **kwargs)
+        creados.append(t)
+        return t
+
+    yield crear
+    for t in creados:
+        t.shutdown()
+
+
+def test_une_las_partes_en_orden(transcriptor):
+    t = transcriptor(BackendFalso(), max_workers=4, max_por_usuario=4)
+    assert t.transcribe(partes(7), user_id=1) == " ".join(f"p{i}" for i in range(7))
+
+
+def test_una_sola_parte_va_directo_al_backend(transcriptor):
+    t = transcriptor(BackendFalso())
+    assert t.transcribe([("sola", 0)]) == " sola "
+
+
+def test_on_parcial_recibe_prefijos_en_orden(transcriptor):
+    llamadas = []
+    t = transcriptor(BackendFalso(), max_workers=4, max_por_usuario=3)
+    total = 6
+    final = t.transcribe(partes(total), user_id=1, on_parcial=lambda *a: llamadas.append(a))
+
+    assert llamadas, "con varias partes tiene que avisar el avance"
+    hechas_previas = 0
+    for texto, hechas, total_informado in llamadas:
+        assert total_informado == total
+        # siempre avanza, nunca informa el final (eso es el valor de retorno)
+        assert hechas_previas < hechas < total
+        assert texto == " ".join(f"p{i}" for i in range(hechas))
+        hechas_previas = hechas
+    assert final == " ".join(f"p{i}" for i in range(total))
+
+
+def test_limite_de_partes_en_vuelo_por_usuario(transcriptor):
+    backend = BackendFalso()
+    t = transcriptor(backend, max_workers=8, max_por_usuario=2)
+    t.transcribe(partes(8), user_id=1)
+    assert backend.max_en_vuelo <= 2
+
+
+def test_usuarios_distintos_no_comparten_semaforo(transcriptor):
+    backend = BackendFalso(demora=0.03)
+    t = transcriptor(backend, max_workers=8, max_por_usuario=1)
+    hilos = [threading.Thread(target=t.transcribe, args=(partes(4),), kwargs={"user_id": u}) for u in (1, 2, 3)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert 1 < backend.max_en_vuelo <= 3
+
+
+def test_semaforo_se_libera_al_terminar(transcriptor):
+    t = transcriptor(BackendFalso(), max_workers=2, max_por_usuario=2)
+    t.transcribe(partes(3), user_id="u")
+    gc.collect()
+    assert "u" not in t._semaforos
+    assert len(t._semaforos) == 0
+
+
+def test_error_en_una_parte_se_propaga(transcriptor):
+    t = transcriptor(BackendFalso(falla_en=2), max_workers=4, max_por_usuario=2)
+    with pytest.raises(RuntimeError, match="parte 2"):
+        t.transcribe(partes(5), user_id=1)
+    # los permisos del usuario se devolvieron: el próximo audio no queda trabado
+    t.backend.falla_en = None
+    assert t.transcribe(partes(3), user_id=1) == "p0 p1 p2"
+
+
+@pytest.fixture
+def sin_faster_whisper(monkeypatch):
+    monkeypatch.setattr(stt.importlib.util, "find_spec", lambda nombre: None)
+    stt.faster_whisper_disponible.cache_clear()
+    yield
+    stt.faster_whisper_disponible.cache_clear()
+
+
+def test_sin_faster_whisper_se_omite_local(sin_faster_whisper, caplog):
+    with caplog.at_level("WARNING", logger="utils.stt"):
+        cadena = crear_backend("groq,local", groq_service=object())
+        assert crear_backend("local") is None
+    assert cadena.name == "groq"
+    # el aviso sale una sola vez aunque se armen varias cadenas
+    assert sum("faster-whisper" in r.getMessage() for r in caplog.records) == 1
+
+
+# ---------------------------------------------------------------------------
+# Partir en pausas no cambia el texto
+# ---------------------------------------------------------------------------
+
+PALABRAS = {200: "hoy", 300: "comí", 400: "tarde", 500: "y", 600: "con", 700: "mucha", 800: "ansiedad"}
+
+
+class WhisperFalso:
+    """"Transcribe" PCM: cada tramo con sonido es una palabra, según la frecuencia del tono."""
+
+    name = "falso"
+
+    def transcribe(self, pcm):
+        from utils.audio_tools import energia_tramas
+
+        largo = SAMPLE_RATE * TRAMA_MS // 1000
+        con_voz = np.append(energia_tramas(pcm) > -30, False)
+        palabras, inicio = [], None
+        for i, hay_voz in enumerate(con_voz):
+            if hay_voz and inicio is None:
+                inicio = i
+            elif not hay_voz and inicio is not None:
+                tramo = pcm[inicio * largo: i * largo]
+                cruces = np.count_nonzero(np.diff(np.signbit(tramo)))
+                frecuencia = cruces * SAMPLE_RATE / (2 * len(tramo))
+                palabras.append(PALABRAS[min(PALABRAS, key=lambda f: abs(f - frecuencia))])
+                inicio = None
+        return " ".join(palabras)
+
+
+def test_en_partes_da_el_mismo_texto_que_de_una_vez(transcriptor):
+    rng = np.random.default_rng(7)
+    tramos = []
+    for i in range(30):
+        frecuencia = list(PALABRAS)[i % len(PALABRAS)]
+        t = np.arange(int(rng.uniform(0.6, 2.0) * SAMPLE_RATE)) / SAMPLE_RATE
+        tramos.append((0.5 * np.sin(2 * np.pi * frecuencia * t)).astype(np.float32))
+        tramos.append(rng.normal(0, 1e-3, int(rng.uniform(0.35, 1.0) * SAMPLE_RATE)).astype(np.float32))
+    pcm = np.concatenate(tramos)
+    backend = WhisperFalso()
+
+    partes_pcm = partir_en_pausas(pcm, max_segundos=8)
+    assert len(partes_pcm) > 3
+    de_una_vez = backend.transcribe(pcm)
+    assert len(de_una_vez.split()) == 30
+    t = transcriptor(backend, max_workers=4, max_por_usuario=2)
+    assert t.transcribe(partes_pcm, user_id=1) == de_una_vez
@@ -0,0 +1,62 @@
+"""Tests del desalojo LRU de la caché de transcripciones (utils/transcript_cache.py)."""
+
+import pytest
+
+from utils import transcript_cache
+from utils.transcript_cache import TranscriptCache, clave_contenido, clave_telegram
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    """time.time() de transcript_cache que avanza un segundo por llamada (LRU determinístico)."""
+    ahora = [1000.0]
+
+    def time_falso():
+        ahora[0] += 1
+        return ahora[0]
+
+    monkeypatch.setattr(transcript_cache.time, "time", time_falso)
+    return ahora
+
+
+def test_las_dos_claves_devuelven_el_texto(tmp_path):
+    cache = TranscriptCache(str(tmp_path / "menta.db"))
+    claves = [clave_telegram("AgADx"), clave_contenido(b"audio")]
+    cache.put(claves, "hola menta")
+    assert [cache.get(c) for c in claves] == ["hola menta", "hola menta"]
+    assert cache.get(clave_telegram("otro")) is None
+
+
+def test_desaloja_por_cantidad_de_claves(tmp_path, reloj):
+    cache = TranscriptCache(str(tmp_path / "menta.db"), max_entries=3)
+    for i in range(3):
+        cache.put([f"tg:{i}"], f"texto {i}")
+    cache.get("tg:0")  # la 0 pasa a ser la más reciente
+    cache.put(["tg:3"], "texto 3")
+    assert [cache.get(f"tg:{i}") is not None for i in range(4)] == [True, False, True, True]
+    assert cache.stats()["entradas"] == 3
+
+
+def test_desaloja_por_bytes(tmp_path, reloj):
+    cache = TranscriptCache(str(tmp_path / "menta.db"), max_bytes=25)
+    cache.put(["tg:a"], "x" * 10)
+    cache.put(["tg:b"], "y" * 10)
+    cache.put(["tg:c"], "z" * 10)  # 30 bytes: se va la menos usada
+    assert cache.get("tg:a") is None
+    assert cache.get("tg:b") == "y" * 10
+    assert cache.stats()["bytes"] == 20
+
+
+def test_bytes_cuentan_utf8(tmp_path, reloj):
+    cache = TranscriptCache(str(tmp_path / "menta.db"), max_bytes=12)
+    cache.put(["tg:a"], "ñandú")  # 7 bytes en UTF-8
+    cache.put(["tg:b"], "hola")
+    assert cache.stats()["bytes"] == 11
+    cache.put(["tg:c"], "ñ")
+    assert cache.get("tg:a") is None
+
+
+def test_texto_mas_grande_que_el_limite_no_queda(tmp_path, reloj):
+    cache = TranscriptCache(str(tmp_path / "menta.db"), max_bytes=5)
+    cache.put(["tg:a"], "demasiado largo")
+    assert cache.stats() == {"entradas": 0, "bytes": 0, "max_bytes": 5, "max_entries": cache.max_entries}